@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Memory, MemoryBullet
+
+_accesses_lock = threading.Lock()
+# Memory id -> [access events, {bullet id: latest access}] waiting for the write-behind flush
+_accesses = {}
+_accesses_since = None
+_accesses_bullet_count = 0
+
+
+def _get_buffer_seconds():
+    return getattr(settings, "CHAT_MEMORY_ACCESS_BUFFER_SECONDS", 0)
+
+
+def _group_accesses(bullets, accessed_at):
+    grouped = defaultdict(lambda: [1, {}])
+    for bullet in bullets:
+        grouped[bullet.memory_id][1][bullet.pk] = accessed_at
+    return dict(grouped)
+
+
+def record_memory_accesses(bullets, accessed_at=None):
+    """
+    Count one access event for every memory the bullets belong to and bump the bullets'
+    last_accessed. With CHAT_MEMORY_ACCESS_BUFFER_SECONDS set, the writes wait in an
+    in-process buffer and are coalesced into one UPDATE per memory when it flushes.
+    """
+    if not bullets:
+        return
+    grouped = _group_accesses(bullets, accessed_at or timezone.now())
+    if not _get_buffer_seconds():
+        write_memory_accesses(grouped)
+        return
+    # Buffered only once the turn commits, so a rolled-back turn never counts as an access
+    transaction.on_commit(partial(_buffer_memory_accesses, grouped))
+
+
+def _buffer_memory_accesses(grouped):
+    global _accesses_since, _accesses_bullet_count
+    with _accesses_lock:
+        if not _accesses:
+            _accesses_since = time.monotonic()
+            _start_flush_timer()
+        for memory_id, (events, bullets) in grouped.items():
+            pending = _accesses.setdefault(memory_id, [0, {}])
+            pending[0] += events
+            for bullet_id, accessed_at in bullets.items():
+                previous = pending[1].get(bullet_id)
+                if previous is None:
+                    _accesses_bullet_count += 1
+                if previous is None or previous < accessed_at:
+                    pending[1][bullet_id] = accessed_at
+    flush_memory_accesses(only_due=True)
+
+
+def _start_flush_timer():
+    # Writes the buffer even if no request comes along to flush it, which is what bounds
+    # the accesses a crash can lose to one buffer window
+    timer = threading.Timer(_get_buffer_seconds(), _flush_memory_accesses_on_timer)
+    timer.daemon = True
+    timer.start()
+
+
+def _flush_memory_accesses_on_timer():
+    try:
+        flush_memory_accesses()
+    finally:
+        # The timer thread's connection would otherwise stay open until the process exits
+        connection.close()
+
+
+def flush_memory_accesses(only_due=False):
+    """
+    Write buffered accesses and return how many memories were updated. With only_due,
+    nothing is written until the oldest access has waited CHAT_MEMORY_ACCESS_BUFFER_SECONDS
+    or CHAT_MEMORY_ACCESS_BUFFER_SIZE bullet accesses are pending.
+    """
+    global _accesses_since, _accesses_bullet_count
+    with _accesses_lock:
+        if not _accesses:
+            return 0
+        if only_due:
+            waited = time.monotonic() - _accesses_since
+            if (
+                waited < _get_buffer_seconds()
+                and _accesses_bullet_count < getattr(settings, "CHAT_MEMORY_ACCESS_BUFFER_SIZE", 1000)
+            ):
+                return 0
+        pending = dict(_accesses)
+        _accesses.clear()
+        _accesses_since = None
+        _accesses_bullet_count = 0
+
+    write_memory_accesses(pending)
+    return len(pending)
+
+
+def write_memory_accesses(grouped):
+    """
+    Apply {memory id: [access events, {bullet id: accessed_at}]} in one transaction: one
+    bullet UPDATE per memory and one UPDATE for all the memories' access clocks.
+    """
+    with transaction.atomic():
+        for memory_id, (_, bullets) in sorted(grouped.items()):
+            # Greatest keeps a later access already written by another process
+            MemoryBullet.objects.filter(memory_id=memory_id, pk__in=bullets).update(
+                last_accessed=Greatest(
+                    F("last_accessed"),
+                    Case(
+                        *[When(pk=bullet_id, then=Value(accessed_at)) for bullet_id, accessed_at in bullets.items()],
+                        output_field=DateTimeField(),
+                    ),
+                )
+            )
+        Memory.objects.filter(pk__in=grouped).update(
+            access_clock=F("access_clock") + Case(
+                *[When(pk=memory_id, then=Value(events)) for memory_id, (events, _) in grouped.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Memory, MemoryBullet, Message, Session
+from .models import (
+    AnalyticsRollup,
+    ArchivedSession,
+    DailyActivity,
+    ExportJob,
+    HolidayCacheEntry,
+    Memory,
+    MemoryBullet,
+    Message,
+    Session,
+)
 
 
 @admin.register(Session)
@@ -44,3 +54,54 @@ class MemoryBulletAdmin(admin.ModelAdmin):
     search_fields = ("topic", "content", "concept")
     list_select_related = ("memory", "memory__user")
     ordering = ("-last_accessed",)
+
+
+@admin.register(AnalyticsRollup)
+class AnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "day",
+        "memory_type",
+        "session_count",
+        "message_count",
+        "bullet_count",
+        "updated_at",
+    )
+    list_filter = ("memory_type",)
+    search_fields = ("user__user__username", "user__user__email")
+    list_select_related = ("user",)
+    ordering = ("-day",)
+
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(admin.ModelAdmin):
+    list_display = ("id", "day", "active_users", "message_count", "is_dirty", "updated_at")
+    list_filter = ("is_dirty",)
+    ordering = ("-day",)
+
+
+@admin.register(HolidayCacheEntry)
+class HolidayCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "key", "is_negative", "fetched_at", "expires_at")
+    list_filter = ("is_negative",)
+    search_fields = ("key",)
+    ordering = ("key",)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "report", "export_format", "status", "record_count", "created_at", "finished_at")
+    list_filter = ("status", "report", "export_format")
+    search_fields = ("user__user__username", "user__user__email", "uuid")
+    list_select_related = ("user",)
+    ordering = ("-created_at",)
+
+
+@admin.register(ArchivedSession)
+class ArchivedSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "title", "message_count", "created_at", "updated_at", "archived_at")
+    search_fields = ("user__user__username", "user__user__email", "title")
+    list_select_related = ("user",)
+    ordering = ("-archived_at",)
+    exclude = ("messages",)
@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+
+from django.db.models import Max, Min, Q, Sum
+
+from .models import AnalyticsRollup
+from .models.analytics_rollup import STRENGTH_BUCKETS
+from .models.memory_bullet import MemoryType
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    total_memories: int
+    total_sessions: int
+    total_messages: int
+    avg_strength: float | None
+    max_strength: int | None
+    min_strength: int | None
+    total_helpful: int
+    total_harmful: int
+    # (memory_type, count, avg_strength) rows for every type that has at least one bullet
+    type_rows: tuple
+    # (bucket label, count) pairs for the strength histogram
+    strength_buckets: tuple
+
+    @property
+    def type_distribution_raw(self):
+        return [
+            {"memory_type": memory_type, "count": count}
+            for memory_type, count, _ in self.type_rows
+        ]
+
+    @property
+    def type_summary(self):
+        type_choices = dict(MemoryType.choices)
+        return [
+            {
+                "memory_type": memory_type,
+                "label": type_choices.get(memory_type, str(memory_type)),
+                "count": count,
+            }
+            for memory_type, count, _ in self.type_rows
+        ]
+
+    @property
+    def type_grouped_rows(self):
+        type_choices = dict(MemoryType.choices)
+        return [
+            {
+                "group_label": type_choices.get(memory_type, str(memory_type)),
+                "bullet_count": count,
+                "avg_strength": avg_strength,
+            }
+            for memory_type, count, avg_strength in self.type_rows
+        ]
+
+
+def _type_count_key(memory_type):
+    return f"type_{memory_type}_count"
+
+
+def _type_strength_sum_key(memory_type):
+    return f"type_{memory_type}_strength_sum"
+
+
+def _average(total, count):
+    if not count:
+        return None
+    return total / count
+
+
+def compute_analytics_snapshot(profile):
+    aggregates = {
+        "total_memories": Sum("bullet_count"),
+        "total_sessions": Sum("session_count"),
+        "total_messages": Sum("message_count"),
+        "strength_total": Sum("strength_sum"),
+        "max_strength": Max("strength_max"),
+        "min_strength": Min("strength_min"),
+        "total_helpful": Sum("helpful_sum"),
+        "total_harmful": Sum("harmful_sum"),
+    }
+    for memory_type in MemoryType.values:
+        aggregates[_type_count_key(memory_type)] = Sum(
+            "bullet_count",
+            filter=Q(memory_type=memory_type),
+        )
+        aggregates[_type_strength_sum_key(memory_type)] = Sum(
+            "strength_sum",
+            filter=Q(memory_type=memory_type),
+        )
+    for _, _, field in STRENGTH_BUCKETS:
+        aggregates[field] = Sum(field)
+    row = AnalyticsRollup.objects.filter(user=profile).aggregate(**aggregates)
+
+    total_memories = row["total_memories"] or 0
+    type_rows = tuple(
+        (
+            memory_type,
+            row[_type_count_key(memory_type)],
+            _average(row[_type_strength_sum_key(memory_type)], row[_type_count_key(memory_type)]),
+        )
+        for memory_type in MemoryType.values
+        if row[_type_count_key(memory_type)]
+    )
+    return AnalyticsSnapshot(
+        total_memories=total_memories,
+        total_sessions=row["total_sessions"] or 0,
+        total_messages=row["total_messages"] or 0,
+        avg_strength=_average(row["strength_total"], total_memories),
+        max_strength=row["max_strength"],
+        min_strength=row["min_strength"],
+        total_helpful=row["total_helpful"] or 0,
+        total_harmful=row["total_harmful"] or 0,
+        type_rows=type_rows,
+        strength_buckets=tuple((label, row[field] or 0) for label, _, field in STRENGTH_BUCKETS),
+    )
+
+
+def get_daily_session_counts(profile, since_day):
+    return list(
+        AnalyticsRollup.objects
+        .filter(user=profile, day__gte=since_day, session_count__gt=0)
+        .order_by("day")
+        .values_list("day", "session_count")
+    )
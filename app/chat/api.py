@@ -9,6 +9,9 @@ from .holiday_service import (
     InvalidHolidayCountryCodeError,
     get_daily_activity_with_holidays_payload,
 )
+from .http_cache import cache_public_activity_json
+from .ingest_service import BulkIngestError, ingest_memory_bullets, parse_bulk_ingest_payload
+from .pagination import InvalidCursorError
 from .service import (
     get_api_analytics_summary_payload,
     get_api_daily_active_users_payload,
@@ -18,16 +21,40 @@ from .service import (
 )
 
 
+def _invalid_cursor_response(exc):
+    return JsonResponse({"error": "invalid_cursor", "message": str(exc)}, status=400)
+
+
 @login_required(login_url="/")
 @require_http_methods(["GET"])
 def api_memory_bullets(request):
-    payload = get_api_memory_bullets_payload(
-        request.user,
-        q=request.GET.get("q", ""),
-        memory_type=request.GET.get("type", ""),
-        topic=request.GET.get("topic", ""),
-        strength_min=request.GET.get("strength_min", ""),
-    )
+    try:
+        payload = get_api_memory_bullets_payload(
+            request.user,
+            q=request.GET.get("q", ""),
+            memory_type=request.GET.get("type", ""),
+            topic=request.GET.get("topic", ""),
+            strength_min=request.GET.get("strength_min", ""),
+            mode=request.GET.get("mode", ""),
+            sort=request.GET.get("sort", ""),
+            cursor=request.GET.get("cursor", ""),
+            limit=request.GET.get("limit", ""),
+        )
+    except InvalidCursorError as exc:
+        return _invalid_cursor_response(exc)
+    return JsonResponse(payload)
+
+
+@login_required(login_url="/")
+@require_http_methods(["POST"])
+def api_memory_bullets_bulk(request):
+    # Read as a stream rather than request.body, so uploads are capped by item count
+    # (CHAT_BULK_INGEST_MAX_ITEMS) instead of DATA_UPLOAD_MAX_MEMORY_SIZE
+    try:
+        items = parse_bulk_ingest_payload(request, request.content_type)
+        payload = ingest_memory_bullets(request.user, items, memory_id=request.GET.get("memory_id"))
+    except BulkIngestError as exc:
+        return JsonResponse({"error": exc.code, "message": str(exc)}, status=exc.status)
     return JsonResponse(payload)
 
 
@@ -41,29 +68,43 @@ def api_analytics_summary(request):
 @method_decorator(require_http_methods(["GET"]), name="dispatch")
 class SessionAPIView(View):
     def get(self, request):
-        return JsonResponse(
-            get_api_sessions_payload(request.user, q=request.GET.get("q", ""))
-        )
+        try:
+            payload = get_api_sessions_payload(
+                request.user,
+                q=request.GET.get("q", ""),
+                cursor=request.GET.get("cursor", ""),
+                limit=request.GET.get("limit", ""),
+            )
+        except InvalidCursorError as exc:
+            return _invalid_cursor_response(exc)
+        return JsonResponse(payload)
 
 
 @method_decorator(login_required(login_url="/"), name="dispatch")
 @method_decorator(require_http_methods(["GET"]), name="dispatch")
 class MessageAPIView(View):
     def get(self, request, session_id):
-        payload = get_api_messages_payload(
-            request.user,
-            session_id,
-            role_filter=request.GET.get("role", ""),
-        )
+        try:
+            payload = get_api_messages_payload(
+                request.user,
+                session_id,
+                role_filter=request.GET.get("role", ""),
+                cursor=request.GET.get("cursor", ""),
+                limit=request.GET.get("limit", ""),
+            )
+        except InvalidCursorError as exc:
+            return _invalid_cursor_response(exc)
         return JsonResponse(payload)
 
 
 @require_http_methods(["GET"])
+@cache_public_activity_json
 def api_public_daily_active_users(request):
     return JsonResponse(get_api_daily_active_users_payload())
 
 
 @require_http_methods(["GET"])
+@cache_public_activity_json
 def api_public_daily_active_users_with_holidays(request):
     country_param = request.GET.get("country", request.GET.get("q", "US"))
     pretty_json = {"indent": 2}
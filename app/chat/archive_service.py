@@ -0,0 +1,183 @@
+import json
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ArchivedSession, Message, Session
+from .rollup_service import archived_session_deletes, rollup_day
+
+ARCHIVE_COMPRESSION_LEVEL = 6
+REHYDRATE_BATCH_SIZE = 500
+
+
+def pack_archived_messages(rows):
+    payload = json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return payload, zlib.compress(payload, ARCHIVE_COMPRESSION_LEVEL)
+
+
+def unpack_archived_messages(blob):
+    # Postgres hands BinaryField values back as memoryview
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def read_archived_messages(archived):
+    """
+    Unsaved Message instances for an archived session, oldest first, so read-only views
+    can show the conversation without moving it back into the hot tables.
+    """
+    return [
+        Message(
+            id=message_id,
+            session_id=archived.pk,
+            role=role,
+            content=content,
+            created_at=datetime.fromisoformat(written_at),
+        )
+        for message_id, role, content, written_at in unpack_archived_messages(archived.messages)
+    ]
+
+
+def _build_archived_session(session_row, message_rows):
+    session_id, profile_id, title, created_at, updated_at = session_row
+    message_days = Counter(rollup_day(row[3]).isoformat() for row in message_rows)
+    payload, blob = pack_archived_messages(
+        [[message_id, role, content, written_at.isoformat()] for message_id, role, content, written_at in message_rows]
+    )
+    archived = ArchivedSession(
+        id=session_id,
+        user_id=profile_id,
+        title=title,
+        created_at=created_at,
+        updated_at=updated_at,
+        message_count=len(message_rows),
+        message_days=dict(message_days),
+        messages=blob,
+    )
+    return archived, len(payload)
+
+
+def _idle_sessions(cutoff):
+    # Buffered session touches can lag behind their messages, so recent messages also keep a
+    # session hot; the check is one (session, created_at) index probe per candidate
+    recent_messages = Message.objects.filter(session_id=OuterRef("pk"), created_at__gte=cutoff)
+    return Session.objects.filter(updated_at__lt=cutoff).filter(~Exists(recent_messages))
+
+
+def _archive_batch(after_id, cutoff, batch_size):
+    # Read and write inside one short transaction, so a turn written meanwhile either lands
+    # before the read (and is archived) or after the delete (and finds no session)
+    with transaction.atomic():
+        session_rows = list(
+            _idle_sessions(cutoff)
+            .filter(id__gt=after_id)
+            .order_by("id")
+            .values_list("id", "user_id", "title", "created_at", "updated_at")[:batch_size]
+        )
+        if not session_rows:
+            return None, [], 0
+
+        messages = defaultdict(list)
+        for session_id, *row in (
+            Message.objects
+            .filter(session_id__in=[row[0] for row in session_rows])
+            .order_by("session_id", "created_at", "id")
+            .values_list("session_id", "id", "role", "content", "created_at")
+        ):
+            messages[session_id].append(row)
+
+        archives, raw_bytes = [], 0
+        for session_row in session_rows:
+            archived, size = _build_archived_session(session_row, messages.get(session_row[0], []))
+            archives.append(archived)
+            raw_bytes += size
+
+        session_ids = [archived.id for archived in archives]
+        ArchivedSession.objects.bulk_create(archives)
+        with archived_session_deletes():
+            # Messages first and without their bodies: the delete handlers only need the keys
+            Message.objects.filter(session_id__in=session_ids).only("id", "session_id").delete()
+            Session.objects.filter(id__in=session_ids).delete()
+    return session_rows[-1][0], archives, raw_bytes
+
+
+def archive_idle_sessions(now=None, idle_days=None, batch_size=None, dry_run=False):
+    """
+    Move sessions untouched for idle_days (default CHAT_ARCHIVE_IDLE_DAYS), with their
+    messages, into ArchivedSession rows holding the messages as compressed JSON. Analytics
+    rollups keep counting them, reads are served from the archive, and a write restores
+    one. Returns size and throughput metrics.
+    """
+    now = now or timezone.now()
+    idle_days = getattr(settings, "CHAT_ARCHIVE_IDLE_DAYS", 180) if idle_days is None else idle_days
+    batch_size = batch_size or getattr(settings, "CHAT_ARCHIVE_BATCH_SIZE", 100)
+    metrics = {"sessions": 0, "messages": 0, "batches": 0, "raw_bytes": 0, "stored_bytes": 0, "max_write_seconds": 0.0}
+    started = time.perf_counter()
+    if idle_days <= 0:
+        metrics["seconds"] = 0.0
+        return metrics
+
+    cutoff = now - timedelta(days=idle_days)
+    if dry_run:
+        idle = _idle_sessions(cutoff)
+        metrics["sessions"] = idle.count()
+        metrics["messages"] = Message.objects.filter(session__in=idle).count()
+        metrics["seconds"] = time.perf_counter() - started
+        return metrics
+
+    last_id = 0
+    while True:
+        write_started = time.perf_counter()
+        last_id, archives, raw_bytes = _archive_batch(last_id, cutoff, batch_size)
+        if last_id is None:
+            break
+        metrics["max_write_seconds"] = max(metrics["max_write_seconds"], time.perf_counter() - write_started)
+        metrics["batches"] += 1
+        metrics["sessions"] += len(archives)
+        metrics["messages"] += sum(archived.message_count for archived in archives)
+        metrics["raw_bytes"] += raw_bytes
+        metrics["stored_bytes"] += sum(len(archived.messages) for archived in archives)
+
+    metrics["seconds"] = time.perf_counter() - started
+    return metrics
+
+
+def rehydrate_archived_session(profile_id, session_id):
+    """
+    Move an archived session and its messages back into the hot tables under their
+    original ids and timestamps, returning the session, or None if the user has no such
+    archive. Bulk inserts send no post_save, so the rollups, which never stopped counting
+    the archive, are left as they are.
+    """
+    with transaction.atomic():
+        archived = (
+            ArchivedSession.objects
+            .select_for_update()
+            .filter(user_id=profile_id, pk=session_id)
+            .first()
+        )
+        if archived is None:
+            return None
+
+        session = Session(id=archived.pk, user_id=archived.user_id, title=archived.title)
+        Session.objects.bulk_create([session])
+        # Inserts stamp auto_now fields with the current time; put the archived timestamps back
+        Session.objects.filter(pk=session.pk).update(created_at=archived.created_at, updated_at=archived.updated_at)
+        session.created_at, session.updated_at = archived.created_at, archived.updated_at
+
+        rows = unpack_archived_messages(archived.messages)
+        messages = Message.objects.bulk_create(
+            [Message(id=message_id, session=session, role=role, content=content) for message_id, role, content, _ in rows],
+            batch_size=REHYDRATE_BATCH_SIZE,
+        )
+        for message, row in zip(messages, rows):
+            message.created_at = datetime.fromisoformat(row[3])
+        Message.objects.bulk_update(messages, ["created_at"], batch_size=REHYDRATE_BATCH_SIZE)
+
+        archived.delete()
+    return session
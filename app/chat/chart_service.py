@@ -0,0 +1,554 @@
+import hashlib
+import io
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics_service import compute_analytics_snapshot, get_daily_session_counts
+from .rollup_service import rollup_day
+from .service import get_or_create_profile_for_user
+from app.users.models import UserProfile as Profile
+
+PROGRESSIVE_COLORS = ["#575BEF", "#6F82FF", "#8DA0FF", "#AEBBFF", "#D6DDFF"]
+SEGMENT_COLORS = ["#9698FF", "#664FA1", "#FFC5D6", "#DAC6FF", "#B4EDE4"]
+CHART_BG = "#F7F8FF"
+CHART_GRID = "#DCE1FF"
+CHART_TEXT = "#2F3A4A"
+CHART_MUTED = "#6A7290"
+
+CHART_CACHE_PREFIX = "chat:chart"
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+
+_executor = None
+_executor_lock = threading.Lock()
+_queued_profile_ids = set()
+_pending = threading.local()
+
+
+def _get_cache():
+    return caches[getattr(settings, "CHAT_CHART_CACHE_ALIAS", "default")]
+
+
+def _get_cache_ttl():
+    return getattr(settings, "CHAT_CHART_CACHE_TTL", 60 * 60 * 24)
+
+
+def _apply_chart_style(ax):
+    ax.set_facecolor(CHART_BG)
+    ax.tick_params(colors=CHART_MUTED, labelsize=9)
+    ax.yaxis.grid(True, color=CHART_GRID, linestyle="--", linewidth=0.8, alpha=0.7)
+    ax.set_axisbelow(True)
+    for spine in ("top", "right"):
+        ax.spines[spine].set_visible(False)
+    for spine in ("left", "bottom"):
+        ax.spines[spine].set_color(CHART_GRID)
+        ax.spines[spine].set_linewidth(1)
+
+
+def _new_figure(figsize):
+    # matplotlib is only imported when a PNG is actually rendered; SVG and Vega-Lite never load it
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=figsize)
+
+
+def _render_chart_to_png(fig):
+    # Figures are built with the object-oriented API (no pyplot state), so workers can render in parallel
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
+    buf.seek(0)
+    return buf.getvalue()
+
+
+def _memory_type_chart_data(snapshot):
+    return tuple((item["label"], item["count"]) for item in snapshot.type_summary)
+
+
+def _render_memory_type_chart(data):
+    labels = [label for label, _ in data]
+    counts = [count for _, count in data]
+
+    fig = _new_figure((7, 5))
+    ax = fig.subplots()
+    if labels:
+        non_zero_count = sum(1 for c in counts if c > 0)
+        wedge_linewidth = 0 if non_zero_count <= 1 else 1.2
+        wedges, texts, autotexts = ax.pie(
+            counts,
+            labels=labels,
+            autopct="%1.1f%%",
+            colors=SEGMENT_COLORS[:len(labels)],
+            startangle=140,
+            wedgeprops={"linewidth": wedge_linewidth, "edgecolor": "#FFFFFF"},
+        )
+        for txt in texts:
+            txt.set_color(CHART_TEXT)
+            txt.set_fontsize(10)
+        for txt in autotexts:
+            txt.set_color("#FFFFFF")
+            txt.set_fontsize(9)
+            txt.set_fontweight("semibold")
+        ax.set_title("Memory Type Distribution", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
+        ax.legend(
+            wedges,
+            labels,
+            title="Memory Type",
+            loc="center left",
+            bbox_to_anchor=(1.02, 0.5),
+            frameon=False,
+            labelcolor=CHART_MUTED,
+        )
+    else:
+        ax.text(0.5, 0.5, "No memory data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.axis("off")
+
+    fig.patch.set_facecolor(CHART_BG)
+    return _render_chart_to_png(fig)
+
+
+def _memory_strength_chart_data(snapshot):
+    return snapshot.total_memories, snapshot.strength_buckets
+
+
+def _render_memory_strength_chart(data):
+    total_memories, strength_buckets = data
+    buckets = dict(strength_buckets)
+
+    fig = _new_figure((7, 5))
+    ax = fig.subplots()
+    if total_memories:
+        bars = ax.bar(
+            buckets.keys(),
+            buckets.values(),
+            color=PROGRESSIVE_COLORS,
+            edgecolor="#FFFFFF",
+            linewidth=1,
+        )
+        ax.set_title("Memory Strength Distribution", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
+        ax.set_xlabel("Strength Range", color=CHART_MUTED, fontsize=10)
+        ax.set_ylabel("Count", color=CHART_MUTED, fontsize=10)
+        _apply_chart_style(ax)
+        ax.bar_label(bars, padding=3, color=CHART_MUTED, fontsize=9)
+        ax.legend(
+            [bars[0]],
+            ["Memory bullets per strength range"],
+            loc="upper right",
+            frameon=False,
+            labelcolor=CHART_MUTED,
+        )
+    else:
+        ax.text(0.5, 0.5, "No memory data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.axis("off")
+
+    fig.patch.set_facecolor(CHART_BG)
+    return _render_chart_to_png(fig)
+
+
+def _activity_chart_data(profile):
+    thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
+    return tuple(get_daily_session_counts(profile, rollup_day(thirty_days_ago)))
+
+
+def _render_activity_chart(daily):
+    from matplotlib.ticker import MaxNLocator
+
+    fig = _new_figure((8, 4))
+    ax = fig.subplots()
+    if daily:
+        days = [day.strftime("%m/%d") for day, _ in daily]
+        counts = [count for _, count in daily]
+        x = range(len(days))
+        ax.plot(
+            x,
+            counts,
+            marker="o",
+            color=PROGRESSIVE_COLORS[0],
+            linewidth=2.5,
+            markersize=5,
+            label="Sessions Created",
+        )
+        ax.fill_between(x, counts, alpha=0.22, color=PROGRESSIVE_COLORS[-1])
+        ax.set_xticks(x)
+        ax.set_xticklabels(days, rotation=45, ha="right", fontsize=8, color=CHART_MUTED)
+        ax.set_title("Conversation Activity (Last 30 Days)", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
+        ax.set_xlabel("Date", color=CHART_MUTED, fontsize=10)
+        ax.set_ylabel("Sessions Created", color=CHART_MUTED, fontsize=10)
+        max_count = max(counts)
+        ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.set_ylim(bottom=0, top=max_count + max(1, math.ceil(max_count * 0.15)))
+        _apply_chart_style(ax)
+        ax.legend(loc="upper left", frameon=False, labelcolor=CHART_MUTED)
+    else:
+        ax.text(0.5, 0.5, "No activity data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.axis("off")
+
+    fig.patch.set_facecolor(CHART_BG)
+    fig.tight_layout()
+    return _render_chart_to_png(fig)
+
+
+def _svg_document(width, height, title, body):
+    return "".join(
+        [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="sans-serif" role="img">',
+            f"<title>{escape(title)}</title>",
+            f'<rect width="{width}" height="{height}" fill="{CHART_BG}"/>',
+            f'<text x="{width / 2:.1f}" y="30" text-anchor="middle" font-size="18" font-weight="bold" '
+            f'fill="{CHART_TEXT}">{escape(title)}</text>',
+            *body,
+            "</svg>",
+        ]
+    )
+
+
+def _svg_empty_message(width, height, title, message):
+    return _svg_document(
+        width,
+        height,
+        title,
+        [
+            f'<text x="{width / 2:.1f}" y="{height / 2:.1f}" text-anchor="middle" font-size="16" '
+            f'fill="{CHART_MUTED}">{escape(message)}</text>'
+        ],
+    )
+
+
+def _svg_axes(left, top, plot_width, plot_height, max_value):
+    # Horizontal grid lines with integer tick labels, like the PNG charts' dashed y-grid
+    step = max(1, math.ceil(max_value / 5))
+    parts = []
+    for value in range(0, max_value + 1, step):
+        y = top + plot_height - value / max_value * plot_height
+        parts.append(
+            f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_width}" y2="{y:.1f}" '
+            f'stroke="{CHART_GRID}" stroke-dasharray="4 3"/>'
+        )
+        parts.append(
+            f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end" font-size="11" fill="{CHART_MUTED}">{value}</text>'
+        )
+    return parts
+
+
+def _render_memory_type_svg(data):
+    title = "Memory Type Distribution"
+    total = sum(count for _, count in data)
+    if not total:
+        return _svg_empty_message(560, 400, title, "No memory data yet")
+
+    cx, cy, radius = 200, 215, 150
+    parts = []
+    angle = -math.pi / 2
+    for index, (label, count) in enumerate(data):
+        if not count:
+            continue
+        color = SEGMENT_COLORS[index % len(SEGMENT_COLORS)]
+        sweep = count / total * 2 * math.pi
+        if count == total:
+            parts.append(f'<circle cx="{cx}" cy="{cy}" r="{radius}" fill="{color}"/>')
+        else:
+            x1, y1 = cx + radius * math.cos(angle), cy + radius * math.sin(angle)
+            x2, y2 = cx + radius * math.cos(angle + sweep), cy + radius * math.sin(angle + sweep)
+            large_arc = 1 if sweep > math.pi else 0
+            parts.append(
+                f'<path d="M{cx},{cy} L{x1:.2f},{y1:.2f} A{radius},{radius} 0 {large_arc},1 {x2:.2f},{y2:.2f} Z" '
+                f'fill="{color}" stroke="#FFFFFF" stroke-width="1.5"/>'
+            )
+        mid = angle + sweep / 2
+        parts.append(
+            f'<text x="{cx + radius * 0.62 * math.cos(mid):.1f}" y="{cy + radius * 0.62 * math.sin(mid) + 4:.1f}" '
+            f'text-anchor="middle" font-size="12" font-weight="600" fill="#FFFFFF">{count / total * 100:.1f}%</text>'
+        )
+        angle += sweep
+
+    parts.append(f'<text x="380" y="150" font-size="13" font-weight="bold" fill="{CHART_TEXT}">Memory Type</text>')
+    for index, (label, count) in enumerate(data):
+        y = 175 + index * 24
+        parts.append(f'<rect x="380" y="{y - 11}" width="14" height="14" rx="3" fill="{SEGMENT_COLORS[index % len(SEGMENT_COLORS)]}"/>')
+        parts.append(f'<text x="402" y="{y}" font-size="12" fill="{CHART_MUTED}">{escape(label)} ({count})</text>')
+    return _svg_document(560, 400, title, parts)
+
+
+def _render_memory_strength_svg(data):
+    title = "Memory Strength Distribution"
+    total_memories, strength_buckets = data
+    if not total_memories:
+        return _svg_empty_message(560, 400, title, "No memory data yet")
+
+    left, top, plot_width, plot_height = 60, 60, 470, 280
+    max_value = max(max(count for _, count in strength_buckets), 1)
+    parts = _svg_axes(left, top, plot_width, plot_height, max_value)
+    slot = plot_width / len(strength_buckets)
+    for index, (label, count) in enumerate(strength_buckets):
+        bar_height = count / max_value * plot_height
+        x = left + index * slot + slot * 0.15
+        y = top + plot_height - bar_height
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{slot * 0.7:.1f}" height="{bar_height:.1f}" '
+            f'fill="{PROGRESSIVE_COLORS[index % len(PROGRESSIVE_COLORS)]}"/>'
+        )
+        parts.append(
+            f'<text x="{x + slot * 0.35:.1f}" y="{y - 5:.1f}" text-anchor="middle" font-size="11" fill="{CHART_MUTED}">{count}</text>'
+        )
+        parts.append(
+            f'<text x="{x + slot * 0.35:.1f}" y="{top + plot_height + 18}" text-anchor="middle" font-size="11" '
+            f'fill="{CHART_MUTED}">{escape(label)}</text>'
+        )
+    parts.append(
+        f'<text x="{left + plot_width / 2:.1f}" y="{top + plot_height + 40}" text-anchor="middle" font-size="12" '
+        f'fill="{CHART_MUTED}">Strength Range</text>'
+    )
+    return _svg_document(560, 400, title, parts)
+
+
+def _render_activity_svg(daily):
+    title = "Conversation Activity (Last 30 Days)"
+    if not daily:
+        return _svg_empty_message(640, 320, title, "No activity data yet")
+
+    left, top, plot_width, plot_height = 50, 55, 560, 190
+    max_count = max(count for _, count in daily)
+    max_value = max_count + max(1, math.ceil(max_count * 0.15))
+    parts = _svg_axes(left, top, plot_width, plot_height, max_value)
+    step = plot_width / max(len(daily) - 1, 1)
+    points = [
+        (left + index * step if len(daily) > 1 else left + plot_width / 2, top + plot_height - count / max_value * plot_height)
+        for index, (_, count) in enumerate(daily)
+    ]
+    baseline = top + plot_height
+    area = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    parts.append(
+        f'<polygon points="{points[0][0]:.1f},{baseline} {area} {points[-1][0]:.1f},{baseline}" '
+        f'fill="{PROGRESSIVE_COLORS[-1]}" fill-opacity="0.22"/>'
+    )
+    parts.append(f'<polyline points="{area}" fill="none" stroke="{PROGRESSIVE_COLORS[0]}" stroke-width="2.5"/>')
+    for (day, count), (x, y) in zip(daily, points):
+        parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3.5" fill="{PROGRESSIVE_COLORS[0]}"><title>{count}</title></circle>')
+        parts.append(
+            f'<text x="{x:.1f}" y="{baseline + 14}" text-anchor="end" font-size="10" fill="{CHART_MUTED}" '
+            f'transform="rotate(-45 {x:.1f} {baseline + 14})">{day.strftime("%m/%d")}</text>'
+        )
+    return _svg_document(640, 320, title, parts)
+
+
+def _memory_type_vega_spec(data):
+    return {
+        "title": "Memory Type Distribution",
+        "data": {"values": [{"memory_type": label, "count": count} for label, count in data]},
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "count", "type": "quantitative"},
+            "color": {
+                "field": "memory_type",
+                "type": "nominal",
+                "title": "Memory Type",
+                "scale": {"range": SEGMENT_COLORS},
+            },
+        },
+    }
+
+
+def _memory_strength_vega_spec(data):
+    _, strength_buckets = data
+    return {
+        "title": "Memory Strength Distribution",
+        "data": {"values": [{"strength_range": label, "count": count} for label, count in strength_buckets]},
+        "mark": {"type": "bar", "tooltip": True, "color": PROGRESSIVE_COLORS[0]},
+        "encoding": {
+            "x": {
+                "field": "strength_range",
+                "type": "ordinal",
+                "title": "Strength Range",
+                "sort": [label for label, _ in strength_buckets],
+            },
+            "y": {"field": "count", "type": "quantitative", "title": "Count"},
+        },
+    }
+
+
+def _activity_vega_spec(daily):
+    return {
+        "title": "Conversation Activity (Last 30 Days)",
+        "data": {"values": [{"date": day.isoformat(), "sessions": count} for day, count in daily]},
+        "mark": {"type": "line", "point": True, "tooltip": True, "color": PROGRESSIVE_COLORS[0]},
+        "encoding": {
+            "x": {"field": "date", "type": "temporal", "title": "Date"},
+            "y": {"field": "sessions", "type": "quantitative", "title": "Sessions Created"},
+        },
+    }
+
+
+# Chart name -> (data loader, renderer); the loader output is the cache fingerprint
+CHARTS = {
+    "memory-type": (_memory_type_chart_data, _render_memory_type_chart),
+    "memory-strength": (_memory_strength_chart_data, _render_memory_strength_chart),
+    "activity": (_activity_chart_data, _render_activity_chart),
+}
+# Charts drawn from the analytics snapshot; their loaders take the snapshot instead of the profile
+SNAPSHOT_CHARTS = {"memory-type", "memory-strength"}
+
+SVG_RENDERERS = {
+    "memory-type": _render_memory_type_svg,
+    "memory-strength": _render_memory_strength_svg,
+    "activity": _render_activity_svg,
+}
+
+VEGA_SPEC_BUILDERS = {
+    "memory-type": _memory_type_vega_spec,
+    "memory-strength": _memory_strength_vega_spec,
+    "activity": _activity_vega_spec,
+}
+
+
+def _chart_cache_key(chart_name, profile_id, data):
+    fingerprint = hashlib.sha256(repr(data).encode()).hexdigest()[:32]
+    return f"{CHART_CACHE_PREFIX}:{chart_name}:{profile_id}:{fingerprint}"
+
+
+def get_chart_png_for_profile(profile, chart_name, render_missing=True, snapshot=None):
+    data = _load_chart_data(profile, chart_name, snapshot)
+    render = CHARTS[chart_name][1]
+    cache = _get_cache()
+    cache_key = _chart_cache_key(chart_name, profile.pk, data)
+    png = cache.get(cache_key)
+    if png is None and render_missing:
+        png = render(data)
+        cache.set(cache_key, png, _get_cache_ttl())
+    return png
+
+
+def _load_chart_data(profile, chart_name, snapshot=None):
+    if chart_name not in CHARTS:
+        raise Http404("Chart not found")
+    load_data = CHARTS[chart_name][0]
+    if chart_name not in SNAPSHOT_CHARTS:
+        return load_data(profile)
+    return load_data(snapshot if snapshot is not None else compute_analytics_snapshot(profile))
+
+
+def get_chart_svg_for_user(user, chart_name):
+    data = _load_chart_data(get_or_create_profile_for_user(user), chart_name)
+    return SVG_RENDERERS[chart_name](data)
+
+
+def get_chart_vega_spec_for_user(user, chart_name):
+    data = _load_chart_data(get_or_create_profile_for_user(user), chart_name)
+    spec = VEGA_SPEC_BUILDERS[chart_name](data)
+    return {"$schema": VEGA_LITE_SCHEMA, "width": "container", **spec}
+
+
+def get_dashboard_chart_urls():
+    chart_format = getattr(settings, "CHAT_DASHBOARD_CHART_FORMAT", "svg")
+    urls = {}
+    for chart_name in CHARTS:
+        if chart_format == "png":
+            urls[chart_name.replace("-", "_")] = reverse(f"chat:{chart_name.replace('-', '_')}_chart")
+        else:
+            urls[chart_name.replace("-", "_")] = reverse("chat:analytics_chart_svg", args=[chart_name])
+    return urls
+
+
+def get_dashboard_chart_svgs(profile, snapshot):
+    """
+    Inline SVG for each dashboard chart, drawn from the snapshot the page already
+    computed, or an empty dict when the dashboard embeds PNGs by URL.
+    """
+    if getattr(settings, "CHAT_DASHBOARD_CHART_FORMAT", "svg") != "svg":
+        return {}
+    return {
+        chart_name.replace("-", "_"): SVG_RENDERERS[chart_name](_load_chart_data(profile, chart_name, snapshot))
+        for chart_name in CHARTS
+    }
+
+
+def get_memory_type_chart_png(user):
+    return get_chart_png_for_profile(get_or_create_profile_for_user(user), "memory-type")
+
+
+def get_memory_strength_chart_png(user):
+    return get_chart_png_for_profile(get_or_create_profile_for_user(user), "memory-strength")
+
+
+def get_activity_chart_png(user):
+    return get_chart_png_for_profile(get_or_create_profile_for_user(user), "activity")
+
+
+def prerender_charts_for_profile(profile):
+    # One snapshot feeds both snapshot charts, and each chart's data is loaded once
+    snapshot = compute_analytics_snapshot(profile)
+    cache = _get_cache()
+    rendered = 0
+    for chart_name, (_, render) in CHARTS.items():
+        data = _load_chart_data(profile, chart_name, snapshot)
+        cache_key = _chart_cache_key(chart_name, profile.pk, data)
+        if cache.get(cache_key) is None:
+            cache.set(cache_key, render(data), _get_cache_ttl())
+            rendered += 1
+    return rendered
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "CHAT_CHART_RENDER_WORKERS", 2),
+                thread_name_prefix="chart-prerender",
+            )
+    return _executor
+
+
+def _prerender_in_background(profile_id):
+    with _executor_lock:
+        _queued_profile_ids.discard(profile_id)
+    try:
+        profile = Profile.objects.filter(pk=profile_id).first()
+        if profile is None:
+            return 0
+        return prerender_charts_for_profile(profile)
+    finally:
+        connection.close()
+
+
+def _submit_pending_prerenders():
+    profile_ids = getattr(_pending, "profile_ids", set())
+    _pending.profile_ids = set()
+    futures = []
+    for profile_id in sorted(profile_ids):
+        # A profile already waiting in the queue picks up this change when its job runs
+        with _executor_lock:
+            if profile_id in _queued_profile_ids:
+                continue
+            _queued_profile_ids.add(profile_id)
+        futures.append(_get_executor().submit(_prerender_in_background, profile_id))
+    return futures
+
+
+def schedule_chart_prerender(profile_id):
+    # Only PNGs are worth warming; SVG and Vega-Lite charts are cheap to build per request
+    if not getattr(settings, "CHAT_CHART_PRERENDER", True):
+        return
+    if getattr(settings, "CHAT_DASHBOARD_CHART_FORMAT", "svg") != "png":
+        return
+    if not hasattr(_pending, "profile_ids"):
+        _pending.profile_ids = set()
+    _pending.profile_ids.add(profile_id)
+    # Rendered after commit so the worker's own connection sees the new rows
+    if connection.in_atomic_block:
+        transaction.on_commit(_submit_pending_prerenders)
+    else:
+        _submit_pending_prerenders()
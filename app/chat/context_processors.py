@@ -1,7 +1,14 @@
-from .service import get_sidebar_sessions_for_user
+from django.utils.functional import SimpleLazyObject
+
+from .service import get_sidebar_for_user
 
 
 def user_sessions(request):
     if not request.user.is_authenticated:
-        return {"sessions": []}
-    return {"sessions": get_sidebar_sessions_for_user(request.user)}
+        return {"sessions": [], "sidebar_has_more": False}
+    # Resolved only when a template renders the sidebar
+    sidebar = SimpleLazyObject(lambda: get_sidebar_for_user(request.user))
+    return {
+        "sessions": SimpleLazyObject(lambda: sidebar["sessions"]),
+        "sidebar_has_more": SimpleLazyObject(lambda: sidebar["has_more"]),
+    }
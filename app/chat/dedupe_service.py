@@ -0,0 +1,320 @@
+import re
+import time
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower, Trim
+
+from .chart_service import schedule_chart_prerender
+from .models import Memory, MemoryBullet
+from .retrieval_service import embed_memory_bullets, record_vector_changes
+from .rollup_service import REFRESH_BULLETS, batched_bullet_deletes, rollup_day, schedule_rollup_refresh
+
+SHINGLE_BYTES = 4
+MINHASH_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above about 0.5 Jaccard often share a band, above 0.8 almost always
+LSH_BAND_ROWS = 4
+# Shingles hashed per NumPy pass; 1 MB of hashes stays in cache, which beats larger passes
+SIGNATURE_CHUNK = 1 << 11
+MERGE_FIELDS = ("helpful_count", "harmful_count", "strength", "tags", "ttl_days", "last_accessed", "concept")
+
+# Fixed seed, so every process computes the same signature for the same text
+_rng = np.random.default_rng(20261018)
+_MULTIPLIERS = _rng.integers(1, 1 << 62, size=MINHASH_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_OFFSETS = _rng.integers(0, 1 << 62, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_BAND_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_bullet_content(content):
+    return " ".join(unicodedata.normalize("NFKC", content or "").casefold().split())
+
+
+def normalize_bullet_topic(topic):
+    return " ".join((topic or "").casefold().split())
+
+
+def get_dedupe_threshold():
+    return float(getattr(settings, "CHAT_DEDUPE_THRESHOLD", 0.8))
+
+
+def minhash_signatures(texts):
+    """
+    Return an (n, MINHASH_PERMUTATIONS) uint32 matrix of MinHash signatures over the
+    SHINGLE_BYTES-byte shingles of each text's normalized words, so case, spacing and
+    punctuation differences do not count. Row i estimates Jaccard similarity with row j
+    as the fraction of equal columns.
+    """
+    encoded = [
+        " ".join(re.findall(r"\w+", normalize_bullet_content(text))).ljust(SHINGLE_BYTES).encode("utf-8")
+        for text in texts
+    ]
+    signatures = np.empty((len(encoded), MINHASH_PERMUTATIONS), dtype=np.uint32)
+    if not encoded:
+        return signatures
+
+    lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    window_counts = lengths - SHINGLE_BYTES + 1
+    window_offsets = np.concatenate(([0], np.cumsum(window_counts)))
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = (
+        np.arange(window_offsets[-1])
+        - np.repeat(window_offsets[:-1], window_counts)
+        + np.repeat(text_starts, window_counts)
+    )
+    # A shingle's bytes packed into one integer are its identity; no hashing needed
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(SHINGLE_BYTES):
+        shingles |= data[positions + offset] << np.uint64(8 * offset)
+
+    buffer = np.empty((SIGNATURE_CHUNK, MINHASH_PERMUTATIONS), dtype=np.uint64)
+    row = 0
+    while row < len(encoded):
+        end = int(np.searchsorted(window_offsets, window_offsets[row] + SIGNATURE_CHUNK, side="right")) - 1
+        end = min(max(end, row + 1), len(encoded))
+        low, high = window_offsets[row], window_offsets[end]
+        if high - low > len(buffer):
+            buffer = np.empty((high - low, MINHASH_PERMUTATIONS), dtype=np.uint64)
+        # Multiply-shift hashing, one universal hash per permutation, computed in place
+        hashed = buffer[:high - low]
+        np.multiply(shingles[low:high, None], _MULTIPLIERS, out=hashed)
+        hashed += _OFFSETS
+        hashed >>= np.uint64(32)
+        signatures[row:end] = np.minimum.reduceat(hashed, window_offsets[row:end] - low, axis=0)
+        row = end
+    return signatures
+
+
+def _candidate_pairs(signatures, groups):
+    # Within each band, bullets with the same group and band values share a bucket; each is
+    # paired with the bucket's first (oldest) member only, so a large bucket costs linear time
+    pairs = []
+    positions = np.arange(len(signatures))
+    for band in range(0, MINHASH_PERMUTATIONS, LSH_BAND_ROWS):
+        keys = groups.astype(np.uint64) * _BAND_MIX
+        for column in range(band, band + LSH_BAND_ROWS):
+            keys = (keys ^ signatures[:, column].astype(np.uint64)) * _BAND_MIX
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        leaders = order[np.maximum.accumulate(np.where(starts, positions, 0))]
+        pairs.append(np.stack([leaders[~starts], order[~starts]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def find_near_duplicate_clusters(rows, threshold=None, new_ids=None):
+    """
+    Group (id, topic, content) rows, sorted by id, into clusters of near-duplicates:
+    bullets with the same normalized topic and numbers whose estimated Jaccard similarity
+    is at least threshold (default CHAT_DEDUPE_THRESHOLD). Candidates come from MinHash/LSH
+    buckets, so the cost grows with the rows rather than the pairs. With new_ids, only clusters
+    holding one of those bullets are returned. Returns (clusters of ids, oldest first,
+    number of candidate pairs checked).
+    """
+    threshold = get_dedupe_threshold() if threshold is None else threshold
+    if len(rows) < 2:
+        return [], 0
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    # Bullets are only compared within a topic, and only when they state the same numbers:
+    # "Has 2 kids" and "Has 3 kids" are close in shingles but are different facts
+    group_codes = {}
+    groups = np.fromiter(
+        (
+            group_codes.setdefault(
+                (normalize_bullet_topic(row[1]), tuple(re.findall(r"\d+", normalize_bullet_content(row[2])))),
+                len(group_codes),
+            )
+            for row in rows
+        ),
+        dtype=np.int64,
+        count=len(rows),
+    )
+    signatures = minhash_signatures([row[2] for row in rows])
+
+    pairs = _candidate_pairs(signatures, groups)
+    if new_ids is not None:
+        is_new = np.isin(ids, np.fromiter(new_ids, dtype=np.int64))
+        pairs = pairs[is_new[pairs[:, 0]] | is_new[pairs[:, 1]]]
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    matches = pairs[(similarity >= threshold) & (groups[pairs[:, 0]] == groups[pairs[:, 1]])]
+
+    parents = {}
+
+    def find(position):
+        root = position
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while position != root:
+            parents[position], position = root, parents.get(position, position)
+        return root
+
+    for first, second in matches.tolist():
+        first, second = find(first), find(second)
+        if first != second:
+            # The older bullet stays the root, so it is the one the cluster merges into
+            parents[max(first, second)] = min(first, second)
+
+    clusters = defaultdict(list)
+    for position in np.unique(matches).tolist():
+        clusters[find(position)].append(position)
+    return [[int(ids[position]) for position in sorted(members)] for members in clusters.values()], len(pairs)
+
+
+def _merge_into(survivor, duplicates):
+    # Returns the MERGE_FIELDS whose value changed
+    bullets = [survivor] + duplicates
+    ttls = [bullet.ttl_days for bullet in bullets]
+    merged = {
+        "helpful_count": sum(bullet.helpful_count for bullet in bullets),
+        "harmful_count": sum(bullet.harmful_count for bullet in bullets),
+        "strength": max(bullet.strength for bullet in bullets),
+        "tags": list(dict.fromkeys(tag for bullet in bullets for tag in bullet.tags or [])),
+        # A ttl of 0 never expires, so it outranks any finite one
+        "ttl_days": 0 if 0 in ttls else max(ttls),
+        "last_accessed": max(bullet.last_accessed for bullet in bullets),
+        "concept": survivor.concept or next((bullet.concept for bullet in duplicates if bullet.concept), None),
+    }
+    changed = {name for name in MERGE_FIELDS if getattr(survivor, name) != merged[name]}
+    for name in changed:
+        setattr(survivor, name, merged[name])
+    return changed
+
+
+def _merge_clusters(clusters):
+    """
+    Fold each cluster into its oldest bullet in one transaction and return
+    ({duplicate id: survivor id}, {(profile id, rollup day)} touched).
+    """
+    merged, touched = {}, set()
+    with transaction.atomic():
+        bullets = (
+            MemoryBullet.objects
+            .select_for_update()
+            .select_related("memory")
+            .in_bulk([bullet_id for cluster in clusters for bullet_id in cluster])
+        )
+        survivors, updated_fields, to_embed = [], set(), []
+        for cluster in clusters:
+            # Bullets deleted since the scan drop out; what is left may no longer be a cluster
+            present = [bullets[bullet_id] for bullet_id in cluster if bullet_id in bullets]
+            if len(present) < 2:
+                continue
+            survivor, duplicates = present[0], present[1:]
+            changed = _merge_into(survivor, duplicates)
+            if changed:
+                survivors.append(survivor)
+                updated_fields |= changed
+            if "concept" in changed:
+                to_embed.append(survivor)
+            merged.update({duplicate.pk: survivor.pk for duplicate in duplicates})
+            touched.update((bullet.memory.user_id, rollup_day(bullet.created_at)) for bullet in present)
+
+        if survivors:
+            # bulk_update keeps the merged last_accessed, where save() would stamp it with now;
+            # limiting it to the changed fields keeps its CASE expressions small
+            MemoryBullet.objects.bulk_update(survivors, sorted(updated_fields))
+        if merged:
+            with batched_bullet_deletes():
+                MemoryBullet.objects.filter(id__in=list(merged)).only("id", "memory_id", "created_at").delete()
+            removed = defaultdict(list)
+            for duplicate_id in merged:
+                removed[bullets[duplicate_id].memory.user_id].append(duplicate_id)
+            for profile_id, bullet_ids in removed.items():
+                record_vector_changes(profile_id, bullet_ids)
+        embed_memory_bullets(to_embed)
+    return merged, touched
+
+
+def _schedule_refreshes(touched):
+    for profile_id, day in sorted(touched):
+        schedule_rollup_refresh(REFRESH_BULLETS, profile_id, day)
+    for profile_id in {profile_id for profile_id, _ in touched}:
+        schedule_chart_prerender(profile_id)
+
+
+def _merge_in_batches(clusters, batch_size):
+    merged, touched, batch, batch_bullets, max_write = {}, set(), [], 0, 0.0
+    for index, cluster in enumerate(clusters):
+        batch.append(cluster)
+        batch_bullets += len(cluster)
+        if batch_bullets < batch_size and index < len(clusters) - 1:
+            continue
+        write_started = time.perf_counter()
+        batch_merged, batch_touched = _merge_clusters(batch)
+        max_write = max(max_write, time.perf_counter() - write_started)
+        merged.update(batch_merged)
+        touched |= batch_touched
+        batch, batch_bullets = [], 0
+    _schedule_refreshes(touched)
+    return merged, max_write
+
+
+def merge_near_duplicate_bullets(profile_id, bullet_ids, threshold=None):
+    """
+    Merge the given (newly written) bullets into older near-duplicates the user already
+    has under the same topic, or the reverse when they are older. Only bullets with one
+    of their topics are read, so the cost follows the topics touched rather than the
+    user's whole memory. Returns {duplicate id: surviving bullet id}.
+    """
+    bullet_ids = set(bullet_ids)
+    if not bullet_ids:
+        return {}
+    user_bullets = MemoryBullet.objects.filter(memory__user_id=profile_id)
+    topics = {topic.strip() for topic in user_bullets.filter(id__in=bullet_ids).values_list("topic", flat=True)}
+    # SQLite lower() only folds ASCII, so the raw topics are matched too; Python does the exact grouping
+    rows = list(
+        user_bullets
+        .annotate(topic_key=Lower(Trim("topic")))
+        .filter(topic_key__in=topics | {topic.lower() for topic in topics})
+        .order_by("id")
+        .values_list("id", "topic", "content")
+    )
+    clusters, _ = find_near_duplicate_clusters(rows, threshold=threshold, new_ids=bullet_ids)
+    if not clusters:
+        return {}
+    merged, _ = _merge_in_batches(clusters, getattr(settings, "CHAT_DEDUPE_BATCH_SIZE", 500))
+    return merged
+
+
+def dedupe_memory_bullets(profile_ids=None, threshold=None, batch_size=None, dry_run=False):
+    """
+    Find and merge near-duplicate bullets for every user (or the given profile ids), one
+    user at a time. Each cluster folds into its oldest bullet: helpful and harmful counts
+    are summed, the highest strength and latest access are kept, and tags are combined.
+    Merges are written in transactions of about batch_size bullets (default
+    CHAT_DEDUPE_BATCH_SIZE). Returns throughput metrics.
+    """
+    batch_size = batch_size or getattr(settings, "CHAT_DEDUPE_BATCH_SIZE", 500)
+    metrics = {"users": 0, "scanned": 0, "candidates": 0, "clusters": 0, "merged": 0, "max_write_seconds": 0.0}
+    started = time.perf_counter()
+    if profile_ids is None:
+        profile_ids = Memory.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+
+    for profile_id in list(profile_ids):
+        rows = list(
+            MemoryBullet.objects
+            .filter(memory__user_id=profile_id)
+            .order_by("id")
+            .values_list("id", "topic", "content")
+        )
+        clusters, candidates = find_near_duplicate_clusters(rows, threshold=threshold)
+        metrics["users"] += 1
+        metrics["scanned"] += len(rows)
+        metrics["candidates"] += candidates
+        metrics["clusters"] += len(clusters)
+        if dry_run:
+            metrics["merged"] += sum(len(cluster) - 1 for cluster in clusters)
+            continue
+        if clusters:
+            merged, max_write = _merge_in_batches(clusters, batch_size)
+            metrics["merged"] += len(merged)
+            metrics["max_write_seconds"] = max(metrics["max_write_seconds"], max_write)
+
+    metrics["seconds"] = time.perf_counter() - started
+    metrics["rows_per_second"] = metrics["scanned"] / metrics["seconds"] if metrics["seconds"] else 0.0
+    return metrics
@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+import re
+import tempfile
+import textwrap
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from .models import ExportJob
+from .models.export_job import ExportStatus
+from .service import (
+    get_memory_bullet_report_export_rows,
+    get_or_create_profile_for_user,
+    get_session_report_export_rows,
+)
+
+EXPORT_FLUSH_BYTES = 64 * 1024
+EXPORT_FORMATS = {"csv": "text/csv", "json": "application/json"}
+# Report name -> (row source, CSV column order); the name doubles as the JSON key and filename prefix
+EXPORT_REPORTS = {
+    "sessions": (get_session_report_export_rows, ["title", "message_count", "created_at"]),
+    "memory_bullets": (get_memory_bullet_report_export_rows, ["content", "memory_type", "created_at"]),
+}
+
+_accepts_gzip_re = re.compile(r"\bgzip\b")
+
+
+class _EchoBuffer:
+    # csv.writer only needs write(); returning the line lets rows stream without an in-memory file
+    def write(self, value):
+        return value
+
+
+def _batched_bytes(pieces):
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_FLUSH_BYTES:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def iter_csv_export(rows, headers, field_order):
+    writer = csv.writer(_EchoBuffer())
+
+    def _lines():
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([row[field] for field in field_order])
+
+    return _batched_bytes(_lines())
+
+
+def iter_json_export(rows, json_key, generated_at):
+    # Same fields as the old indent=2 JsonResponse; record_count moves last because it is only known after the final row
+    def _pieces():
+        yield f'{{\n  "generated_at": {json.dumps(generated_at)},\n  {json.dumps(json_key)}: ['
+        record_count = 0
+        for row in rows:
+            separator = ",\n" if record_count else "\n"
+            yield separator + textwrap.indent(json.dumps(row, indent=2, cls=DjangoJSONEncoder), "    ")
+            record_count += 1
+        closing = "\n  ]" if record_count else "]"
+        yield f'{closing},\n  "record_count": {record_count}\n}}\n'
+
+    return _batched_bytes(_pieces())
+
+
+def build_streaming_export_response(request, chunks, content_type, filename):
+    use_gzip = getattr(settings, "CHAT_EXPORT_GZIP", True) and _accepts_gzip_re.search(
+        request.headers.get("Accept-Encoding", "")
+    )
+    if use_gzip:
+        chunks = compress_sequence(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if use_gzip:
+        response["Content-Encoding"] = "gzip"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def build_export_filename(prefix, extension):
+    timestamp = timezone.localtime().strftime("%Y-%m-%d_%H-%M")
+    return f'{prefix}_{timestamp}.{extension}'
+
+
+def get_report_export_rows(user, report, q=""):
+    return EXPORT_REPORTS[report][0](user, q=q)
+
+
+def iter_report_export(rows, report, export_format):
+    if export_format == "csv":
+        field_order = EXPORT_REPORTS[report][1]
+        return iter_csv_export(rows, field_order, field_order)
+    return iter_json_export(rows, report, timezone.now().isoformat())
+
+
+def enqueue_export_job(user, report, export_format, q=""):
+    profile = get_or_create_profile_for_user(user)
+    normalized_q = (q or "").strip()
+    # Re-requesting an export that is still queued or running returns the existing job
+    job = (
+        ExportJob.objects
+        .filter(
+            user=profile,
+            report=report,
+            export_format=export_format,
+            query=normalized_q,
+            status__in=[ExportStatus.PENDING, ExportStatus.RUNNING],
+        )
+        .first()
+    )
+    if job is not None:
+        return job, False
+    job = ExportJob.objects.create(user=profile, report=report, export_format=export_format, query=normalized_q)
+    return job, True
+
+
+def get_export_job_for_user(user, job_uuid):
+    profile = get_or_create_profile_for_user(user)
+    job = ExportJob.objects.filter(user=profile, uuid=job_uuid).first()
+    if job is None:
+        raise Http404("Export job not found")
+    return job
+
+
+def get_export_job_download_name(job):
+    return os.path.basename(job.artifact.name).split("_", 1)[-1]
+
+
+def get_export_job_payload(job):
+    payload = {
+        "id": str(job.uuid),
+        "report": job.report,
+        "format": job.export_format,
+        "q": job.query,
+        "status": job.get_status_display().lower(),
+        "record_count": job.record_count,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": reverse("chat:export_job_status", args=[job.uuid]),
+        "download_url": None,
+    }
+    if job.status == ExportStatus.SUCCEEDED:
+        payload["download_url"] = reverse("chat:export_job_download", args=[job.uuid])
+    return payload
+
+
+def _claimable_jobs_filter(now):
+    # Running jobs past the timeout belong to a worker that died; they are handed out again
+    stale_before = now - timedelta(seconds=getattr(settings, "CHAT_EXPORT_JOB_TIMEOUT", 60 * 30))
+    return Q(status=ExportStatus.PENDING) | Q(status=ExportStatus.RUNNING, started_at__lt=stale_before)
+
+
+def claim_next_export_job():
+    now = timezone.now()
+    claimable = _claimable_jobs_filter(now)
+    candidate_ids = list(
+        ExportJob.objects.filter(claimable).order_by("created_at").values_list("pk", flat=True)[:10]
+    )
+    for job_id in candidate_ids:
+        # The conditional UPDATE is the lock: only one worker process sees a row count of 1
+        claimed = (
+            ExportJob.objects
+            .filter(claimable, pk=job_id)
+            .update(status=ExportStatus.RUNNING, started_at=now, error="")
+        )
+        if claimed:
+            return ExportJob.objects.select_related("user__user").get(pk=job_id)
+    return None
+
+
+def run_export_job(job):
+    written = {"rows": 0}
+
+    def _counted(rows):
+        for row in rows:
+            written["rows"] += 1
+            yield row
+
+    try:
+        rows = _counted(get_report_export_rows(job.user.user, job.report, q=job.query))
+        with tempfile.TemporaryFile() as handle:
+            for chunk in iter_report_export(rows, job.report, job.export_format):
+                handle.write(chunk)
+            handle.seek(0)
+            if job.artifact:
+                job.artifact.delete(save=False)
+            job.artifact.save(build_export_filename(job.report, job.export_format), File(handle), save=False)
+        job.status = ExportStatus.SUCCEEDED
+        job.record_count = written["rows"]
+    except Exception as exc:
+        job.status = ExportStatus.FAILED
+        job.error = str(exc)[:500] or exc.__class__.__name__
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "artifact", "record_count", "error", "finished_at"])
+    return job
+
+
+def delete_expired_export_jobs():
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "CHAT_EXPORT_JOB_RETENTION_DAYS", 7))
+    expired = ExportJob.objects.filter(
+        status__in=[ExportStatus.SUCCEEDED, ExportStatus.FAILED],
+        finished_at__lt=cutoff,
+    )
+    deleted = 0
+    # Deleted one by one so the post_delete handler removes each artifact from storage
+    for job in expired.iterator():
+        job.delete()
+        deleted += 1
+    return deleted
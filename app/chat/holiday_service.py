@@ -1,8 +1,26 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from functools import partial
+
 import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
+from .models import HolidayCacheEntry
 from .service import get_api_daily_active_users_payload
 
 HOLIDAY_API_BASE = "https://date.nager.at/api/v3"
+REGIONS_CACHE_KEY = "regions"
+
+_revalidating_keys = set()
+_revalidating_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
 
 
 class InvalidHolidayCountryCodeError(Exception):
@@ -16,15 +34,50 @@ class HolidayAPIUnavailableError(Exception):
     pass
 
 
-def _fetch_json(url, params=None):
-    response = requests.get(url, params=params or {}, timeout=5)
+def _get_api_base():
+    return getattr(settings, "HOLIDAY_API_BASE", HOLIDAY_API_BASE).rstrip("/")
+
+
+def _get_ttl_seconds(name, default):
+    return getattr(settings, name, default)
+
+
+def _get_max_workers():
+    return max(1, getattr(settings, "HOLIDAY_MAX_WORKERS", 4))
+
+
+def _get_session():
+    # One keep-alive session per process; the adapter pool is sized so every worker can hold a connection
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=_get_max_workers())
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def _get_call_timeout(deadline=None):
+    timeout = getattr(settings, "HOLIDAY_REQUEST_TIMEOUT", 5)
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.Timeout("Holiday API request budget exhausted.")
+    return min(timeout, remaining)
+
+
+def _fetch_json(url, params=None, deadline=None):
+    response = _get_session().get(url, params=params or {}, timeout=_get_call_timeout(deadline))
     response.raise_for_status()
     return response.json()
 
 
-def _get_available_regions():
+def _fetch_available_regions(deadline=None):
     try:
-        payload = _fetch_json(f"{HOLIDAY_API_BASE}/AvailableCountries", params={})
+        payload = _fetch_json(f"{_get_api_base()}/AvailableCountries", params={}, deadline=deadline)
     except requests.RequestException as exc:
         raise HolidayAPIUnavailableError("Failed to fetch available regions.") from exc
 
@@ -40,11 +93,12 @@ def _get_available_regions():
     return regions
 
 
-def _get_public_holidays(country_code, year):
+def _fetch_public_holidays(country_code, year, deadline=None):
     try:
         payload = _fetch_json(
-            f"{HOLIDAY_API_BASE}/PublicHolidays/{year}/{country_code}",
+            f"{_get_api_base()}/PublicHolidays/{year}/{country_code}",
             params={},
+            deadline=deadline,
         )
     except requests.RequestException as exc:
         raise HolidayAPIUnavailableError("Failed to fetch public holiday data.") from exc
@@ -54,25 +108,196 @@ def _get_public_holidays(country_code, year):
     return payload
 
 
+def _fetch_concurrently(fetches):
+    """
+    Run the given {key: fetch} callables in parallel under one overall deadline.
+    Returns ({key: payload}, {key: HolidayAPIUnavailableError}).
+    """
+    deadline = time.monotonic() + getattr(settings, "HOLIDAY_REQUEST_BUDGET", 10)
+    payloads = {}
+    errors = {}
+    if len(fetches) == 1:
+        key, fetch = next(iter(fetches.items()))
+        try:
+            payloads[key] = fetch(deadline=deadline)
+        except HolidayAPIUnavailableError as exc:
+            errors[key] = exc
+        return payloads, errors
+
+    # Workers only do HTTP; cache reads and writes stay on the calling thread's DB connection
+    executor = ThreadPoolExecutor(
+        max_workers=min(_get_max_workers(), len(fetches)),
+        thread_name_prefix="holiday-fetch",
+    )
+    try:
+        futures = {executor.submit(fetch, deadline=deadline): key for key, fetch in fetches.items()}
+        done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+        for future in done:
+            try:
+                payloads[futures[future]] = future.result()
+            except HolidayAPIUnavailableError as exc:
+                errors[futures[future]] = exc
+        for future in not_done:
+            errors[futures[future]] = HolidayAPIUnavailableError("Holiday API request budget exceeded.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return payloads, errors
+
+
+def _store_cache_entry(key, payload, ttl_seconds, is_negative=False):
+    now = timezone.now()
+    HolidayCacheEntry.objects.update_or_create(
+        key=key,
+        defaults={
+            "payload": payload,
+            "is_negative": is_negative,
+            "fetched_at": now,
+            "expires_at": None if ttl_seconds is None else now + timedelta(seconds=ttl_seconds),
+        },
+    )
+
+
+def _revalidate_in_background(key, fetch, ttl_seconds):
+    with _revalidating_lock:
+        if key in _revalidating_keys:
+            return None
+        _revalidating_keys.add(key)
+
+    def _refresh():
+        try:
+            _store_cache_entry(key, fetch(), ttl_seconds)
+        except HolidayAPIUnavailableError:
+            pass
+        finally:
+            with _revalidating_lock:
+                _revalidating_keys.discard(key)
+            connection.close()
+
+    thread = threading.Thread(target=_refresh, name=f"holiday-revalidate-{key}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _get_cached_payloads(specs):
+    """
+    Resolve {key: (fetch, ttl_seconds)} from the cache, fetching every miss concurrently.
+    Returns ({key: payload}, {key: HolidayAPIUnavailableError}) for keys with no usable data.
+    """
+    entries = HolidayCacheEntry.objects.in_bulk(list(specs), field_name="key")
+    now = timezone.now()
+    stale_ttl = _get_ttl_seconds("HOLIDAY_STALE_TTL", 60 * 60 * 24 * 30)
+    payloads = {}
+    misses = {}
+    for key, (fetch, ttl_seconds) in specs.items():
+        entry = entries.get(key)
+        if entry is not None:
+            if entry.is_fresh(now):
+                payloads[key] = entry.payload
+                continue
+            if entry.expires_at + timedelta(seconds=stale_ttl) > now:
+                _revalidate_in_background(key, fetch, ttl_seconds)
+                payloads[key] = entry.payload
+                continue
+        misses[key] = fetch
+
+    if not misses:
+        return payloads, {}
+
+    fetched, errors = _fetch_concurrently(misses)
+    for key, payload in fetched.items():
+        _store_cache_entry(key, payload, specs[key][1])
+        payloads[key] = payload
+    for key in list(errors):
+        # An outdated answer beats a 503 while the upstream API is down
+        if key in entries:
+            payloads[key] = entries[key].payload
+            del errors[key]
+    return payloads, errors
+
+
+def _get_cached_payload(key, fetch, ttl_seconds):
+    payloads, errors = _get_cached_payloads({key: (fetch, ttl_seconds)})
+    if key in errors:
+        raise errors[key]
+    return payloads[key]
+
+
+def _regions_spec():
+    return _fetch_available_regions, _get_ttl_seconds("HOLIDAY_REGIONS_CACHE_TTL", 60 * 60 * 24 * 7)
+
+
+def _public_holidays_spec(country_code, year):
+    # Published holidays for past years never change, so they are cached without expiry
+    ttl_seconds = None
+    if year >= timezone.now().year:
+        ttl_seconds = _get_ttl_seconds("HOLIDAY_CACHE_TTL", 60 * 60 * 24)
+    return partial(_fetch_public_holidays, country_code, year), ttl_seconds
+
+
+def _get_available_regions():
+    return _get_cached_payload(REGIONS_CACHE_KEY, *_regions_spec())
+
+
+def _get_known_regions():
+    entry = HolidayCacheEntry.objects.filter(key=REGIONS_CACHE_KEY).first()
+    if entry is not None:
+        return entry.payload
+    return _get_available_regions()
+
+
+def _reject_known_invalid_country_code(country_code):
+    # Malformed or previously rejected codes are answered from cache without touching the upstream API
+    if not re.fullmatch(r"[A-Z]{2}", country_code):
+        raise InvalidHolidayCountryCodeError(country_code, _get_known_regions())
+    entries = HolidayCacheEntry.objects.in_bulk(
+        [f"invalid-country:{country_code}", REGIONS_CACHE_KEY],
+        field_name="key",
+    )
+    negative_entry = entries.get(f"invalid-country:{country_code}")
+    if negative_entry is not None and negative_entry.is_fresh(timezone.now()):
+        raise InvalidHolidayCountryCodeError(country_code, _get_known_regions())
+    regions_entry = entries.get(REGIONS_CACHE_KEY)
+    if regions_entry is not None:
+        _check_country_code(country_code, regions_entry.payload)
+
+
+def _check_country_code(country_code, available_regions):
+    if country_code not in {item["countryCode"] for item in available_regions}:
+        _store_cache_entry(
+            f"invalid-country:{country_code}",
+            [],
+            _get_ttl_seconds("HOLIDAY_NEGATIVE_CACHE_TTL", 60 * 60 * 24),
+            is_negative=True,
+        )
+        raise InvalidHolidayCountryCodeError(country_code, available_regions)
+
+
 def get_daily_activity_with_holidays_payload(country_code="US"):
     normalized_country = (country_code or "US").strip().upper() or "US"
-    available_regions = _get_available_regions()
-    available_codes = {item["countryCode"] for item in available_regions}
+    _reject_known_invalid_country_code(normalized_country)
+
+    daily_payload = get_api_daily_active_users_payload()
+    daily_results = list(daily_payload.get("results", []))
+    years_to_fetch = sorted({int(row["date"][:4]) for row in daily_results})
+
+    # The region list and every needed year are fetched together; a cold cache costs one round trip, not N+1
+    specs = {REGIONS_CACHE_KEY: _regions_spec()}
+    for target_year in years_to_fetch:
+        specs[f"holidays:{normalized_country}:{target_year}"] = _public_holidays_spec(normalized_country, target_year)
+    payloads, errors = _get_cached_payloads(specs)
+
+    if REGIONS_CACHE_KEY in errors:
+        raise errors[REGIONS_CACHE_KEY]
+    available_regions = payloads[REGIONS_CACHE_KEY]
+    _check_country_code(normalized_country, available_regions)
+    if errors:
+        raise next(iter(errors.values()))
+
     region_name_by_code = {
         item["countryCode"]: item["name"]
         for item in available_regions
     }
 
-    if normalized_country not in available_codes:
-        raise InvalidHolidayCountryCodeError(
-            normalized_country,
-            available_regions,
-        )
-
-    daily_payload = get_api_daily_active_users_payload()
-    daily_results = list(daily_payload.get("results", []))
-
-    years_to_fetch = sorted({int(row["date"][:4]) for row in daily_results})
     if not years_to_fetch:
         return {
             "country_code": normalized_country,
@@ -90,7 +315,7 @@ def get_daily_activity_with_holidays_payload(country_code="US"):
 
     holiday_by_date = {}
     for target_year in years_to_fetch:
-        holidays = _get_public_holidays(normalized_country, target_year)
+        holidays = payloads[f"holidays:{normalized_country}:{target_year}"]
         for holiday in holidays:
             holiday_date = holiday.get("date")
             if not holiday_date:
@@ -0,0 +1,90 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Sum
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import DailyActivity
+
+PUBLIC_API_CACHE_PREFIX = "chat:public-api"
+PUBLIC_API_GENERATION_KEY = f"{PUBLIC_API_CACHE_PREFIX}:generation"
+
+
+def _get_cache():
+    return caches[getattr(settings, "CHAT_API_CACHE_ALIAS", "default")]
+
+
+def _get_max_age():
+    return getattr(settings, "CHAT_PUBLIC_API_MAX_AGE", 60)
+
+
+def invalidate_public_api_cache():
+    cache = _get_cache()
+    try:
+        cache.incr(PUBLIC_API_GENERATION_KEY)
+    except ValueError:
+        cache.set(PUBLIC_API_GENERATION_KEY, 1, None)
+
+
+def _get_public_activity_version(request):
+    # condition() asks for the ETag and Last-Modified separately; compute both once per request
+    version = getattr(request, "_public_activity_version", None)
+    if version is not None:
+        return version
+
+    row = DailyActivity.objects.aggregate(
+        last_modified=Max("updated_at"),
+        day_count=Count("id"),
+        message_total=Sum("message_count"),
+    )
+    generation = _get_cache().get(PUBLIC_API_GENERATION_KEY, 0)
+    fingerprint = ":".join(
+        str(part)
+        for part in (
+            generation,
+            row["last_modified"].isoformat() if row["last_modified"] else "",
+            row["day_count"],
+            row["message_total"] or 0,
+            request.get_full_path(),
+        )
+    )
+    version = {
+        "etag": hashlib.sha256(fingerprint.encode()).hexdigest()[:32],
+        "last_modified": row["last_modified"],
+    }
+    request._public_activity_version = version
+    return version
+
+
+def _public_activity_etag(request, *args, **kwargs):
+    return _get_public_activity_version(request)["etag"]
+
+
+def _public_activity_last_modified(request, *args, **kwargs):
+    return _get_public_activity_version(request)["last_modified"]
+
+
+def cache_public_activity_json(view_func):
+    @wraps(view_func)
+    def _cached_view(request, *args, **kwargs):
+        cache = _get_cache()
+        cache_key = f"{PUBLIC_API_CACHE_PREFIX}:body:{_get_public_activity_version(request)['etag']}"
+        body = cache.get(cache_key)
+        if body is not None:
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(cache_key, response.content, _get_max_age() * 10)
+        if response.status_code == 200:
+            patch_cache_control(response, public=True, max_age=_get_max_age())
+        return response
+
+    return condition(
+        etag_func=_public_activity_etag,
+        last_modified_func=_public_activity_last_modified,
+    )(_cached_view)
@@ -0,0 +1,278 @@
+import hashlib
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .chart_service import schedule_chart_prerender
+from .dedupe_service import merge_near_duplicate_bullets, normalize_bullet_content
+from .models import Memory, MemoryBullet
+from .models.memory_bullet import MemoryType
+from .retrieval_service import embed_memory_bullets
+from .rollup_service import REFRESH_BULLETS, rollup_day, schedule_rollup_refresh
+from app.users.services import get_or_create_profile_for_user
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+TOPIC_MAX_LENGTH = MemoryBullet._meta.get_field("topic").max_length
+# Bullet fields behind the rollup counters and the embedding text
+ROLLUP_FIELDS = {"memory_type", "strength"}
+EMBEDDED_FIELDS = {"topic", "concept"}
+INGEST_STATUSES = ("created", "updated", "unchanged", "duplicate", "merged", "invalid", "failed")
+MEMORY_TYPE_ERROR = "Expected one of {} or {}".format(
+    ", ".join(str(value) for value in MemoryType.values),
+    ", ".join(name.lower() for name in MemoryType.names),
+)
+
+
+class BulkIngestError(ValueError):
+    def __init__(self, code, message, status=400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+class _UnparsableItem:
+    def __init__(self, message):
+        self.message = message
+
+
+def memory_bullet_content_key(content):
+    return hashlib.sha256(normalize_bullet_content(content).encode("utf-8")).hexdigest()
+
+
+def _get_max_items():
+    return getattr(settings, "CHAT_BULK_INGEST_MAX_ITEMS", 10000)
+
+
+def parse_bulk_ingest_payload(stream, content_type):
+    """
+    Read bullets from a JSON body (a list, or {"bullets": [...]}) or from NDJSON with one
+    bullet per line. NDJSON lines that are not valid JSON become invalid items rather than
+    failing the whole upload.
+    """
+    max_items = _get_max_items()
+    if content_type in NDJSON_CONTENT_TYPES:
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if len(items) >= max_items:
+                raise BulkIngestError("too_many_items", f"At most {max_items} bullets per request", status=413)
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(_UnparsableItem(f"Line {number} is not valid JSON"))
+        return items
+
+    try:
+        payload = json.load(stream)
+    except ValueError as exc:
+        raise BulkIngestError("invalid_json", "Request body is not valid JSON") from exc
+    items = payload.get("bullets") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        raise BulkIngestError("invalid_payload", 'Expected a list of bullets or {"bullets": [...]}')
+    if len(items) > max_items:
+        raise BulkIngestError("too_many_items", f"At most {max_items} bullets per request", status=413)
+    return items
+
+
+def _parse_memory_type(value):
+    if isinstance(value, str) and not value.strip().isdigit():
+        return MemoryType.__members__.get(value.strip().upper())
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number in MemoryType.values else None
+
+
+def _parse_whole_number(value):
+    # Accepts 30 and "30", but not true, 2.5 or -1
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number >= 0 else None
+
+
+def _clean_item(item, memories):
+    """
+    Return (memory id, content, fields, errors) for one raw item. fields holds only the
+    optional bullet fields the item provides, so an update never resets the others.
+    """
+    if isinstance(item, _UnparsableItem):
+        return None, "", {}, {"item": item.message}
+    if not isinstance(item, dict):
+        return None, "", {}, {"item": "Expected a JSON object"}
+
+    errors = {}
+    content = item.get("content")
+    if not isinstance(content, str) or not content.strip():
+        errors["content"] = "Required non-empty string"
+
+    memory_id = item.get("memory_id")
+    if memory_id is not None:
+        memory_id = _parse_whole_number(memory_id)
+        if memory_id not in memories:
+            errors["memory_id"] = "Not one of your memories"
+
+    fields = {}
+    if "memory_type" not in item:
+        errors["memory_type"] = "Required"
+    else:
+        memory_type = _parse_memory_type(item["memory_type"])
+        if memory_type is None:
+            errors["memory_type"] = MEMORY_TYPE_ERROR
+        fields["memory_type"] = memory_type
+    if "ttl_days" not in item:
+        errors["ttl_days"] = "Required"
+    else:
+        fields["ttl_days"] = _parse_whole_number(item["ttl_days"])
+        if fields["ttl_days"] is None:
+            errors["ttl_days"] = "Expected a whole number of days (0 never expires)"
+    if "strength" in item:
+        fields["strength"] = _parse_whole_number(item["strength"])
+        if fields["strength"] is None:
+            errors["strength"] = "Expected a whole number"
+    if "topic" in item:
+        fields["topic"] = item["topic"] if isinstance(item["topic"], str) else None
+        if fields["topic"] is None or len(fields["topic"]) > TOPIC_MAX_LENGTH:
+            errors["topic"] = f"Expected a string of at most {TOPIC_MAX_LENGTH} characters"
+    if "tags" in item:
+        fields["tags"] = item["tags"]
+        if not isinstance(item["tags"], list) or not all(isinstance(tag, str) for tag in item["tags"]):
+            errors["tags"] = "Expected a list of strings"
+    if "concept" in item:
+        fields["concept"] = item["concept"]
+        if item["concept"] is not None and not isinstance(item["concept"], str):
+            errors["concept"] = "Expected a string or null"
+    return memory_id, content.strip() if "content" not in errors else "", fields, errors
+
+
+def _write_batch(batch, memories, touched):
+    """
+    Create or update one batch of (index, memory id, content, key, fields) entries in a
+    single transaction and return {index: (status, bullet id)}.
+    """
+    outcomes = {}
+    with transaction.atomic():
+        existing = {}
+        for bullet in (
+            MemoryBullet.objects
+            .filter(
+                memory_id__in={memory_id for _, memory_id, _, _, _ in batch},
+                content_key__in={key for _, _, _, key, _ in batch},
+            )
+            # Older duplicates win, so the oldest copy of legacy duplicates is the one updated
+            .order_by("-id")
+        ):
+            existing[bullet.memory_id, bullet.content_key] = bullet
+
+        to_create, to_update, updated_fields, to_embed = [], [], set(), []
+        for index, memory_id, content, key, fields in batch:
+            bullet = existing.get((memory_id, key))
+            if bullet is None:
+                bullet = MemoryBullet(memory=memories[memory_id], content=content, content_key=key, **fields)
+                to_create.append((index, bullet))
+                continue
+            changed = {name for name, value in fields.items() if getattr(bullet, name) != value}
+            if not changed:
+                outcomes[index] = ("unchanged", bullet.pk)
+                continue
+            for name in changed:
+                setattr(bullet, name, fields[name])
+            bullet.memory = memories[memory_id]
+            to_update.append((index, bullet))
+            updated_fields |= changed
+            if changed & ROLLUP_FIELDS:
+                touched.add(rollup_day(bullet.created_at))
+            if changed & EMBEDDED_FIELDS:
+                to_embed.append(bullet)
+
+        # Bulk writes send no post_save, so rollups and embeddings are brought up to date here
+        created = MemoryBullet.objects.bulk_create([bullet for _, bullet in to_create])
+        if to_update:
+            MemoryBullet.objects.bulk_update([bullet for _, bullet in to_update], sorted(updated_fields))
+        if created:
+            touched.add(rollup_day(created[0].created_at))
+        embed_memory_bullets(created + to_embed)
+
+    outcomes.update({index: ("created", bullet.pk) for index, bullet in to_create})
+    outcomes.update({index: ("updated", bullet.pk) for index, bullet in to_update})
+    return outcomes
+
+
+def ingest_memory_bullets(user, items, memory_id=None, batch_size=None):
+    """
+    Validate, de-duplicate and store a list of raw bullet dicts for user's memories.
+    Bullets whose normalized content already exists in the same memory update it instead;
+    repeats within the upload are reported as duplicates. Valid bullets are written in
+    batches of CHAT_BULK_INGEST_BATCH_SIZE, one transaction each. With CHAT_DEDUPE_ON_INGEST,
+    new bullets that nearly match one under the same topic are then merged into the older
+    one. Returns a per-item result list with a summary.
+    """
+    profile = get_or_create_profile_for_user(user)
+    batch_size = batch_size or getattr(settings, "CHAT_BULK_INGEST_BATCH_SIZE", 500)
+    memories = {memory.pk: memory for memory in Memory.objects.filter(user=profile)}
+    memory_id = _parse_whole_number(memory_id) if memory_id not in (None, "") else None
+    if memory_id is not None and memory_id not in memories:
+        raise BulkIngestError("unknown_memory", "memory_id is not one of your memories", status=404)
+
+    results = [{"index": index} for index in range(len(items))]
+    pending = []
+    first_seen = {}
+    default_memory_id = memory_id
+    for index, item in enumerate(items):
+        item_memory_id, content, fields, errors = _clean_item(item, memories)
+        if errors:
+            results[index].update(status="invalid", errors=errors)
+            continue
+        if item_memory_id is None:
+            if default_memory_id is None:
+                # Uploads without a memory go to the user's most recently updated memory
+                latest = max(memories.values(), key=lambda memory: memory.updated_at, default=None)
+                latest = latest or Memory.objects.create(user=profile, access_clock=0)
+                memories[latest.pk] = latest
+                default_memory_id = latest.pk
+            item_memory_id = default_memory_id
+        key = memory_bullet_content_key(content)
+        if (item_memory_id, key) in first_seen:
+            results[index].update(status="duplicate", duplicate_of=first_seen[item_memory_id, key])
+            continue
+        first_seen[item_memory_id, key] = index
+        pending.append((index, item_memory_id, content, key, fields))
+
+    touched = set()
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            outcomes = _write_batch(batch, memories, touched)
+        except DatabaseError:
+            for index, *_ in batch:
+                results[index].update(status="failed", errors={"item": "Could not be stored; retry the upload"})
+            continue
+        for index, (status, bullet_id) in outcomes.items():
+            results[index].update(status=status, id=bullet_id)
+
+    for day in sorted(touched):
+        schedule_rollup_refresh(REFRESH_BULLETS, profile.id, day)
+    if touched:
+        schedule_chart_prerender(profile.id)
+
+    created_ids = [result["id"] for result in results if result.get("status") == "created"]
+    if created_ids and getattr(settings, "CHAT_DEDUPE_ON_INGEST", True):
+        merged = merge_near_duplicate_bullets(profile.id, created_ids)
+        for result in results:
+            if result.get("id") in merged:
+                result.update(status="merged", merged_into=merged[result["id"]])
+
+    summary = Counter(result["status"] for result in results)
+    return {
+        "count": len(results),
+        "summary": {status: summary.get(status, 0) for status in INGEST_STATUSES},
+        "results": results,
+    }
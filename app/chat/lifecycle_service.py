@@ -0,0 +1,119 @@
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .chart_service import schedule_chart_prerender
+from .models import MemoryBullet
+from .retrieval_service import record_vector_changes
+from .rollup_service import REFRESH_BULLETS, batched_bullet_deletes, rollup_day, schedule_rollup_refresh
+
+SWEEP_FIELDS = ("id", "memory__user_id", "strength", "ttl_days", "created_at", "last_accessed", "decayed_at")
+
+
+def _get_decay_half_life_days():
+    return float(getattr(settings, "CHAT_MEMORY_DECAY_HALF_LIFE_DAYS", 90))
+
+
+def _epoch_seconds(values):
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64, count=len(values))
+
+
+def plan_memory_bullet_sweep(rows, now, decay=True, expire=True):
+    """
+    Return (expired positions, decayed positions, new strengths) for a batch of
+    SWEEP_FIELDS rows. A bullet expires ttl_days after its last access (ttl_days <= 0
+    never expires). Strength halves every CHAT_MEMORY_DECAY_HALF_LIFE_DAYS, counted from
+    the later of its last access and the last decay, so time is never decayed twice.
+    """
+    columns = list(zip(*rows))
+    strength = np.asarray(columns[2], dtype=np.float64)
+    ttl_days = np.asarray(columns[3], dtype=np.float64)
+    last_accessed = _epoch_seconds(columns[5])
+    now_seconds = now.timestamp()
+
+    expired = np.zeros(len(rows), dtype=bool)
+    if expire:
+        expired = (ttl_days > 0) & (last_accessed + ttl_days * 86400.0 < now_seconds)
+
+    half_life = _get_decay_half_life_days()
+    if not decay or half_life <= 0:
+        return np.flatnonzero(expired), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+    decayed_at = _epoch_seconds([value or accessed for value, accessed in zip(columns[6], columns[5])])
+    age_days = np.clip(now_seconds - np.maximum(last_accessed, decayed_at), 0.0, None) / 86400.0
+    new_strength = np.rint(strength * np.exp(-math.log(2) * age_days / half_life)).astype(np.int64)
+    # Rows whose rounded strength is unchanged keep their decay anchor, so short gaps add up
+    decayed = (new_strength != strength) & ~expired
+    return np.flatnonzero(expired), np.flatnonzero(decayed), new_strength[decayed]
+
+
+def _apply_sweep_batch(rows, expired, decayed, new_strength, now):
+    with transaction.atomic():
+        if len(expired):
+            with batched_bullet_deletes():
+                MemoryBullet.objects.filter(id__in=[rows[position][0] for position in expired]).delete()
+            removed = {}
+            for position in expired:
+                removed.setdefault(rows[position][1], []).append(rows[position][0])
+            for profile_id, bullet_ids in removed.items():
+                record_vector_changes(profile_id, bullet_ids)
+        # One UPDATE per distinct new strength (at most a hundred or so) instead of one per row;
+        # plain updates also skip auto_now, so decay is not mistaken for an access
+        for strength in np.unique(new_strength):
+            ids = [rows[position][0] for position in decayed[new_strength == strength]]
+            MemoryBullet.objects.filter(id__in=ids).update(strength=int(strength), decayed_at=now)
+    return {(rows[position][1], rollup_day(rows[position][4])) for position in np.concatenate([expired, decayed])}
+
+
+def sweep_memory_bullets(now=None, batch_size=None, decay=True, expire=True, dry_run=False):
+    """
+    Decay strengths and delete expired bullets in id-ordered batches. Each batch is read
+    outside a transaction and written in its own short one, so on SQLite the write lock
+    is held for one batch at a time and chat writes interleave between batches.
+    Returns throughput metrics.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, "CHAT_MEMORY_SWEEP_BATCH_SIZE", 500)
+    pause = getattr(settings, "CHAT_MEMORY_SWEEP_PAUSE_SECONDS", 0.0)
+    metrics = {"scanned": 0, "decayed": 0, "expired": 0, "batches": 0, "max_write_seconds": 0.0}
+    started = time.perf_counter()
+    # Rollup slices are recomputed once after the sweep rather than after every batch touching them
+    touched = set()
+
+    last_id = 0
+    while True:
+        rows = list(
+            MemoryBullet.objects
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list(*SWEEP_FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        expired, decayed, new_strength = plan_memory_bullet_sweep(rows, now, decay=decay, expire=expire)
+        metrics["scanned"] += len(rows)
+        metrics["expired"] += len(expired)
+        metrics["decayed"] += len(decayed)
+        metrics["batches"] += 1
+        if dry_run or not (len(expired) or len(decayed)):
+            continue
+
+        write_started = time.perf_counter()
+        touched |= _apply_sweep_batch(rows, expired, decayed, new_strength, now)
+        metrics["max_write_seconds"] = max(metrics["max_write_seconds"], time.perf_counter() - write_started)
+        if pause:
+            time.sleep(pause)
+
+    for profile_id, day in sorted(touched):
+        schedule_rollup_refresh(REFRESH_BULLETS, profile_id, day)
+    for profile_id in {profile_id for profile_id, _ in touched}:
+        schedule_chart_prerender(profile_id)
+
+    metrics["seconds"] = time.perf_counter() - started
+    metrics["rows_per_second"] = metrics["scanned"] / metrics["seconds"] if metrics["seconds"] else 0.0
+    return metrics
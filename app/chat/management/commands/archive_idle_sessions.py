@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.chat.archive_service import archive_idle_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move sessions untouched for a number of days, with their messages, into compressed "
+        "archive rows. Archived conversations are restored when their owner opens them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--idle-days",
+            type=int,
+            default=None,
+            help="Archive sessions not updated for this many days (default: CHAT_ARCHIVE_IDLE_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Sessions archived per transaction (default: CHAT_ARCHIVE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many sessions and messages would be archived without moving anything.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, archiving every this many seconds (default: run once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            metrics = archive_idle_sessions(
+                idle_days=options["idle_days"],
+                batch_size=options["batch_size"] or None,
+                dry_run=options["dry_run"],
+            )
+            if options["dry_run"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Would archive {metrics['sessions']} session(s) with {metrics['messages']} message(s)."
+                ))
+            else:
+                ratio = metrics["raw_bytes"] / metrics["stored_bytes"] if metrics["stored_bytes"] else 0.0
+                self.stdout.write(self.style.SUCCESS(
+                    f"Archived {metrics['sessions']} session(s) with {metrics['messages']} message(s) in "
+                    f"{metrics['batches']} batch(es) and {metrics['seconds']:.2f}s; "
+                    f"{metrics['stored_bytes']} bytes stored ({ratio:.1f}x compression), "
+                    f"longest write {metrics['max_write_seconds'] * 1000:.1f} ms."
+                ))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from app.chat.http_cache import invalidate_public_api_cache
+from app.chat.rollup_service import backfill_daily_activity
+
+
+class Command(BaseCommand):
+    help = "Rebuild the platform-wide daily activity table from the raw Message table."
+
+    def handle(self, *args, **options):
+        row_count = backfill_daily_activity()
+        invalidate_public_api_cache()
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {row_count} daily activity rows."))
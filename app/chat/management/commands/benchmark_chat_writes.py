@@ -0,0 +1,193 @@
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User as AuthUser
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection, connections
+
+from app.chat.access_service import flush_memory_accesses
+from app.chat.models import Memory, MemoryBullet, Session
+from app.chat.models.memory_bullet import MemoryType
+from app.chat.service import create_user_message_with_agent_reply
+from app.users.services import get_or_create_profile_for_user
+
+BENCHMARK_USERNAME_PREFIX = "bench-chat-writes"
+BULLETS_PER_WORKER = 20
+
+
+def _sqlite_profiles(directory):
+    pragmas = ";".join(f"PRAGMA {pragma}={value}" for pragma, value in settings.SQLITE_PRAGMAS.items())
+    # Django's stock SQLite settings next to the tuned ones this project ships; each gets a fresh file
+    return {
+        "sqlite-default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory) / "default.sqlite3"),
+        },
+        "sqlite-tuned": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory) / "tuned.sqlite3"),
+            "CONN_MAX_AGE": settings.DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"init_command": pragmas, "transaction_mode": "IMMEDIATE"},
+        },
+    }
+
+
+def _drop_default_connection():
+    try:
+        del connections["default"]
+    except AttributeError:
+        # This thread never opened the default connection
+        pass
+
+
+@contextmanager
+def _default_database(database):
+    # Every thread opens its own connection from connections.settings, so swapping the
+    # default entry points the whole workload (and the service layer) at the new database
+    connections.close_all()
+    original = connections.settings["default"]
+    connections.settings["default"] = connections.configure_settings({"default": database})["default"]
+    _drop_default_connection()
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connections.settings["default"] = original
+        _drop_default_connection()
+
+
+def _create_sessions(workers):
+    run_id = uuid.uuid4().hex[:8]
+    sessions = []
+    for index in range(workers):
+        auth_user = AuthUser.objects.create_user(username=f"{BENCHMARK_USERNAME_PREFIX}-{run_id}-{index}")
+        profile = get_or_create_profile_for_user(auth_user)
+        memory = Memory.objects.create(user=profile, access_clock=0)
+        # Recall runs on every turn, so each writer has bullets to find and mark as accessed
+        for bullet_index in range(BULLETS_PER_WORKER):
+            MemoryBullet.objects.create(
+                memory=memory,
+                content=f"Benchmark fact {bullet_index} about topic {bullet_index % 5}",
+                memory_type=MemoryType.SEMANTIC,
+                topic=f"topic {bullet_index % 5}",
+                ttl_days=30,
+            )
+        sessions.append(Session.objects.create(user=profile, title="Benchmark"))
+    return sessions
+
+
+def _delete_sessions(sessions):
+    AuthUser.objects.filter(pk__in=[session.user.user_id for session in sessions]).delete()
+
+
+def run_chat_write_benchmark(workers, turns):
+    sessions = _create_sessions(workers)
+    latencies = []
+    errors = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def _worker(session):
+        try:
+            barrier.wait()
+            for turn in range(turns):
+                started = time.perf_counter()
+                try:
+                    create_user_message_with_agent_reply(session, f"Tell me about topic {turn % 5} again")
+                except DatabaseError as exc:
+                    with lock:
+                        errors[str(exc)] += 1
+                else:
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                # The end of each turn is a request boundary, where Django closes
+                # connections that are not allowed to persist
+                close_old_connections()
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=_worker, args=(session,)) for session in sessions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Buffered memory accesses are part of the workload and belong to this run's database
+    flush_memory_accesses()
+    elapsed = time.perf_counter() - started
+    _delete_sessions(sessions)
+
+    milliseconds = np.asarray(latencies) * 1000.0
+    return {
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(milliseconds, 50)) if len(milliseconds) else 0.0,
+        "p95_ms": float(np.percentile(milliseconds, 95)) if len(milliseconds) else 0.0,
+        "errors": errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the chat write path (user message, memory recall, agent reply) with concurrent "
+        "writers, like gunicorn workers, and report throughput, latency and database lock errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent writers, each with its own connection and session (default: 8).",
+        )
+        parser.add_argument(
+            "--turns",
+            type=int,
+            default=25,
+            help="Chat turns each writer sends (default: 25).",
+        )
+        parser.add_argument(
+            "--compare-sqlite",
+            action="store_true",
+            help=(
+                "Run against temporary SQLite databases with Django's default settings and with this "
+                "project's tuned settings instead of the configured database."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        turns = max(1, options["turns"])
+        if not options["compare_sqlite"]:
+            database = connections["default"].settings_dict
+            label = f"{connection.vendor} ({database['NAME']})"
+            self._report(label, run_chat_write_benchmark(workers, turns))
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            for label, database in _sqlite_profiles(directory).items():
+                with _default_database(database):
+                    call_command("migrate", verbosity=0, interactive=False)
+                    self._report(label, run_chat_write_benchmark(workers, turns))
+
+    def _report(self, label, result):
+        self.stdout.write(
+            f"{label}: {result['turns']} turn(s) in {result['seconds']:.2f}s "
+            f"({result['throughput']:.1f}/s), p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms"
+        )
+        failed = sum(result["errors"].values())
+        if failed:
+            details = ", ".join(f"{message} x{count}" for message, count in result["errors"].most_common())
+            self.stderr.write(f"  {failed} failed turn(s): {details}")
+        else:
+            self.stdout.write(self.style.SUCCESS("  no failed turns"))
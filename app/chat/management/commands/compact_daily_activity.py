@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from app.chat.http_cache import invalidate_public_api_cache
+from app.chat.rollup_service import compact_daily_activity
+
+
+class Command(BaseCommand):
+    help = "Reconcile stale daily activity rows from the per-user rollups and drop days with no activity left."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Reconcile every day instead of only the rows marked dirty by deletes.",
+        )
+
+    def handle(self, *args, **options):
+        result = compact_daily_activity(full=options["full"])
+        invalidate_public_api_cache()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled {result['reconciled']} day(s), removed {result['removed']} empty day(s)."
+            )
+        )
@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.chat.dedupe_service import (
+    dedupe_memory_bullets,
+    find_near_duplicate_clusters,
+    get_dedupe_threshold,
+    minhash_signatures,
+)
+
+BENCHMARK_VOCABULARY_SIZE = 5000
+BENCHMARK_BULLETS_PER_TOPIC = 50
+# Share of the synthetic bullets that are planted near-copies of an earlier one
+BENCHMARK_DUPLICATE_SHARE = 0.1
+
+
+def _benchmark_rows(size, rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocabulary = ["".join(rng.choice(letters, size=rng.integers(3, 10))) for _ in range(BENCHMARK_VOCABULARY_SIZE)]
+    rows, planted = [], {}
+    for index in range(size):
+        topic = f"Topic {index // BENCHMARK_BULLETS_PER_TOPIC}"
+        topic_start = index - index % BENCHMARK_BULLETS_PER_TOPIC
+        if index > topic_start and rng.random() < BENCHMARK_DUPLICATE_SHARE:
+            source = int(rng.integers(topic_start, index))
+            content = rows[source][2]
+            if rng.random() < 0.5:
+                # Same words, different case and punctuation
+                content = content.upper().replace(" ", ", ", 1) + "!"
+            else:
+                # One character dropped
+                position = int(rng.integers(0, len(content)))
+                content = content[:position] + content[position + 1:]
+            planted[index + 1] = source + 1
+        else:
+            words = rng.integers(0, len(vocabulary), size=rng.integers(8, 16))
+            content = " ".join(vocabulary[word] for word in words)
+        rows.append((index + 1, topic, content))
+    return rows, planted
+
+
+class Command(BaseCommand):
+    help = "Find near-duplicate memory bullets with MinHash/LSH and merge each group into its oldest bullet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", help="Only this profile id (repeatable).")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=None,
+            help="Estimated Jaccard similarity needed to merge (default: CHAT_DEDUPE_THRESHOLD).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Bullets merged per transaction (default: CHAT_DEDUPE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be merged without writing anything.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, de-duplicating every this many seconds (default: run once and exit).",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            nargs="+",
+            metavar="BULLETS",
+            help="Time duplicate detection on synthetic bullets of these sizes instead; nothing is read or written.",
+        )
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            for size in options["benchmark"]:
+                self._benchmark(size, options["threshold"])
+            return
+
+        while True:
+            close_old_connections()
+            metrics = dedupe_memory_bullets(
+                profile_ids=options["user"],
+                threshold=options["threshold"],
+                batch_size=options["batch_size"] or None,
+                dry_run=options["dry_run"],
+            )
+            prefix = "Would merge" if options["dry_run"] else "Merged"
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix} {metrics['merged']} bullet(s) in {metrics['clusters']} group(s) after scanning "
+                f"{metrics['scanned']} bullet(s) of {metrics['users']} user(s) with {metrics['candidates']} "
+                f"candidate pair(s); {metrics['rows_per_second']:.0f} rows/s, "
+                f"longest write {metrics['max_write_seconds'] * 1000:.1f} ms."
+            ))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def _benchmark(self, size, threshold):
+        threshold = get_dedupe_threshold() if threshold is None else threshold
+        rows, planted = _benchmark_rows(size, np.random.default_rng(size))
+        started = time.perf_counter()
+        clusters, candidates = find_near_duplicate_clusters(rows, threshold=threshold)
+        seconds = time.perf_counter() - started
+
+        # LSH recall: planted pairs whose signatures clear the threshold are the ones an
+        # all-pairs comparison would have merged; the rest are too far apart to count
+        copies, sources = list(planted), list(planted.values())
+        signatures = minhash_signatures([rows[bullet_id - 1][2] for bullet_id in copies + sources])
+        similarity = (signatures[:len(copies)] == signatures[len(copies):]).mean(axis=1)
+        eligible = int((similarity >= threshold).sum())
+        cluster_of = {bullet_id: cluster[0] for cluster in clusters for bullet_id in cluster}
+        found = sum(1 for copy, source in planted.items() if cluster_of.get(copy, copy) == cluster_of.get(source))
+        self.stdout.write(
+            f"{size} bullets: {seconds:.2f} s ({size / seconds:.0f} bullets/s), {candidates} candidate pairs "
+            f"of {size * (size - 1) // 2} possible; {found} of {eligible} planted duplicates above the "
+            f"threshold merged ({len(planted)} planted), {sum(len(c) - 1 for c in clusters)} bullets merged in all."
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.chat.rollup_service import rebuild_analytics_rollups, verify_analytics_rollups
+from app.users.models import UserProfile as Profile
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user daily analytics rollups from raw sessions, messages and memory bullets, then verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            default=[],
+            help="Limit to this username (repeatable). Defaults to every user.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the stored rollups; exit with an error if any row differs.",
+        )
+
+    def handle(self, *args, **options):
+        profile_ids = None
+        if options["usernames"]:
+            profile_ids = list(
+                Profile.objects
+                .filter(user__username__in=options["usernames"])
+                .values_list("pk", flat=True)
+            )
+            if not profile_ids:
+                raise CommandError("No matching users found.")
+
+        if not options["check"]:
+            row_count = rebuild_analytics_rollups(profile_ids)
+            self.stdout.write(f"Rebuilt {row_count} rollup rows.")
+
+        mismatches = verify_analytics_rollups(profile_ids)
+        for mismatch in mismatches[:20]:
+            self.stdout.write(
+                f"  user={mismatch['user_id']} day={mismatch['day']} memory_type={mismatch['memory_type']}: "
+                f"expected {mismatch['expected']}, stored {mismatch['stored']}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup row(s) do not match the raw data.")
+        self.stdout.write(self.style.SUCCESS("Analytics rollups verified."))
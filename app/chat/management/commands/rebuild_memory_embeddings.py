@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.chat.retrieval_service import get_embedder, rebuild_memory_bullet_embeddings
+
+
+class Command(BaseCommand):
+    help = "Recompute memory bullet embeddings with the configured model and drop vectors from other models."
+
+    def handle(self, *args, **options):
+        embedded = rebuild_memory_bullet_embeddings()
+        self.stdout.write(self.style.SUCCESS(f"Embedded {embedded} memory bullets with {get_embedder().name}."))
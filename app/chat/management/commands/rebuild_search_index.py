@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from app.chat.search_service import rebuild_memory_bullet_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 index for memory bullet search from the chat_memorybullet table."
+
+    def handle(self, *args, **options):
+        if rebuild_memory_bullet_search_index():
+            self.stdout.write(self.style.SUCCESS("Memory bullet search index rebuilt."))
+        else:
+            self.stdout.write("Nothing to rebuild: this database maintains its search index itself or has none.")
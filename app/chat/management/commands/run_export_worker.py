@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.chat.export_service import claim_next_export_job, delete_expired_export_jobs, run_export_job
+from app.chat.models.export_job import ExportStatus
+
+
+class Command(BaseCommand):
+    help = "Process queued analytics export jobs from the database and write their files to media storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the queue is empty (default: 2).",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Exit after processing this many jobs (default: no limit).",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        delete_expired_export_jobs()
+        while not options["max_jobs"] or processed < options["max_jobs"]:
+            close_old_connections()
+            job = claim_next_export_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            job = run_export_job(job)
+            processed += 1
+            if job.status == ExportStatus.SUCCEEDED:
+                self.stdout.write(f"Export {job.uuid} ({job.report}.{job.export_format}): {job.record_count} row(s).")
+            else:
+                self.stderr.write(f"Export {job.uuid} ({job.report}.{job.export_format}) failed: {job.error}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} export job(s)."))
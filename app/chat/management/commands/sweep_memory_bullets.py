@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.chat.lifecycle_service import sweep_memory_bullets
+
+
+class Command(BaseCommand):
+    help = "Decay memory bullet strength and delete bullets past their TTL in short batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Bullets read and written per transaction (default: CHAT_MEMORY_SWEEP_BATCH_SIZE).",
+        )
+        parser.add_argument("--no-decay", action="store_true", help="Only delete expired bullets.")
+        parser.add_argument("--no-expire", action="store_true", help="Only decay strength.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what a sweep would change without writing anything.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, sweeping every this many seconds (default: sweep once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            metrics = sweep_memory_bullets(
+                batch_size=options["batch_size"] or None,
+                decay=not options["no_decay"],
+                expire=not options["no_expire"],
+                dry_run=options["dry_run"],
+            )
+            prefix = "Would sweep" if options["dry_run"] else "Swept"
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix} {metrics['scanned']} bullet(s) in {metrics['batches']} batch(es): "
+                f"{metrics['decayed']} decayed, {metrics['expired']} expired; "
+                f"{metrics['rows_per_second']:.0f} rows/s, longest write {metrics['max_write_seconds'] * 1000:.1f} ms."
+            ))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,112 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:38
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+
+# Frozen copies of analytics_rollup.ACTIVITY_ROLLUP_TYPE and STRENGTH_BUCKETS
+ACTIVITY_ROLLUP_TYPE = 0
+STRENGTH_BUCKETS = (
+    (20, "strength_0_20_count"),
+    (40, "strength_21_40_count"),
+    (60, "strength_41_60_count"),
+    (80, "strength_61_80_count"),
+    (None, "strength_81_100_count"),
+)
+
+
+def backfill_analytics_rollups(apps, schema_editor):
+    # Existing installs would otherwise chart zeros until rebuild_analytics_rollups is run
+    Session = apps.get_model("chat", "Session")
+    Message = apps.get_model("chat", "Message")
+    MemoryBullet = apps.get_model("chat", "MemoryBullet")
+    AnalyticsRollup = apps.get_model("chat", "AnalyticsRollup")
+    day = TruncDate("created_at", tzinfo=dt_timezone.utc)
+    rows = {}
+
+    def _row(profile_id, row_day, memory_type):
+        return rows.setdefault((profile_id, row_day, memory_type), {})
+
+    for row in Session.objects.annotate(day=day).values("user_id", "day").annotate(total=Count("id")).order_by():
+        _row(row["user_id"], row["day"], ACTIVITY_ROLLUP_TYPE)["session_count"] = row["total"]
+    for row in (
+        Message.objects.annotate(day=day).values("session__user_id", "day").annotate(total=Count("id")).order_by()
+    ):
+        _row(row["session__user_id"], row["day"], ACTIVITY_ROLLUP_TYPE)["message_count"] = row["total"]
+
+    aggregates = {
+        "bullet_count": Count("id"),
+        "strength_sum": Sum("strength"),
+        "strength_max": Max("strength"),
+        "strength_min": Min("strength"),
+        "helpful_sum": Sum("helpful_count"),
+        "harmful_sum": Sum("harmful_count"),
+    }
+    lower = None
+    for upper, field in STRENGTH_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(strength__gt=lower)
+        if upper is not None:
+            condition &= Q(strength__lte=upper)
+        aggregates[field] = Count("id", filter=condition)
+        lower = upper
+    for row in (
+        MemoryBullet.objects.annotate(day=day)
+        .values("memory__user_id", "day", "memory_type")
+        .annotate(**aggregates)
+        .order_by()
+    ):
+        _row(row["memory__user_id"], row["day"], row["memory_type"]).update(
+            {field: row[field] for field in aggregates}
+        )
+
+    AnalyticsRollup.objects.bulk_create(
+        [
+            AnalyticsRollup(user_id=profile_id, day=row_day, memory_type=memory_type, **counters)
+            for (profile_id, row_day, memory_type), counters in rows.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_remove_memory_summary'),
+        ('users', '0006_userprofile_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('memory_type', models.SmallIntegerField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('message_count', models.IntegerField(default=0)),
+                ('bullet_count', models.IntegerField(default=0)),
+                ('strength_sum', models.BigIntegerField(default=0)),
+                ('strength_max', models.IntegerField(null=True)),
+                ('strength_min', models.IntegerField(null=True)),
+                ('helpful_sum', models.BigIntegerField(default=0)),
+                ('harmful_sum', models.BigIntegerField(default=0)),
+                ('strength_0_20_count', models.IntegerField(default=0)),
+                ('strength_21_40_count', models.IntegerField(default=0)),
+                ('strength_41_60_count', models.IntegerField(default=0)),
+                ('strength_61_80_count', models.IntegerField(default=0)),
+                ('strength_81_100_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='users.userprofile')),
+            ],
+            options={
+                'ordering': ['user', 'day', 'memory_type'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'memory_type'), name='chat_rollup_user_day_type_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_analytics_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:10
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_daily_activity(apps, schema_editor):
+    # Totals come from the activity rollups 0004 filled in (memory_type 0 is the activity row)
+    AnalyticsRollup = apps.get_model("chat", "AnalyticsRollup")
+    DailyActivity = apps.get_model("chat", "DailyActivity")
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(day=row["day"], active_users=row["active_users"], message_count=row["message_count"])
+            for row in (
+                AnalyticsRollup.objects.filter(memory_type=0, message_count__gt=0)
+                .values("day")
+                .annotate(active_users=Count("user_id"), message_count=Sum("message_count"))
+                .order_by("day")
+            )
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_analytics_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('active_users', models.IntegerField(default=0)),
+                ('message_count', models.IntegerField(default=0)),
+                ('is_dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
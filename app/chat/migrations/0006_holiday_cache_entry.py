@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_daily_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidayCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=120, unique=True)),
+                ('payload', models.JSONField(default=list)),
+                ('is_negative', models.BooleanField(default=False)),
+                ('fetched_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['key'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+import app.chat.models.export_job
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_holiday_cache_entry'),
+        ('users', '0006_userprofile_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('report', models.CharField(max_length=32)),
+                ('export_format', models.CharField(max_length=8)),
+                ('query', models.CharField(blank=True, default='', max_length=200)),
+                ('status', models.SmallIntegerField(choices=[(1, 'Pending'), (2, 'Running'), (3, 'Succeeded'), (4, 'Failed')], default=1)),
+                ('artifact', models.FileField(blank=True, null=True, upload_to=app.chat.models.export_job.export_artifact_upload_to)),
+                ('record_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='users.userprofile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='chat_export_status_b40b72_idx')],
+            },
+        ),
+    ]
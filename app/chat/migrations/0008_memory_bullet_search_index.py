@@ -0,0 +1,96 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+from django.db import DatabaseError, migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_memorybullet_fts USING fts5(
+        content, topic, concept,
+        content='chat_memorybullet', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_memorybullet_fts_ai AFTER INSERT ON chat_memorybullet BEGIN
+        INSERT INTO chat_memorybullet_fts(rowid, content, topic, concept)
+        VALUES (new.id, new.content, new.topic, new.concept);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_memorybullet_fts_ad AFTER DELETE ON chat_memorybullet BEGIN
+        INSERT INTO chat_memorybullet_fts(chat_memorybullet_fts, rowid, content, topic, concept)
+        VALUES ('delete', old.id, old.content, old.topic, old.concept);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_memorybullet_fts_au AFTER UPDATE OF content, topic, concept ON chat_memorybullet BEGIN
+        INSERT INTO chat_memorybullet_fts(chat_memorybullet_fts, rowid, content, topic, concept)
+        VALUES ('delete', old.id, old.content, old.topic, old.concept);
+        INSERT INTO chat_memorybullet_fts(rowid, content, topic, concept)
+        VALUES (new.id, new.content, new.topic, new.concept);
+    END
+    """,
+    "INSERT INTO chat_memorybullet_fts(chat_memorybullet_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS chat_memorybullet_fts_au",
+    "DROP TRIGGER IF EXISTS chat_memorybullet_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_memorybullet_fts_ai",
+    "DROP TABLE IF EXISTS chat_memorybullet_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS chat_memorybullet_search_gin ON chat_memorybullet USING GIN (
+        to_tsvector('simple'::regconfig,
+            coalesce(content, '') || ' ' || coalesce(topic, '') || ' ' || coalesce(concept, ''))
+    )
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS chat_memorybullet_search_gin",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        if ("ENABLE_FTS5",) in cursor.fetchall():
+            return True
+        # FTS5 may also be loaded as an extension, which compile_options does not list
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.chat_fts5_probe USING fts5(probe)")
+        except DatabaseError:
+            return False
+        cursor.execute("DROP TABLE temp.chat_fts5_probe")
+        return True
+
+
+def _run_statements(schema_editor, statements_by_vendor):
+    # Other backends, and SQLite builds without FTS5, keep the icontains fallback in search_service
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite" and not _sqlite_has_fts5(connection):
+        return
+    for statement in statements_by_vendor.get(connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run_statements(schema_editor, {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD})
+
+
+def drop_search_index(apps, schema_editor):
+    _run_statements(schema_editor, {"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_export_job"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, reverse_code=drop_search_index),
+    ]
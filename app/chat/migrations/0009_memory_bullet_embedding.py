@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_memory_bullet_search_index'),
+        ('users', '0006_userprofile_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoryBulletEmbedding',
+            fields=[
+                ('bullet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='chat.memorybullet')),
+                ('model_name', models.CharField(max_length=100)),
+                ('dimensions', models.PositiveSmallIntegerField()),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'model_name'], name='chat_memory_user_id_27aacc_idx')],
+            },
+        ),
+    ]
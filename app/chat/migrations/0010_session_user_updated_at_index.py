@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0009_memory_bullet_embedding'),
+        ('users', '0006_userprofile_display_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['user', '-updated_at'], name='chat_sessio_user_id_6380f6_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0010_session_user_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memorybullet',
+            name='decayed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import hashlib
+import unicodedata
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module("app.chat.migrations.0008_memory_bullet_search_index")
+
+
+def _content_key(content):
+    # Frozen copy of ingest_service.memory_bullet_content_key
+    normalized = " ".join(unicodedata.normalize("NFKC", content or "").casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def backfill_content_keys(apps, schema_editor):
+    MemoryBullet = apps.get_model("chat", "MemoryBullet")
+    batch = []
+    for bullet in MemoryBullet.objects.only("id", "content").iterator(chunk_size=2000):
+        bullet.content_key = _content_key(bullet.content)
+        batch.append(bullet)
+        if len(batch) >= 2000:
+            MemoryBullet.objects.bulk_update(batch, ["content_key"])
+            batch = []
+    if batch:
+        MemoryBullet.objects.bulk_update(batch, ["content_key"])
+
+
+def restore_search_index(apps, schema_editor):
+    # SQLite adds a NOT NULL column by rebuilding the table, which drops the FTS triggers
+    search_index.create_search_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0012_archived_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='memorybullet',
+            name='content_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='memorybullet',
+            index=models.Index(fields=['memory', 'content_key'], name='chat_memory_memory__01bc05_idx'),
+        ),
+        migrations.RunPython(backfill_content_keys, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
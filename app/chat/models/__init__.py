@@ -1,4 +1,11 @@
 from .session import Session
 from .message import Message
 from .memory import Memory
-from .memory_bullet import MemoryBullet
\ No newline at end of file
+from .memory_bullet import MemoryBullet
+from .analytics_rollup import AnalyticsRollup
+from .daily_activity import DailyActivity
+from .holiday_cache_entry import HolidayCacheEntry
+
+from .export_job import ExportJob
+from .memory_bullet_embedding import MemoryBulletEmbedding
+from .archived_session import ArchivedSession
\ No newline at end of file
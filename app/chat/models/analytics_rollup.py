@@ -0,0 +1,57 @@
+from django.db import models
+
+# Rollup rows with this memory_type hold the day's session and message counts
+ACTIVITY_ROLLUP_TYPE = 0
+
+# (label, inclusive upper bound, counter field) for the strength histogram; None means unbounded
+STRENGTH_BUCKETS = (
+    ("0-20", 20, "strength_0_20_count"),
+    ("21-40", 40, "strength_21_40_count"),
+    ("41-60", 60, "strength_41_60_count"),
+    ("61-80", 80, "strength_61_80_count"),
+    ("81-100", None, "strength_81_100_count"),
+)
+
+
+class AnalyticsRollup(models.Model):
+    """
+    Real-world entity: Per-user daily analytics counters for one memory type
+    Why it exists: Serve analytics reads from O(days) rows instead of re-aggregating raw sessions, messages and bullets
+    """
+    # The user these counters belong to; cascade so rollups never outlive their user
+    user = models.ForeignKey("users.UserProfile", on_delete=models.CASCADE, related_name="analytics_rollups")
+    # UTC calendar day the counted rows were created on
+    day = models.DateField()
+    # Memory type of the counted bullets, or ACTIVITY_ROLLUP_TYPE for session/message counters
+    memory_type = models.SmallIntegerField(default=ACTIVITY_ROLLUP_TYPE)
+    # Sessions created on this day
+    session_count = models.IntegerField(default=0)
+    # Messages created on this day
+    message_count = models.IntegerField(default=0)
+    # Memory bullets created on this day
+    bullet_count = models.IntegerField(default=0)
+    # Sum of bullet strengths, used to derive averages
+    strength_sum = models.BigIntegerField(default=0)
+    # Highest and lowest bullet strength in this row
+    strength_max = models.IntegerField(null=True)
+    strength_min = models.IntegerField(null=True)
+    # Sum of helpful and harmful votes on the counted bullets
+    helpful_sum = models.BigIntegerField(default=0)
+    harmful_sum = models.BigIntegerField(default=0)
+    # Bullet counts per strength histogram bucket
+    strength_0_20_count = models.IntegerField(default=0)
+    strength_21_40_count = models.IntegerField(default=0)
+    strength_41_60_count = models.IntegerField(default=0)
+    strength_61_80_count = models.IntegerField(default=0)
+    strength_81_100_count = models.IntegerField(default=0)
+    # Timestamp when the counters were last written
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day", "memory_type"], name="chat_rollup_user_day_type_uniq"),
+        ]
+        ordering = ["user", "day", "memory_type"]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.day} - {self.memory_type}"
@@ -0,0 +1,39 @@
+from django.db import models
+from django.urls import reverse
+
+
+class ArchivedSession(models.Model):
+    """
+    Real-world entity: Chat session moved out of the hot tables after a long idle period
+    Why it exists: Keep old conversations restorable without their messages growing the live indexes
+    """
+    # Same id the session had in the hot table, so its URL keeps working and it is restored under it
+    id = models.BigIntegerField(primary_key=True)
+    # The user who owns the conversation; cascade to drop the archive with the user
+    user = models.ForeignKey("users.UserProfile", on_delete=models.CASCADE, related_name="archived_sessions")
+    # Session title displayed in search results
+    title = models.CharField(max_length=200, blank=True, default="")
+    # Timestamp when the session was originally created
+    created_at = models.DateTimeField()
+    # Timestamp when the session was last updated before it was archived
+    updated_at = models.DateTimeField()
+    # Number of messages held in the archive
+    message_count = models.IntegerField(default=0)
+    # Messages per UTC day ("YYYY-MM-DD" -> count), so analytics rollups can still count them
+    message_days = models.JSONField(default=dict)
+    # zlib-compressed JSON list of [id, role, content, created_at] message rows, oldest first
+    messages = models.BinaryField()
+    # Timestamp when the session was moved to the archive
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title or 'Untitled'} (archived)"
+
+    def get_absolute_url(self):
+        return reverse("chat:conversation_detail", kwargs={"session_id": self.pk})
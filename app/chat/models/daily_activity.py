@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class DailyActivity(models.Model):
+    """
+    Real-world entity: Platform-wide activity totals for one calendar day
+    Why it exists: Serve the public active-users API without scanning the Message table
+    """
+    # UTC calendar day these totals cover
+    day = models.DateField(unique=True)
+    # Distinct users who sent or received a message on this day
+    active_users = models.IntegerField(default=0)
+    # Messages created on this day
+    message_count = models.IntegerField(default=0)
+    # Set when deletes may have left the totals stale; cleared by compaction
+    is_dirty = models.BooleanField(default=False)
+    # Timestamp when the totals were last written
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["day"]
+
+    def __str__(self):
+        return f"{self.day} - {self.active_users} users"
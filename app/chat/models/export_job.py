@@ -0,0 +1,51 @@
+from uuid import uuid4
+
+from django.db import models
+
+class ExportStatus(models.IntegerChoices):
+    PENDING = 1,
+    RUNNING = 2,
+    SUCCEEDED = 3,
+    FAILED = 4
+
+def export_artifact_upload_to(instance, filename):
+    return f"exports/users/{instance.user_id}/{uuid4().hex}_{filename}"
+
+class ExportJob(models.Model):
+    """
+    Real-world entity: Background export of a user's analytics report to a downloadable file
+    Why it exists: Let large exports run in a worker process instead of holding an HTTP worker
+    """
+    # Owner of the exported data; cascade to drop jobs and their files with the user
+    user = models.ForeignKey("users.UserProfile", on_delete=models.CASCADE, related_name="export_jobs")
+    # Opaque identifier used in polling and download URLs
+    uuid = models.UUIDField(default=uuid4, unique=True, editable=False)
+    # Which report to export, e.g. "sessions" or "memory_bullets"
+    report = models.CharField(max_length=32)
+    # Output file format, e.g. "csv" or "json"
+    export_format = models.CharField(max_length=8)
+    # Search filter applied to the report rows
+    query = models.CharField(max_length=200, blank=True, default="")
+    # Lifecycle state of the job
+    status = models.SmallIntegerField(choices=ExportStatus, default=ExportStatus.PENDING)
+    # Generated file in media storage once the job succeeds
+    artifact = models.FileField(upload_to=export_artifact_upload_to, null=True, blank=True)
+    # Number of rows written to the artifact
+    record_count = models.IntegerField(default=0)
+    # Failure message shown to the user when the job fails
+    error = models.TextField(blank=True, default="")
+    # Timestamp when the job was requested
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Timestamp when a worker claimed the job
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Timestamp when the job succeeded or failed
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"])
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user} - {self.report}.{self.export_format} ({self.get_status_display()})"
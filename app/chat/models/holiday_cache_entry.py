@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class HolidayCacheEntry(models.Model):
+    """
+    Real-world entity: Cached response from the external holiday API
+    Why it exists: Serve holiday data without outbound HTTP and keep serving it through upstream outages
+    """
+    # Cache key such as "regions" or "holidays:US:2026"
+    key = models.CharField(max_length=120, unique=True)
+    # Parsed JSON payload returned by the holiday API
+    payload = models.JSONField(default=list)
+    # True when the entry records a known-bad lookup (e.g. an unsupported country code)
+    is_negative = models.BooleanField(default=False)
+    # Timestamp when the payload was fetched from the holiday API
+    fetched_at = models.DateTimeField()
+    # Timestamp after which the payload should be revalidated; null means it never expires
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["key"]
+
+    def __str__(self):
+        return self.key
+
+    def is_fresh(self, now):
+        return self.expires_at is None or self.expires_at > now
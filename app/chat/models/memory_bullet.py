@@ -14,6 +14,8 @@ class MemoryBullet(models.Model):
     memory = models.ForeignKey("Memory", on_delete=models.CASCADE)
     # The memory content text
     content = models.TextField()
+    # SHA-256 of the normalized content, used to find duplicates of a bullet within its memory
+    content_key = models.CharField(max_length=64, blank=True, default="")
     # The tag of memory summarized
     tags = models.JSONField(default=list)
     # Count of helpful votes
@@ -34,7 +36,12 @@ class MemoryBullet(models.Model):
     concept = models.TextField(null=True)
     # Days of time before deletion
     ttl_days = models.IntegerField()
+    # Timestamp up to which strength decay has been applied; null until the first decay
+    decayed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["memory","-last_accessed"])]
+        indexes = [
+            models.Index(fields=["memory","-last_accessed"]),
+            models.Index(fields=["memory", "content_key"]),
+        ]
         ordering = ["-last_accessed"]
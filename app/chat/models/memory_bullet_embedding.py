@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class MemoryBulletEmbedding(models.Model):
+    """
+    Real-world entity: Embedding vector computed for a memory bullet
+    Why it exists: Let memory retrieval rank bullets by meaning instead of substring matches
+    """
+    # The bullet this vector describes; cascade so vectors never outlive their bullet
+    bullet = models.OneToOneField(
+        "MemoryBullet",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="embedding",
+    )
+    # Owner of the bullet, copied here so a user's vectors load without joining through Memory
+    user = models.ForeignKey("users.UserProfile", on_delete=models.CASCADE)
+    # Name of the embedding model that produced the vector; vectors from other models are ignored
+    model_name = models.CharField(max_length=100)
+    # Number of float32 components in the vector
+    dimensions = models.PositiveSmallIntegerField()
+    # L2-normalized little-endian float32 components
+    vector = models.BinaryField()
+    # Timestamp when the vector was last computed
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "model_name"])]
+
+    def __str__(self):
+        return f"{self.bullet_id} - {self.model_name}"
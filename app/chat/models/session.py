@@ -1,6 +1,5 @@
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
-from django.utils import timezone
 
 # Create your models here.
 class Session(models.Model):
@@ -18,7 +17,10 @@ class Session(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        indexes = [models.Index(fields=["user", "-created_at"])]
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+            models.Index(fields=["user", "-updated_at"]),
+        ]
         ordering = ["-created_at"]
 
     def __str__(self):
@@ -33,12 +35,16 @@ class Session(models.Model):
         if not prompt:
             return None
 
-        session = cls.objects.create(user=user_profile, title=prompt[:200])
-
         from .message import Message, Role
-        Message.objects.create(session=session, role=Role.USER, content=prompt)
-        Message.objects.create(session=session, role=Role.ASSISTANT, content=assistant_reply)
-
-        session.updated_at = timezone.now()
-        session.save(update_fields=["updated_at"])
+        from ..rollup_service import record_messages_created
+
+        # One transaction and one multi-row INSERT for both messages; the new session's
+        # updated_at already marks it as the most recent, so no separate touch is needed
+        with transaction.atomic():
+            session = cls.objects.create(user=user_profile, title=prompt[:200])
+            messages = Message.objects.bulk_create([
+                Message(session=session, role=Role.USER, content=prompt),
+                Message(session=session, role=Role.ASSISTANT, content=assistant_reply),
+            ])
+            record_messages_created(session.user_id, messages)
         return session
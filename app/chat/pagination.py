@@ -0,0 +1,146 @@
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "app.chat.pagination.cursor"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def normalize_page_size(value, default, maximum):
+    text = str(value if value is not None else "").strip()
+    if not text.isdigit():
+        return default
+    return max(1, min(int(text), maximum))
+
+
+def _split_ordering(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def _get_output_field(queryset, name):
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return queryset.model._meta.get_field(name)
+
+
+def encode_cursor(ordering, values):
+    serialized = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+    # Signed so clients cannot hand-craft positions; the ordering is embedded so a cursor
+    # from one listing is rejected by another
+    return signing.dumps({"o": list(ordering), "v": serialized}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, ordering, queryset):
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature as exc:
+        raise InvalidCursorError("Malformed or tampered cursor") from exc
+    if payload.get("o") != list(ordering) or len(payload.get("v", [])) != len(ordering):
+        raise InvalidCursorError("Cursor does not belong to this listing")
+    return [
+        _get_output_field(queryset, name).to_python(value)
+        for (name, _), value in zip(_split_ordering(ordering), payload["v"])
+    ]
+
+
+def _after_filter(ordering, values):
+    # Row-value comparison spelled out: (a, b) after (a0, b0) is a beyond a0, or a = a0 and b beyond b0
+    fields = _split_ordering(ordering)
+    condition = Q()
+    for position, (name, descending) in enumerate(fields):
+        term = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+        for (previous_name, _), previous_value in zip(fields[:position], values[:position]):
+            term &= Q(**{previous_name: previous_value})
+        condition |= term
+    # The redundant bound on the leading column lets the database seek into its index
+    leading_name, leading_descending = fields[0]
+    return Q(**{f"{leading_name}__{'lte' if leading_descending else 'gte'}": values[0]}) & condition
+
+
+def paginate_by_keyset(queryset, ordering, cursor="", limit=50):
+    """
+    Return (rows, next_cursor) for the page of queryset after cursor in the given
+    ordering, whose last entry must be a unique column. Each page costs one indexed
+    range scan however deep the client has paged.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after_filter(ordering, decode_cursor(cursor, ordering, queryset)))
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(ordering, [getattr(last, name) for name, _ in _split_ordering(ordering)])
+
+
+def paginate_rows_by_keyset(rows, ordering, queryset, cursor="", limit=50):
+    """
+    paginate_by_keyset over rows already in memory, such as messages unpacked from an
+    archive. queryset only supplies the column types, so cursors are interchangeable
+    with the ones paging the same listing in the database.
+    """
+    fields = _split_ordering(ordering)
+    rows = list(rows)
+    for name, descending in reversed(fields):
+        rows.sort(key=lambda row: getattr(row, name), reverse=descending)
+    if cursor:
+        values = decode_cursor(cursor, ordering, queryset)
+        rows = [row for row in rows if _row_is_after(row, fields, values)]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(ordering, [getattr(last, name) for name, _ in fields])
+
+
+def _row_is_after(row, fields, values):
+    for (name, descending), value in zip(fields, values):
+        current = getattr(row, name)
+        if current != value:
+            return current < value if descending else current > value
+    return False
+
+
+def paginate_by_offset(queryset, ordering, cursor="", limit=50):
+    """
+    Return (rows, next_cursor) for orderings whose leading value is recomputed on every
+    request, such as full-text rank: a keyset position in such an ordering can land
+    anywhere once the scores move, so the cursor stores a row offset instead.
+    """
+    offset = 0
+    if cursor:
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature as exc:
+            raise InvalidCursorError("Malformed or tampered cursor") from exc
+        offset = payload.get("n")
+        if payload.get("o") != list(ordering) or not isinstance(offset, int) or offset < 0:
+            raise InvalidCursorError("Cursor does not belong to this listing")
+    rows = list(queryset.order_by(*ordering)[offset:offset + limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], signing.dumps({"o": list(ordering), "n": offset + limit}, salt=CURSOR_SALT, compress=True)
+
+
+def paginate_merged_by_keyset(querysets, ordering, cursor="", limit=50):
+    """
+    Like paginate_by_keyset over the union of querysets from different models that share
+    the ordering columns, e.g. live and archived sessions. Costs one page query per queryset.
+    """
+    fields = _split_ordering(ordering)
+    rows, has_more = [], False
+    for queryset in querysets:
+        page, next_cursor = paginate_by_keyset(queryset, ordering, cursor=cursor, limit=limit)
+        rows.extend(page)
+        has_more = has_more or next_cursor is not None
+    # Stable sorts from the last column to the first give the combined multi-column order
+    for name, descending in reversed(fields):
+        rows.sort(key=lambda row: getattr(row, name), reverse=descending)
+    if len(rows) <= limit and not has_more:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(ordering, [getattr(last, name) for name, _ in fields])
@@ -0,0 +1,149 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Func, Value, When
+from django.db.models.functions import Abs, Cast, Greatest
+from django.utils import timezone
+
+from .retrieval_service import top_k_indices
+
+DEFAULT_RELEVANCE_WEIGHTS = {"text": 0.4, "strength": 0.2, "recency": 0.2, "affect": 0.1, "access": 0.1}
+# Affect and access counts are squashed with x / (|x| + scale), so scale is the count that scores half
+AFFECT_SCALE = 5.0
+ACCESS_SCALE = 10.0
+# Text-match annotations the re-ranker understands, in order of preference
+TEXT_SCORE_ANNOTATIONS = ("search_rank", "similarity")
+
+
+class DaysSince(Func):
+    """
+    Fractional days between a datetime column and a fixed point in time, clamped at 0.
+    Backends without a rendering below contribute 0 and leave recency to the re-ranker.
+    """
+    output_field = FloatField()
+
+    def __init__(self, expression, now, **extra):
+        super().__init__(Value(now), expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return "0.0", []
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="MAX(julianday(%(expressions)s), 0.0)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="GREATEST(EXTRACT(EPOCH FROM (%(expressions)s)) / 86400.0, 0.0)",
+            arg_joiner=" - ",
+            **extra_context,
+        )
+
+
+def get_relevance_weights():
+    return {**DEFAULT_RELEVANCE_WEIGHTS, **getattr(settings, "CHAT_RELEVANCE_WEIGHTS", {})}
+
+
+def _get_half_life_days():
+    return float(getattr(settings, "CHAT_RELEVANCE_HALF_LIFE_DAYS", 30))
+
+
+def _squashed(expression, scale):
+    return Cast(expression, FloatField()) / (Abs(Cast(expression, FloatField())) + Value(scale))
+
+
+def _prior_expression(weights, now):
+    # Every signal except text relevance, in SQL; recency uses 1 / (1 + t / half_life),
+    # which orders rows like the exponential decay the re-ranker applies
+    half_life = _get_half_life_days()
+    affect = F("helpful_count") - F("harmful_count")
+    return (
+        Value(weights["strength"] / 100.0) * Cast(Greatest(F("strength"), Value(0)), FloatField())
+        + Value(weights["affect"]) * _squashed(affect, AFFECT_SCALE)
+        + Value(weights["access"]) * _squashed(F("memory__access_clock"), ACCESS_SCALE)
+        + Value(weights["recency"] * half_life) / (Value(half_life) + DaysSince(F("last_accessed"), now))
+    )
+
+
+def _score_candidates(rows, text_field, weights, now):
+    columns = list(zip(*rows))
+    strength = np.clip(np.asarray(columns[1], dtype=np.float64) / 100.0, 0.0, None)
+    affect = np.asarray(columns[2], dtype=np.float64) - np.asarray(columns[3], dtype=np.float64)
+    access = np.asarray(columns[4], dtype=np.float64)
+    age_days = np.clip(
+        np.asarray([(now - value).total_seconds() for value in columns[5]], dtype=np.float64) / 86400.0,
+        0.0,
+        None,
+    )
+    scores = (
+        weights["strength"] * strength
+        + weights["affect"] * affect / (np.abs(affect) + AFFECT_SCALE)
+        + weights["access"] * access / (np.abs(access) + ACCESS_SCALE)
+        + weights["recency"] * np.exp(-math.log(2) * age_days / _get_half_life_days())
+    )
+    if text_field:
+        text = np.asarray([value or 0.0 for value in columns[6]], dtype=np.float64)
+        # bm25, ts_rank and cosine scores live on different scales; the best candidate scores 1
+        best_text = text.max()
+        if best_text > 0:
+            scores += weights["text"] * np.clip(text / best_text, 0.0, None)
+    return scores
+
+
+def rank_memory_bullets(queryset, limit=100, now=None):
+    """
+    Return up to limit (bullet id, relevance) pairs from queryset, best first.
+
+    SQL orders the corpus by every signal except text relevance (and separately by
+    text relevance when the queryset carries search_rank or similarity) and hands over
+    only the head of each ordering; NumPy re-scores those candidates exactly.
+    """
+    if limit <= 0:
+        return []
+    now = now or timezone.now()
+    weights = get_relevance_weights()
+    text_field = next((name for name in TEXT_SCORE_ANNOTATIONS if name in queryset.query.annotations), None)
+    fields = ["id", "strength", "helpful_count", "harmful_count", "memory__access_clock", "last_accessed"]
+    if text_field:
+        fields.append(text_field)
+
+    candidate_limit = max(limit * 4, getattr(settings, "CHAT_RELEVANCE_MIN_CANDIDATES", 200))
+    orderings = [queryset.annotate(relevance_prior=_prior_expression(weights, now)).order_by("-relevance_prior", "-id")]
+    if text_field:
+        orderings.append(queryset.order_by(F(text_field).desc(nulls_last=True), "-id"))
+    candidates = {}
+    for ordered in orderings:
+        for row in ordered.values_list(*fields)[:candidate_limit]:
+            candidates[row[0]] = row
+    if not candidates:
+        return []
+
+    rows = list(candidates.values())
+    scores = _score_candidates(rows, text_field, weights, now)
+    best = top_k_indices(scores, limit)
+    return [(rows[position][0], round(float(scores[position]), 6)) for position in best]
+
+
+def apply_memory_bullet_relevance(queryset, limit=100):
+    """
+    Restrict bullets to the limit most relevant ones, annotated with relevance where
+    higher is better.
+    """
+    ranked = rank_memory_bullets(queryset, limit=limit)
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(id__in=[bullet_id for bullet_id, _ in ranked]).annotate(
+        relevance=Case(
+            *[When(id=bullet_id, then=Value(score)) for bullet_id, score in ranked],
+            output_field=FloatField(),
+        )
+    )
+
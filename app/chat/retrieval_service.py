@@ -0,0 +1,385 @@
+import copy
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Value, When
+from django.utils.module_loading import import_string
+
+from .models import MemoryBullet, MemoryBulletEmbedding
+
+VECTOR_DTYPE = np.dtype("<f4")
+VECTOR_INDEX_CACHE_PREFIX = "chat:vector-index"
+EMBED_BATCH_SIZE = 500
+# Rows scored per matrix product while assigning vectors to IVF lists
+IVF_ASSIGN_CHUNK = 8192
+IVF_TRAIN_ITERATIONS = 8
+IVF_TRAIN_SAMPLES_PER_LIST = 32
+# Seconds each generation's changed bullet ids are kept, so loaded indexes patch those rows instead of reloading
+VECTOR_CHANGE_LOG_TTL = 60 * 60
+# Changed rows a loaded index may absorb as patches before the next change reloads it whole
+INDEX_MAX_PATCHED_ROWS = 1024
+
+_embedder = None
+_index_lock = threading.Lock()
+# Profile id -> bullet ids changed in the current transaction, or None when the whole index must reload
+_pending = threading.local()
+# (profile id, embedding model name) -> VectorIndex, least recently used first
+_indexes = OrderedDict()
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of word unigrams and bigrams. Needs no model files and
+    produces the same vector for the same text in every process.
+    """
+
+    def __init__(self, dimensions=256):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = re.findall(r"\w+", (text or "").lower())
+            for feature in tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]:
+                value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        return vectors
+
+
+def get_embedder():
+    global _embedder
+    backend = getattr(settings, "CHAT_EMBEDDING_BACKEND", "app.chat.retrieval_service.HashingEmbedder")
+    options = getattr(settings, "CHAT_EMBEDDING_OPTIONS", {})
+    key = (backend, tuple(sorted(options.items())))
+    if _embedder is None or _embedder[0] != key:
+        _embedder = (key, import_string(backend)(**options))
+    return _embedder[1]
+
+
+def embed_texts(texts):
+    vectors = np.asarray(get_embedder().embed(list(texts)), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Texts without any tokens keep a zero vector, which scores 0 against everything
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def get_memory_bullet_embedding_text(bullet):
+    return " ".join(part for part in (bullet.content, bullet.topic, bullet.concept) if part)
+
+
+def embed_memory_bullets(bullets):
+    bullets = list(bullets)
+    if not bullets:
+        return 0
+    embedder = get_embedder()
+    vectors = embed_texts([get_memory_bullet_embedding_text(bullet) for bullet in bullets])
+    rows = [
+        MemoryBulletEmbedding(
+            bullet_id=bullet.pk,
+            user_id=bullet.memory.user_id,
+            model_name=embedder.name,
+            dimensions=vectors.shape[1],
+            vector=vector.astype(VECTOR_DTYPE).tobytes(),
+        )
+        for bullet, vector in zip(bullets, vectors)
+    ]
+    MemoryBulletEmbedding.objects.bulk_create(
+        rows,
+        batch_size=EMBED_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["bullet"],
+        update_fields=["user", "model_name", "dimensions", "vector", "updated_at"],
+    )
+    changed = {}
+    for row in rows:
+        changed.setdefault(row.user_id, []).append(row.bullet_id)
+    for profile_id, bullet_ids in changed.items():
+        record_vector_changes(profile_id, bullet_ids)
+    return len(rows)
+
+
+def rebuild_memory_bullet_embeddings():
+    embedder = get_embedder()
+    bullets = MemoryBullet.objects.select_related("memory").order_by("pk")
+    embedded = 0
+    batch = []
+    for bullet in bullets.iterator(chunk_size=EMBED_BATCH_SIZE):
+        batch.append(bullet)
+        if len(batch) == EMBED_BATCH_SIZE:
+            embedded += embed_memory_bullets(batch)
+            batch = []
+    embedded += embed_memory_bullets(batch)
+    stale = MemoryBulletEmbedding.objects.exclude(model_name=embedder.name)
+    stale_profile_ids = set(stale.values_list("user_id", flat=True).distinct())
+    stale.delete()
+    for profile_id in stale_profile_ids:
+        invalidate_vector_index(profile_id)
+    return embedded
+
+
+def _get_cache():
+    return caches[getattr(settings, "CHAT_VECTOR_INDEX_CACHE_ALIAS", "default")]
+
+
+def _generation_key(profile_id):
+    return f"{VECTOR_INDEX_CACHE_PREFIX}:{profile_id}:generation"
+
+
+def _changes_key(profile_id, generation):
+    return f"{VECTOR_INDEX_CACHE_PREFIX}:{profile_id}:changes:{generation}"
+
+
+def _publish_pending_changes():
+    changes = getattr(_pending, "changes", {})
+    _pending.changes = {}
+    cache = _get_cache()
+    for profile_id, bullet_ids in changes.items():
+        # add() then incr() hands every writer its own generation, even on a cold cache
+        cache.add(_generation_key(profile_id), 0, None)
+        generation = cache.incr(_generation_key(profile_id))
+        if bullet_ids is not None:
+            cache.set(_changes_key(profile_id, generation), sorted(bullet_ids), VECTOR_CHANGE_LOG_TTL)
+
+
+def _schedule_publish():
+    # Published after commit, once per transaction, so readers patch from committed rows
+    if connection.in_atomic_block:
+        transaction.on_commit(_publish_pending_changes)
+    else:
+        _publish_pending_changes()
+
+
+def record_vector_changes(profile_id, bullet_ids):
+    """
+    Tell loaded indexes that these bullets were embedded again or deleted. Each process
+    patches just those rows on its next query instead of reloading the user's matrix.
+    """
+    if not hasattr(_pending, "changes"):
+        _pending.changes = {}
+    changed = _pending.changes.setdefault(profile_id, set())
+    if changed is not None:
+        changed.update(bullet_ids)
+    _schedule_publish()
+
+
+def invalidate_vector_index(profile_id):
+    if not hasattr(_pending, "changes"):
+        _pending.changes = {}
+    _pending.changes[profile_id] = None
+    _schedule_publish()
+
+
+def top_k_indices(scores, k):
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    In-memory vectors of one user. Small corpora are scored exhaustively with one
+    matrix-vector product; from CHAT_VECTOR_ANN_MIN_ROWS rows on, an IVF index
+    (spherical k-means lists) restricts scoring to the lists nearest the query.
+    """
+
+    def __init__(self, ids, matrix, generation):
+        self.ids = ids
+        self.matrix = matrix
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.centroids = None
+        self.offsets = None
+        if len(ids) >= getattr(settings, "CHAT_VECTOR_ANN_MIN_ROWS", 20000):
+            self._build_ivf()
+        # Rows changed since loading: loaded rows that are masked out, and current vectors scored exhaustively
+        self.hidden = np.zeros(len(self.ids), dtype=bool)
+        self.hidden_count = 0
+        self.extra_ids = np.empty(0, dtype=np.int64)
+        self.extra_matrix = np.empty((0, matrix.shape[1]), dtype=VECTOR_DTYPE)
+        self.patched_rows = 0
+
+    def __len__(self):
+        return len(self.ids) - self.hidden_count + len(self.extra_ids)
+
+    def patched(self, ids, matrix, changed_ids, generation):
+        """
+        Copy of this index in which changed_ids are dropped and ids carry the given
+        vectors. The loaded arrays are shared, so searches running on this index are unaffected.
+        """
+        index = copy.copy(self)
+        index.generation = generation
+        keep = ~np.isin(self.extra_ids, changed_ids)
+        index.extra_ids = np.concatenate([self.extra_ids[keep], ids])
+        index.extra_matrix = np.concatenate([self.extra_matrix[keep], matrix])
+        index.hidden = self.hidden | np.isin(self.ids, changed_ids)
+        index.hidden_count = int(index.hidden.sum())
+        index.patched_rows = self.patched_rows + len(changed_ids)
+        return index
+
+    def _assign(self, vectors, centroids):
+        return np.concatenate([
+            np.argmax(vectors[start:start + IVF_ASSIGN_CHUNK] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), IVF_ASSIGN_CHUNK)
+        ])
+
+    def _build_ivf(self):
+        rng = np.random.default_rng(0)
+        list_count = int(np.sqrt(len(self.ids)))
+        sample_size = min(len(self.ids), list_count * IVF_TRAIN_SAMPLES_PER_LIST)
+        sample = self.matrix[rng.choice(len(self.ids), size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=list_count, replace=False)].copy()
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, self._assign(sample, centroids), sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # Lists that attracted no sample keep their previous centroid
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+
+        assignment = self._assign(self.matrix, centroids)
+        # Store each list contiguously so probing a list is a slice, not a gather
+        order = np.argsort(assignment, kind="stable")
+        self.ids = self.ids[order]
+        self.matrix = np.ascontiguousarray(self.matrix[order])
+        self.offsets = np.searchsorted(assignment[order], np.arange(list_count + 1))
+        self.centroids = centroids
+
+    def search(self, query, k):
+        if self.centroids is None:
+            rows = slice(None)
+        else:
+            probe_count = min(getattr(settings, "CHAT_VECTOR_ANN_PROBES", 16), len(self.centroids))
+            probes = top_k_indices(self.centroids @ query, probe_count)
+            rows = np.concatenate([np.arange(self.offsets[probe], self.offsets[probe + 1]) for probe in probes])
+        ids = self.ids[rows]
+        scores = self.matrix[rows] @ query
+        if self.hidden_count:
+            scores[self.hidden[rows]] = -np.inf
+        if len(self.extra_ids):
+            ids = np.concatenate([ids, self.extra_ids])
+            scores = np.concatenate([scores, self.extra_matrix @ query])
+        best = top_k_indices(scores, k)
+        best = best[np.isfinite(scores[best])]
+        return list(zip(ids[best].tolist(), scores[best].tolist()))
+
+
+def _load_vectors(profile_id, embedder, bullet_ids=None):
+    rows = MemoryBulletEmbedding.objects.filter(
+        user_id=profile_id, model_name=embedder.name, dimensions=embedder.dimensions
+    )
+    if bullet_ids is not None:
+        rows = rows.filter(bullet_id__in=bullet_ids)
+    rows = list(rows.values_list("bullet_id", "vector"))
+    ids = np.fromiter((bullet_id for bullet_id, _ in rows), dtype=np.int64, count=len(rows))
+    matrix = np.frombuffer(b"".join(vector for _, vector in rows), dtype=VECTOR_DTYPE)
+    return ids, matrix.reshape(len(rows), embedder.dimensions)
+
+
+def _load_vector_index(profile_id, embedder, generation):
+    ids, matrix = _load_vectors(profile_id, embedder)
+    return VectorIndex(ids, matrix, generation)
+
+
+def _patch_vector_index(index, profile_id, embedder, generation):
+    # None when the change log cannot bring the index up to date and it must be reloaded
+    missed = generation - index.generation
+    if missed <= 0 or index.patched_rows + missed > INDEX_MAX_PATCHED_ROWS:
+        return None
+    logged = _get_cache().get_many(
+        [_changes_key(profile_id, number) for number in range(index.generation + 1, generation + 1)]
+    )
+    if len(logged) < missed:
+        return None
+    changed = sorted(set().union(*logged.values()))
+    if index.patched_rows + len(changed) > INDEX_MAX_PATCHED_ROWS:
+        return None
+    # Changed ids that no longer have a vector were deleted, and are only dropped
+    ids, matrix = _load_vectors(profile_id, embedder, changed)
+    return index.patched(ids, matrix, np.array(changed, dtype=np.int64), generation)
+
+
+def _get_vector_index(profile_id):
+    embedder = get_embedder()
+    key = (profile_id, embedder.name)
+    generation = _get_cache().get(_generation_key(profile_id), 0)
+    # Writes from other processes only reach this one through a shared cache; the age limit bounds staleness otherwise
+    max_age = getattr(settings, "CHAT_VECTOR_INDEX_MAX_AGE", 300)
+    with _index_lock:
+        index = _indexes.get(key)
+        if index is not None and time.monotonic() - index.loaded_at < max_age:
+            if index.generation == generation:
+                _indexes.move_to_end(key)
+                return index
+        else:
+            index = None
+
+    if index is not None:
+        index = _patch_vector_index(index, profile_id, embedder, generation)
+    if index is None:
+        index = _load_vector_index(profile_id, embedder, generation)
+    with _index_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > getattr(settings, "CHAT_VECTOR_INDEX_CACHE_SIZE", 16):
+            _indexes.popitem(last=False)
+    return index
+
+
+def get_similar_memory_bullet_ids(profile_id, text, k=10, min_similarity=None):
+    """
+    Return up to k (bullet id, cosine similarity) pairs for the profile's bullets
+    closest in meaning to text, best first.
+    """
+    if min_similarity is None:
+        min_similarity = getattr(settings, "CHAT_VECTOR_MIN_SIMILARITY", 0.0)
+    if k <= 0 or not (text or "").strip():
+        return []
+    query = embed_texts([text])[0]
+    index = _get_vector_index(profile_id)
+    if not len(index) or not query.any():
+        return []
+    return [(bullet_id, score) for bullet_id, score in index.search(query, k) if score > min_similarity]
+
+
+def search_similar_memory_bullets(profile_id, text, k=10, min_similarity=None):
+    ranked = get_similar_memory_bullet_ids(profile_id, text, k=k, min_similarity=min_similarity)
+    bullets = (
+        MemoryBullet.objects
+        .select_related("memory")
+        .filter(memory__user_id=profile_id)
+        .in_bulk([bullet_id for bullet_id, _ in ranked])
+    )
+    results = []
+    for bullet_id, score in ranked:
+        # Bullets deleted since the index was loaded are skipped
+        bullet = bullets.get(bullet_id)
+        if bullet is not None:
+            bullet.similarity = score
+            results.append(bullet)
+    return results
+
+
+def apply_memory_bullet_similarity(queryset, profile_id, text, k=50):
+    """
+    Restrict bullets to the k nearest to text, annotated with similarity where
+    higher is closer.
+    """
+    ranked = get_similar_memory_bullet_ids(profile_id, text, k=k)
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(id__in=[bullet_id for bullet_id, _ in ranked]).annotate(
+        similarity=Case(
+            *[When(id=bullet_id, then=Value(score)) for bullet_id, score in ranked],
+            output_field=FloatField(),
+        )
+    )
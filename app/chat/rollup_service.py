@@ -0,0 +1,450 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
+from django.utils import timezone
+
+from .models import AnalyticsRollup, ArchivedSession, DailyActivity, MemoryBullet, Message, Session
+from .models.analytics_rollup import ACTIVITY_ROLLUP_TYPE, STRENGTH_BUCKETS
+from .models.memory_bullet import MemoryType
+from app.users.models import UserProfile as Profile
+
+ACTIVITY_COUNTER_FIELDS = ("session_count", "message_count")
+BULLET_COUNTER_FIELDS = (
+    "bullet_count",
+    "strength_sum",
+    "strength_max",
+    "strength_min",
+    "helpful_sum",
+    "harmful_sum",
+) + tuple(field for _, _, field in STRENGTH_BUCKETS)
+ROLLUP_COUNTER_FIELDS = ACTIVITY_COUNTER_FIELDS + BULLET_COUNTER_FIELDS
+
+REFRESH_ACTIVITY = "activity"
+REFRESH_BULLETS = "bullets"
+
+_pending = threading.local()
+
+
+def rollup_day(value):
+    return value.astimezone(dt_timezone.utc).date()
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def strength_bucket_field(strength):
+    for _, upper, field in STRENGTH_BUCKETS:
+        if upper is None or strength <= upper:
+            return field
+    return STRENGTH_BUCKETS[-1][2]
+
+
+def _bullet_rollup_aggregates():
+    aggregates = {
+        "bullet_count": Count("id"),
+        "strength_sum": Sum("strength"),
+        "strength_max": Max("strength"),
+        "strength_min": Min("strength"),
+        "helpful_sum": Sum("helpful_count"),
+        "harmful_sum": Sum("harmful_count"),
+    }
+    lower = None
+    for _, upper, field in STRENGTH_BUCKETS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(strength__gt=lower)
+        if upper is not None:
+            condition &= Q(strength__lte=upper)
+        aggregates[field] = Count("id", filter=condition)
+        lower = upper
+    return aggregates
+
+
+def _apply_counter_delta(model, lookup, counters, extra_updates=None, extra_defaults=None):
+    updates = {field: F(field) + delta for field, delta in counters.items()}
+    updates["updated_at"] = timezone.now()
+    updates.update(extra_updates or {})
+
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **counters, **(extra_defaults or {}))
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _apply_rollup_delta(profile_id, day, memory_type, counters, strength=None):
+    extra_updates = {}
+    extra_defaults = {}
+    if strength is not None:
+        extra_updates = {
+            "strength_max": Greatest(Coalesce("strength_max", Value(strength)), Value(strength)),
+            "strength_min": Least(Coalesce("strength_min", Value(strength)), Value(strength)),
+        }
+        extra_defaults = {"strength_max": strength, "strength_min": strength}
+    _apply_counter_delta(
+        AnalyticsRollup,
+        {"user_id": profile_id, "day": day, "memory_type": memory_type},
+        counters,
+        extra_updates=extra_updates,
+        extra_defaults=extra_defaults,
+    )
+
+
+def record_session_created(session):
+    _apply_rollup_delta(
+        session.user_id,
+        rollup_day(session.created_at),
+        ACTIVITY_ROLLUP_TYPE,
+        {"session_count": 1},
+    )
+
+
+def record_message_created(message):
+    record_messages_created(message.session.user_id, [message])
+
+
+def record_messages_created(profile_id, messages):
+    for day, count in sorted(Counter(rollup_day(message.created_at) for message in messages).items()):
+        _apply_rollup_delta(profile_id, day, ACTIVITY_ROLLUP_TYPE, {"message_count": count})
+
+        # The user's first messages of the day are what make them an active user for that day
+        first_of_day = AnalyticsRollup.objects.filter(
+            user_id=profile_id,
+            day=day,
+            memory_type=ACTIVITY_ROLLUP_TYPE,
+            message_count=count,
+        ).exists()
+        _apply_counter_delta(
+            DailyActivity,
+            {"day": day},
+            {"message_count": count, "active_users": 1 if first_of_day else 0},
+        )
+
+
+def record_bullet_created(bullet):
+    counters = {
+        "bullet_count": 1,
+        "strength_sum": bullet.strength,
+        "helpful_sum": bullet.helpful_count,
+        "harmful_sum": bullet.harmful_count,
+        strength_bucket_field(bullet.strength): 1,
+    }
+    _apply_rollup_delta(
+        bullet.memory.user_id,
+        rollup_day(bullet.created_at),
+        bullet.memory_type,
+        counters,
+        strength=bullet.strength,
+    )
+
+
+def _store_rollup_row(profile_id, day, memory_type, counters):
+    lookup = {"user_id": profile_id, "day": day, "memory_type": memory_type}
+    if not any(counters.values()):
+        AnalyticsRollup.objects.filter(**lookup).delete()
+        return
+    AnalyticsRollup.objects.update_or_create(**lookup, defaults=counters)
+
+
+def iter_archived_activity(archived_sessions):
+    """
+    Yield (profile id, day, sessions, messages) for archived sessions, which still count
+    towards the activity rollups of the days they were created and written on.
+    """
+    for profile_id, created_at, message_days in archived_sessions.values_list("user_id", "created_at", "message_days"):
+        yield profile_id, rollup_day(created_at), 1, 0
+        for day, count in message_days.items():
+            yield profile_id, date.fromisoformat(day), 0, count
+
+
+def refresh_activity_rollup(profile_id, day):
+    start, end = _day_bounds(day)
+    counters = {
+        "session_count": Session.objects.filter(
+            user_id=profile_id,
+            created_at__gte=start,
+            created_at__lt=end,
+        ).count(),
+        "message_count": Message.objects.filter(
+            session__user_id=profile_id,
+            created_at__gte=start,
+            created_at__lt=end,
+        ).count(),
+    }
+    archived = ArchivedSession.objects.filter(user_id=profile_id).filter(
+        Q(created_at__gte=start, created_at__lt=end) | Q(message_days__has_key=day.isoformat())
+    )
+    for _, archived_day, session_count, message_count in iter_archived_activity(archived):
+        if archived_day == day:
+            counters["session_count"] += session_count
+            counters["message_count"] += message_count
+    _store_rollup_row(profile_id, day, ACTIVITY_ROLLUP_TYPE, counters)
+    DailyActivity.objects.filter(day=day).update(is_dirty=True)
+
+
+def refresh_bullet_rollups(profile_id, day):
+    start, end = _day_bounds(day)
+    rows_by_type = {
+        row.pop("memory_type"): row
+        for row in (
+            MemoryBullet.objects
+            .filter(memory__user_id=profile_id, created_at__gte=start, created_at__lt=end)
+            .values("memory_type")
+            .annotate(**_bullet_rollup_aggregates())
+            .order_by("memory_type")
+        )
+    }
+    for memory_type in MemoryType.values:
+        counters = rows_by_type.get(memory_type, {})
+        _store_rollup_row(profile_id, day, memory_type, counters)
+
+
+def _flush_pending_refreshes():
+    keys = getattr(_pending, "keys", set())
+    _pending.keys = set()
+    if not keys:
+        return
+
+    live_profile_ids = set(
+        Profile.objects
+        .filter(pk__in={profile_id for _, profile_id, _ in keys})
+        .values_list("pk", flat=True)
+    )
+    for kind, profile_id, day in sorted(keys):
+        if profile_id not in live_profile_ids:
+            if kind == REFRESH_ACTIVITY:
+                DailyActivity.objects.filter(day=day).update(is_dirty=True)
+            continue
+        if kind == REFRESH_ACTIVITY:
+            refresh_activity_rollup(profile_id, day)
+        else:
+            refresh_bullet_rollups(profile_id, day)
+
+
+def schedule_rollup_refresh(kind, profile_id, day):
+    if not hasattr(_pending, "keys"):
+        _pending.keys = set()
+    _pending.keys.add((kind, profile_id, day))
+    # Deferred until commit so cascaded deletes recompute each slice once, after the rows are gone
+    if connection.in_atomic_block:
+        transaction.on_commit(_flush_pending_refreshes)
+    else:
+        _flush_pending_refreshes()
+
+
+@contextmanager
+def batched_bullet_deletes():
+    """
+    Within the block, deleted bullets do not look up their owner and schedule a rollup
+    refresh row by row; the caller schedules one refresh per (user, day) instead.
+    """
+    _pending.batched_bullet_deletes = True
+    try:
+        yield
+    finally:
+        _pending.batched_bullet_deletes = False
+
+
+def in_batched_bullet_deletes():
+    return getattr(_pending, "batched_bullet_deletes", False)
+
+
+@contextmanager
+def archived_session_deletes():
+    """
+    Within the block, deleted sessions and messages are moving to the archive, where
+    the rollups still count them, so their delete handlers leave the rollups alone.
+    """
+    _pending.archived_session_deletes = True
+    try:
+        yield
+    finally:
+        _pending.archived_session_deletes = False
+
+
+def in_archived_session_deletes():
+    return getattr(_pending, "archived_session_deletes", False)
+
+
+def _collect_expected_rollups(profile_ids=None):
+    day_expression = TruncDate("created_at", tzinfo=dt_timezone.utc)
+    sessions = Session.objects.all()
+    messages = Message.objects.all()
+    bullets = MemoryBullet.objects.all()
+    archived_sessions = ArchivedSession.objects.all()
+    if profile_ids is not None:
+        sessions = sessions.filter(user_id__in=profile_ids)
+        messages = messages.filter(session__user_id__in=profile_ids)
+        bullets = bullets.filter(memory__user_id__in=profile_ids)
+        archived_sessions = archived_sessions.filter(user_id__in=profile_ids)
+
+    expected = {}
+
+    def _row(profile_id, day, memory_type):
+        key = (profile_id, day, memory_type)
+        if key not in expected:
+            expected[key] = {field: 0 for field in ROLLUP_COUNTER_FIELDS}
+            expected[key]["strength_max"] = None
+            expected[key]["strength_min"] = None
+        return expected[key]
+
+    for row in (
+        sessions.annotate(day=day_expression)
+        .values("user_id", "day")
+        .annotate(session_count=Count("id"))
+        .order_by()
+    ):
+        _row(row["user_id"], row["day"], ACTIVITY_ROLLUP_TYPE)["session_count"] = row["session_count"]
+
+    for row in (
+        messages.annotate(day=day_expression)
+        .values("session__user_id", "day")
+        .annotate(message_count=Count("id"))
+        .order_by()
+    ):
+        _row(row["session__user_id"], row["day"], ACTIVITY_ROLLUP_TYPE)["message_count"] = row["message_count"]
+
+    for profile_id, day, session_count, message_count in iter_archived_activity(archived_sessions):
+        target = _row(profile_id, day, ACTIVITY_ROLLUP_TYPE)
+        target["session_count"] += session_count
+        target["message_count"] += message_count
+
+    for row in (
+        bullets.annotate(day=day_expression)
+        .values("memory__user_id", "day", "memory_type")
+        .annotate(**_bullet_rollup_aggregates())
+        .order_by()
+    ):
+        target = _row(row["memory__user_id"], row["day"], row["memory_type"])
+        for field in BULLET_COUNTER_FIELDS:
+            target[field] = row[field]
+
+    return expected
+
+
+def _stored_rollups(profile_ids=None):
+    rollups = AnalyticsRollup.objects.all()
+    if profile_ids is not None:
+        rollups = rollups.filter(user_id__in=profile_ids)
+    return {
+        (row["user_id"], row["day"], row["memory_type"]): {field: row[field] for field in ROLLUP_COUNTER_FIELDS}
+        for row in rollups.values("user_id", "day", "memory_type", *ROLLUP_COUNTER_FIELDS)
+    }
+
+
+def rebuild_analytics_rollups(profile_ids=None, batch_size=500):
+    with transaction.atomic():
+        expected = _collect_expected_rollups(profile_ids)
+        stale = AnalyticsRollup.objects.all()
+        if profile_ids is not None:
+            stale = stale.filter(user_id__in=profile_ids)
+        stale.delete()
+        AnalyticsRollup.objects.bulk_create(
+            [
+                AnalyticsRollup(user_id=profile_id, day=day, memory_type=memory_type, **counters)
+                for (profile_id, day, memory_type), counters in expected.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(expected)
+
+
+def verify_analytics_rollups(profile_ids=None):
+    expected = _collect_expected_rollups(profile_ids)
+    stored = _stored_rollups(profile_ids)
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda item: (item[0], item[1], item[2])):
+        if expected.get(key) != stored.get(key):
+            mismatches.append(
+                {
+                    "user_id": key[0],
+                    "day": key[1],
+                    "memory_type": key[2],
+                    "expected": expected.get(key),
+                    "stored": stored.get(key),
+                }
+            )
+    return mismatches
+
+
+def _daily_activity_from_rollups(days=None):
+    rollups = AnalyticsRollup.objects.filter(memory_type=ACTIVITY_ROLLUP_TYPE, message_count__gt=0)
+    if days is not None:
+        rollups = rollups.filter(day__in=days)
+    return {
+        row["day"]: row
+        for row in (
+            rollups.values("day")
+            .annotate(active_users=Count("user_id"), message_count=Sum("message_count"))
+            .order_by("day")
+        )
+    }
+
+
+def compact_daily_activity(full=False):
+    if full:
+        totals = _daily_activity_from_rollups()
+        days = set(DailyActivity.objects.values_list("day", flat=True)) | set(totals)
+    else:
+        days = set(DailyActivity.objects.filter(is_dirty=True).values_list("day", flat=True))
+        totals = _daily_activity_from_rollups(days)
+    if not days:
+        return {"reconciled": 0, "removed": 0}
+
+    with transaction.atomic():
+        for day in sorted(totals):
+            DailyActivity.objects.update_or_create(
+                day=day,
+                defaults={
+                    "active_users": totals[day]["active_users"],
+                    "message_count": totals[day]["message_count"],
+                    "is_dirty": False,
+                },
+            )
+        removed, _ = DailyActivity.objects.filter(day__in=days - set(totals)).delete()
+    return {"reconciled": len(totals), "removed": removed}
+
+
+def backfill_daily_activity(batch_size=500):
+    # Per (user, day) so users with both live and archived messages on a day count once
+    user_days = Counter()
+    for row in (
+        Message.objects
+        .annotate(day=TruncDate("created_at", tzinfo=dt_timezone.utc))
+        .values("session__user_id", "day")
+        .annotate(message_count=Count("id"))
+        .order_by()
+    ):
+        user_days[row["session__user_id"], row["day"]] += row["message_count"]
+    for profile_id, day, _, message_count in iter_archived_activity(ArchivedSession.objects.all()):
+        if message_count:
+            user_days[profile_id, day] += message_count
+
+    daily = {}
+    for (_, day), message_count in user_days.items():
+        row = daily.setdefault(day, {"day": day, "active_users": 0, "message_count": 0})
+        row["active_users"] += 1
+        row["message_count"] += message_count
+    with transaction.atomic():
+        DailyActivity.objects.all().delete()
+        DailyActivity.objects.bulk_create(
+            [
+                DailyActivity(
+                    day=row["day"],
+                    active_users=row["active_users"],
+                    message_count=row["message_count"],
+                )
+                for _, row in sorted(daily.items())
+            ],
+            batch_size=batch_size,
+        )
+    return DailyActivity.objects.count()
@@ -0,0 +1,104 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import MemoryBullet
+
+SQLITE_FTS_TABLE = "chat_memorybullet_fts"
+MAX_SEARCH_TERMS = 16
+
+_fts_ready_aliases = set()
+
+
+def _search_terms(q):
+    return re.findall(r"\w+", (q or "").lower())[:MAX_SEARCH_TERMS]
+
+
+def _sqlite_fts_ready(alias):
+    if alias not in _fts_ready_aliases:
+        # FTS5 may be missing from the SQLite build or the migration not applied yet
+        if SQLITE_FTS_TABLE in connections[alias].introspection.table_names():
+            _fts_ready_aliases.add(alias)
+    return alias in _fts_ready_aliases
+
+
+def _postgres_document():
+    table = MemoryBullet._meta.db_table
+    # Must stay identical to the expression behind the chat_memorybullet_search_gin index
+    return (
+        "to_tsvector('simple'::regconfig, "
+        f"coalesce({table}.content, '') || ' ' || coalesce({table}.topic, '') || ' ' || coalesce({table}.concept, ''))"
+    )
+
+
+def _apply_sqlite_fts(queryset, terms):
+    table = MemoryBullet._meta.db_table
+    match = " AND ".join(f'"{term}"*' for term in terms)
+    return (
+        queryset
+        .filter(id__in=RawSQL(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s", [match]))
+        .annotate(
+            # bm25() is lower-is-better; negate it so every backend ranks descending
+            search_rank=RawSQL(
+                f"SELECT -bm25({SQLITE_FTS_TABLE}) FROM {SQLITE_FTS_TABLE} "
+                f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    )
+
+
+def _apply_postgres_fts(queryset, terms):
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    document = _postgres_document()
+    return (
+        queryset
+        .filter(RawSQL(f"{document} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()))
+        .annotate(
+            search_rank=RawSQL(
+                f"ts_rank({document}, to_tsquery('simple', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+    )
+
+
+def _apply_substring_search(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(content__icontains=term)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def apply_memory_bullet_search(queryset, q):
+    """
+    Filter bullets to those whose content, topic or concept match every term of q
+    (prefix match), annotated with search_rank where higher is more relevant.
+    """
+    terms = _search_terms(q)
+    if not terms:
+        normalized_q = (q or "").strip()
+        if normalized_q:
+            # Punctuation-only queries have no indexable tokens; keep the old substring behaviour
+            return _apply_substring_search(queryset, [normalized_q])
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite" and _sqlite_fts_ready(queryset.db):
+        return _apply_sqlite_fts(queryset, terms)
+    if vendor == "postgresql":
+        return _apply_postgres_fts(queryset, terms)
+    return _apply_substring_search(queryset, terms)
+
+
+def rebuild_memory_bullet_search_index(using="default"):
+    connection = connections[using]
+    if connection.vendor == "sqlite" and _sqlite_fts_ready(using):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+        return True
+    # The Postgres GIN index is an expression index maintained by the database itself
+    return False
@@ -1,38 +1,65 @@
-import io
-import re
+import heapq
+import threading
+import time
 from datetime import timedelta
-
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-from django.db.models import Avg, Count, ExpressionWrapper, F, IntegerField, Max, Min, Prefetch, Sum
-from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from functools import partial
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    DateTimeField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Prefetch,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Greatest, TruncDate, TruncMonth, TruncWeek
 from django.http import Http404
 from django.utils import timezone
 
-import math
-
-from .models import Memory, Message, MemoryBullet, Session
+from .access_service import record_memory_accesses
+from .analytics_service import compute_analytics_snapshot
+from .archive_service import read_archived_messages, rehydrate_archived_session
+from .models import ArchivedSession, DailyActivity, Memory, Message, MemoryBullet, Session
 from .models.message import Role
-from app.users.models import UserProfile as Profile
-
-PROGRESSIVE_COLORS = ["#575BEF", "#6F82FF", "#8DA0FF", "#AEBBFF", "#D6DDFF"]
-SEGMENT_COLORS = ["#9698FF", "#664FA1", "#FFC5D6", "#DAC6FF", "#B4EDE4"]
-CHART_BG = "#F7F8FF"
-CHART_GRID = "#DCE1FF"
-CHART_TEXT = "#2F3A4A"
-CHART_MUTED = "#6A7290"
-
-
-def get_or_create_profile_for_user(user):
-    profile, _ = Profile.objects.get_or_create(user=user)
-    return profile
+from .pagination import (
+    normalize_page_size,
+    paginate_by_keyset,
+    paginate_by_offset,
+    paginate_merged_by_keyset,
+    paginate_rows_by_keyset,
+)
+from .ranking_service import apply_memory_bullet_relevance
+from .retrieval_service import apply_memory_bullet_similarity, search_similar_memory_bullets
+from .rollup_service import record_messages_created
+from .search_service import apply_memory_bullet_search
+from app.users.services import get_or_create_profile_for_user, get_profile_id_for_user
+
+EXPORT_CHUNK_SIZE = 2000
+MEMORY_PAGE_SIMILAR_TOP_K = 50
+MEMORY_PAGE_RELEVANCE_TOP_N = 100
+# Default and maximum page sizes of the cursor-paginated JSON APIs
+API_MEMORIES_PAGE_SIZE = 100
+API_SESSIONS_PAGE_SIZE = 50
+API_MESSAGES_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+CONVERSATION_MAX_PAGE_SIZE = 200
+
+_session_touches_lock = threading.Lock()
+# Session id -> (profile id, latest touch) waiting for the write-behind flush
+_session_touches = {}
+_session_touches_since = None
 
 
 def _get_session_queryset_for_user(user):
-    profile = get_or_create_profile_for_user(user)
-    return Session.objects.filter(user=profile)
+    return Session.objects.filter(user_id=get_profile_id_for_user(user))
 
 
 def _get_session_or_404_for_user(user, session_id, with_messages=False):
@@ -45,13 +72,46 @@ def _get_session_or_404_for_user(user, session_id, with_messages=False):
         sessions = sessions.prefetch_related(messages_prefetch)
     try:
         return sessions.get(pk=session_id)
+    except Session.DoesNotExist:
+        pass
+    # Archived conversations move back into the hot tables when they are written to
+    rehydrate_archived_session(get_profile_id_for_user(user), session_id)
+    try:
+        # Looked up again even when nothing was restored: a concurrent request may have done it
+        return sessions.get(pk=session_id)
+    except Session.DoesNotExist as exc:
+        raise Http404 from exc
+
+
+def _get_readable_session_or_404_for_user(user, session_id):
+    # Reads serve archived conversations from their archive, which only a write restores
+    sessions = _get_session_queryset_for_user(user)
+    try:
+        return sessions.get(pk=session_id)
+    except Session.DoesNotExist:
+        pass
+    archived = ArchivedSession.objects.filter(user_id=get_profile_id_for_user(user), pk=session_id).first()
+    if archived is not None:
+        return archived
+    try:
+        # A concurrent write may have restored it between the two lookups
+        return sessions.get(pk=session_id)
     except Session.DoesNotExist as exc:
         raise Http404 from exc
 
 
+def _paginate_session_messages(session, ordering, roles=None, cursor="", limit=50):
+    if isinstance(session, ArchivedSession):
+        messages = [m for m in read_archived_messages(session) if roles is None or m.role in roles]
+        return paginate_rows_by_keyset(messages, ordering, Message.objects.all(), cursor=cursor, limit=limit)
+    messages = session.messages.all()
+    if roles is not None:
+        messages = messages.filter(role__in=roles)
+    return paginate_by_keyset(messages, ordering, cursor=cursor, limit=limit)
+
+
 def _get_memory_bullets_queryset_for_user(user):
-    profile = get_or_create_profile_for_user(user)
-    return MemoryBullet.objects.select_related("memory").filter(memory__user=profile)
+    return MemoryBullet.objects.select_related("memory").filter(memory__user_id=get_profile_id_for_user(user))
 
 
 def _apply_memory_bullet_filters(queryset, q="", memory_type="", topic="", strength_min=""):
@@ -61,9 +121,7 @@ def _apply_memory_bullet_filters(queryset, q="", memory_type="", topic="", stren
     normalized_strength_min = (strength_min or "").strip()
 
     if normalized_q:
-        terms = [term for term in re.split(r"\s+", normalized_q) if term]
-        for term in terms:
-            queryset = queryset.filter(content__icontains=term)
+        queryset = apply_memory_bullet_search(queryset, normalized_q)
     if normalized_memory_type.isdigit():
         queryset = queryset.filter(memory_type=int(normalized_memory_type))
     if normalized_topic:
@@ -73,37 +131,29 @@ def _apply_memory_bullet_filters(queryset, q="", memory_type="", topic="", stren
     return queryset
 
 
-def _get_analytics_metrics_for_user(user):
-    profile = get_or_create_profile_for_user(user)
-    bullets = MemoryBullet.objects.filter(memory__user=profile)
-    sessions = Session.objects.filter(user=profile)
-    messages = Message.objects.filter(session__user=profile)
-
-    type_dist = list(
-        bullets.values("memory_type")
-        .annotate(count=Count("id"))
-        .order_by("memory_type")
-    )
-    agg = bullets.aggregate(
-        avg_strength=Avg("strength"),
-        total_helpful=Sum("helpful_count"),
-        total_harmful=Sum("harmful_count"),
-    )
-    return {
-        "total_memories": bullets.count(),
-        "total_sessions": sessions.count(),
-        "total_messages": messages.count(),
-        "avg_strength": agg["avg_strength"],
-        "total_helpful": agg["total_helpful"] or 0,
-        "total_harmful": agg["total_harmful"] or 0,
-        "type_distribution_raw": type_dist,
-    }
+def get_analytics_snapshot_for_user(user, profile=None):
+    if profile is None:
+        profile = get_or_create_profile_for_user(user)
+    return compute_analytics_snapshot(profile)
 
 
 def get_sidebar_sessions_for_user(user):
     return _get_session_queryset_for_user(user).order_by("-updated_at")
 
 
+def get_sidebar_for_user(user):
+    limit = getattr(settings, "CHAT_SIDEBAR_SESSION_LIMIT", 30)
+    # One bounded read on the (user, -updated_at) index; joining through the profile avoids
+    # get_or_create, so a user without a profile simply has no sessions
+    sessions = list(
+        Session.objects
+        .filter(user__user=user)
+        .only("id", "title", "updated_at")
+        .order_by("-updated_at", "-id")[:limit + 1]
+    )
+    return {"sessions": sessions[:limit], "has_more": len(sessions) > limit}
+
+
 def get_home_context_for_user(user):
     profile = get_or_create_profile_for_user(user)
     return {
@@ -122,38 +172,154 @@ def get_session_for_user(user, session_id, with_messages=False):
     return _get_session_or_404_for_user(user, session_id, with_messages=with_messages)
 
 
+def _get_conversation_page(session, cursor="", limit=""):
+    limit = normalize_page_size(limit, getattr(settings, "CHAT_CONVERSATION_PAGE_SIZE", 50), CONVERSATION_MAX_PAGE_SIZE)
+    # Walk the (session, created_at) index backwards from the newest turn, then show the window oldest first
+    page, older_cursor = _paginate_session_messages(
+        session, ("-created_at", "-id"), roles=(Role.USER, Role.ASSISTANT), cursor=cursor, limit=limit
+    )
+    page.reverse()
+    return page, older_cursor
+
+
+def get_conversation_window_for_user(user, session_id, limit=""):
+    session = _get_readable_session_or_404_for_user(user, session_id)
+    messages, older_cursor = _get_conversation_page(session, limit=limit)
+    return {"session": session, "conversation_messages": messages, "older_cursor": older_cursor}
+
+
+def get_conversation_history_payload(user, session_id, cursor="", limit=""):
+    session = _get_readable_session_or_404_for_user(user, session_id)
+    messages, older_cursor = _get_conversation_page(session, cursor=cursor, limit=limit)
+    return {
+        "session_id": session.pk,
+        "messages": [
+            {
+                "id": m.id,
+                "role": "user" if m.role == Role.USER else "assistant",
+                "content": m.content,
+            }
+            for m in messages
+        ],
+        "next": older_cursor,
+    }
+
+
 def create_user_message_with_agent_reply(session, content):
     trimmed = (content or "").strip()
     if not trimmed:
         return False
 
-    Message.objects.create(
-        session=session,
-        role=Role.USER,
-        content=trimmed,
-    )
-    Message.objects.create(
-        session=session,
-        role=Role.ASSISTANT,
-        content="Agent Response",
+    # Recall only reads; marking the recalled bullets as accessed joins the turn's transaction
+    write_chat_turn(
+        session,
+        [(Role.USER, trimmed), (Role.ASSISTANT, "Agent Response")],
+        accessed_bullets=recall_memory_bullets_for_turn(session, trimmed),
     )
-    session.updated_at = timezone.now()
-    session.save(update_fields=["updated_at"])
     return True
 
 
+def write_chat_turn(session, contents, accessed_bullets=()):
+    """
+    Persist a turn's (role, content) messages with one multi-row INSERT, together with
+    the rollup counters, recalled-memory access marks and session touch, in a single
+    transaction. Bulk inserts skip post_save, so the rollups are recorded here.
+    """
+    with transaction.atomic():
+        messages = Message.objects.bulk_create(
+            [Message(session=session, role=role, content=content) for role, content in contents]
+        )
+        record_messages_created(session.user_id, messages)
+        mark_memory_bullets_accessed(accessed_bullets)
+        touch_session(session)
+    return messages
+
+
+def touch_session(session, touched_at=None):
+    session.updated_at = touched_at or timezone.now()
+    if not getattr(settings, "CHAT_SESSION_TOUCH_BUFFER_SECONDS", 0):
+        session.save(update_fields=["updated_at"])
+        return
+    # Buffered only once the turn commits, so a rolled-back turn never moves its session
+    transaction.on_commit(partial(_buffer_session_touch, session.pk, session.user_id, session.updated_at))
+
+
+def _buffer_session_touch(session_id, profile_id, touched_at):
+    global _session_touches_since
+    with _session_touches_lock:
+        previous = _session_touches.get(session_id)
+        if previous is None or previous[1] < touched_at:
+            _session_touches[session_id] = (profile_id, touched_at)
+        if _session_touches_since is None:
+            _session_touches_since = time.monotonic()
+    flush_session_touches(only_due=True)
+
+
+def flush_session_touches(only_due=False):
+    """
+    Write buffered session touches with one UPDATE and return how many sessions moved.
+    With only_due, nothing is written until the oldest touch has waited
+    CHAT_SESSION_TOUCH_BUFFER_SECONDS or CHAT_SESSION_TOUCH_BUFFER_SIZE sessions are pending.
+    """
+    global _session_touches_since
+    with _session_touches_lock:
+        if not _session_touches:
+            return 0
+        if only_due:
+            waited = time.monotonic() - _session_touches_since
+            if (
+                waited < getattr(settings, "CHAT_SESSION_TOUCH_BUFFER_SECONDS", 0)
+                and len(_session_touches) < getattr(settings, "CHAT_SESSION_TOUCH_BUFFER_SIZE", 500)
+            ):
+                return 0
+        pending = dict(_session_touches)
+        _session_touches.clear()
+        _session_touches_since = None
+
+    # Greatest keeps a newer touch already written by another process
+    Session.objects.filter(pk__in=pending).update(
+        updated_at=Greatest(
+            F("updated_at"),
+            Case(
+                *[When(pk=session_id, then=Value(touched_at)) for session_id, (_, touched_at) in pending.items()],
+                output_field=DateTimeField(),
+            ),
+        )
+    )
+    return len(pending)
+
+
+def recall_memory_bullets_for_turn(session, content):
+    top_k = getattr(settings, "CHAT_REPLY_MEMORY_TOP_K", 5)
+    # Recalled bullets are marked accessed, so only ones that clear the relevance floor count
+    min_similarity = getattr(settings, "CHAT_REPLY_MEMORY_MIN_SIMILARITY", 0.15)
+    return search_similar_memory_bullets(session.user_id, content, k=top_k, min_similarity=min_similarity)
+
+
+def mark_memory_bullets_accessed(bullets):
+    record_memory_accesses(bullets)
+
+
 def get_memory_list_data(user, search_query="", memory_type="", sort_key="created"):
-    bullets = _get_memory_bullets_queryset_for_user(user)
+    profile = get_or_create_profile_for_user(user)
+    bullets = MemoryBullet.objects.select_related("memory").filter(memory__user=profile)
 
     query = (search_query or "").strip()
     memory_type = (memory_type or "").strip()
     sort_key = (sort_key or "created").strip()
+    if sort_key == "similar" and not query:
+        sort_key = "created"
 
+    if sort_key == "similar":
+        # Semantic matches need not share a word with the query, so the text filter is skipped
+        bullets = apply_memory_bullet_similarity(bullets, profile.pk, query, k=MEMORY_PAGE_SIMILAR_TOP_K)
     bullets = _apply_memory_bullet_filters(
         bullets,
-        q=query,
+        q="" if sort_key == "similar" else query,
         memory_type=memory_type,
     )
+    if sort_key == "relevance":
+        bullets = apply_memory_bullet_relevance(bullets, limit=MEMORY_PAGE_RELEVANCE_TOP_N)
 
     bullets = bullets.annotate(
         affect=ExpressionWrapper(
@@ -166,6 +332,8 @@ def get_memory_list_data(user, search_query="", memory_type="", sort_key="create
         "created": ("-created_at", "Created time"),
         "strength": ("-strength", "Strength"),
         "affect": ("-affect", "Affect"),
+        "similar": ("-similarity", "Similarity"),
+        "relevance": ("-relevance", "Relevance"),
     }
     sort_order, sort_label = sort_map.get(sort_key, sort_map["created"])
     active_sort = sort_key if sort_key in sort_map else "created"
@@ -180,37 +348,18 @@ def get_memory_list_data(user, search_query="", memory_type="", sort_key="create
     }
 
 
-def get_memory_summary(user):
-    profile = get_or_create_profile_for_user(user)
-    bullets = MemoryBullet.objects.filter(memory__user=profile)
-
-    type_summary_raw = (
-        bullets.values("memory_type")
-        .annotate(count=Count("id"))
-        .order_by("memory_type")
-    )
-    type_choices = dict(MemoryBullet._meta.get_field("memory_type").choices)
-    type_summary = [
-        {"memory_type": item["memory_type"], "label": type_choices.get(item["memory_type"], str(item["memory_type"])), "count": item["count"]}
-        for item in type_summary_raw
-    ]
-
-    agg = bullets.aggregate(
-        avg_strength=Avg("strength"),
-        max_strength=Max("strength"),
-        min_strength=Min("strength"),
-        total_helpful=Sum("helpful_count"),
-        total_harmful=Sum("harmful_count"),
-    )
+def get_memory_summary(user, snapshot=None):
+    if snapshot is None:
+        snapshot = get_analytics_snapshot_for_user(user)
 
     return {
-        "total_count": bullets.count(),
-        "type_summary": type_summary,
-        "avg_strength": agg["avg_strength"],
-        "max_strength": agg["max_strength"],
-        "min_strength": agg["min_strength"],
-        "total_helpful": agg["total_helpful"] or 0,
-        "total_harmful": agg["total_harmful"] or 0,
+        "total_count": snapshot.total_memories,
+        "type_summary": snapshot.type_summary,
+        "avg_strength": snapshot.avg_strength,
+        "max_strength": snapshot.max_strength,
+        "min_strength": snapshot.min_strength,
+        "total_helpful": snapshot.total_helpful,
+        "total_harmful": snapshot.total_harmful,
     }
 
 
@@ -219,13 +368,8 @@ def get_analytics_dashboard_context(user):
 
 
 def get_analytics_dashboard_context_with_reports(user, session_group="month", memory_group="memory_type"):
-    metrics = _get_analytics_metrics_for_user(user)
     profile = get_or_create_profile_for_user(user)
-    type_choices = dict(MemoryBullet._meta.get_field("memory_type").choices)
-    type_summary = [
-        {"label": type_choices.get(d["memory_type"], str(d["memory_type"])), "count": d["count"]}
-        for d in metrics["type_distribution_raw"]
-    ]
+    snapshot = get_analytics_snapshot_for_user(user, profile=profile)
 
     session_group = (session_group or "month").strip().lower()
     if session_group not in {"day", "week", "month"}:
@@ -248,9 +392,21 @@ def get_analytics_dashboard_context_with_reports(user, session_group="month", me
         )
         .order_by("-group_value")
     )
+    grouped_counts = {row["group_value"]: row for row in grouped_sessions}
+    for row in (
+        ArchivedSession.objects
+        .filter(user=profile)
+        .annotate(group_value=session_group_field)
+        .values("group_value")
+        .annotate(session_count=Count("id"), message_count=Sum("message_count"))
+        .order_by()
+    ):
+        counts = grouped_counts.setdefault(row["group_value"], {"session_count": 0, "message_count": 0})
+        counts["session_count"] += row["session_count"]
+        counts["message_count"] += row["message_count"]
+
     session_grouped_rows = []
-    for row in grouped_sessions:
-        group_date = row["group_value"]
+    for group_date, row in sorted(grouped_counts.items(), key=lambda item: item[0], reverse=True):
         if session_group == "day":
             group_label = group_date.strftime("%Y-%m-%d")
         elif session_group == "week":
@@ -271,23 +427,7 @@ def get_analytics_dashboard_context_with_reports(user, session_group="month", me
 
     base_bullets = MemoryBullet.objects.filter(memory__user=profile)
     if memory_group == "memory_type":
-        grouped_bullets = (
-            base_bullets
-            .values("memory_type")
-            .annotate(
-                bullet_count=Count("id"),
-                avg_strength=Avg("strength"),
-            )
-            .order_by("memory_type")
-        )
-        memory_grouped_rows = [
-            {
-                "group_label": type_choices.get(row["memory_type"], str(row["memory_type"])),
-                "bullet_count": row["bullet_count"],
-                "avg_strength": row["avg_strength"],
-            }
-            for row in grouped_bullets
-        ]
+        memory_grouped_rows = snapshot.type_grouped_rows
     elif memory_group == "topic":
         grouped_bullets = (
             base_bullets
@@ -327,11 +467,12 @@ def get_analytics_dashboard_context_with_reports(user, session_group="month", me
         ]
 
     return {
-        "total_memories": metrics["total_memories"],
-        "total_sessions": metrics["total_sessions"],
-        "total_messages": metrics["total_messages"],
-        "avg_strength": metrics["avg_strength"],
-        "type_summary": type_summary,
+        "analytics_snapshot": snapshot,
+        "total_memories": snapshot.total_memories,
+        "total_sessions": snapshot.total_sessions,
+        "total_messages": snapshot.total_messages,
+        "avg_strength": snapshot.avg_strength,
+        "type_summary": snapshot.type_summary,
         "session_group": session_group,
         "memory_group": memory_group,
         "session_grouped_rows": session_grouped_rows,
@@ -350,17 +491,26 @@ def get_session_report_export_rows(user, q=""):
         .annotate(message_count=Count("messages"))
         .order_by("-created_at")
     )
+    archived_qs = ArchivedSession.objects.filter(user=profile).order_by("-created_at")
     if normalized_q:
         sessions_qs = sessions_qs.filter(title__icontains=normalized_q)
+        archived_qs = archived_qs.filter(title__icontains=normalized_q)
 
-    return [
+    # Lazy and chunked so exports stream in constant memory; archived sessions are merged in date order
+    fields = ("title", "created_at", "message_count")
+    return (
         {
-            "title": s.title,
-            "created_at": s.created_at.isoformat(),
-            "message_count": s.message_count,
+            "title": s["title"],
+            "created_at": s["created_at"].isoformat(),
+            "message_count": s["message_count"],
         }
-        for s in sessions_qs
-    ]
+        for s in heapq.merge(
+            sessions_qs.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            archived_qs.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            key=itemgetter("created_at"),
+            reverse=True,
+        )
+    )
 
 
 def get_memory_bullet_report_export_rows(user, q=""):
@@ -369,202 +519,54 @@ def get_memory_bullet_report_export_rows(user, q=""):
     bullets_qs = (
         MemoryBullet.objects
         .filter(memory__user=profile)
+        .only("content", "memory_type", "created_at")
         .order_by("-created_at")
     )
     if normalized_q:
-        bullets_qs = bullets_qs.filter(content__icontains=normalized_q)
+        bullets_qs = apply_memory_bullet_search(bullets_qs, normalized_q)
 
-    return [
+    return (
         {
             "content": b.content,
             "memory_type": b.get_memory_type_display(),
             "created_at": b.created_at.isoformat(),
         }
-        for b in bullets_qs
-    ]
-
-
-def _apply_chart_style(ax):
-    ax.set_facecolor(CHART_BG)
-    ax.tick_params(colors=CHART_MUTED, labelsize=9)
-    ax.yaxis.grid(True, color=CHART_GRID, linestyle="--", linewidth=0.8, alpha=0.7)
-    ax.set_axisbelow(True)
-    for spine in ("top", "right"):
-        ax.spines[spine].set_visible(False)
-    for spine in ("left", "bottom"):
-        ax.spines[spine].set_color(CHART_GRID)
-        ax.spines[spine].set_linewidth(1)
-
-
-def _render_chart_to_png(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
-
-
-def get_memory_type_chart_png(user):
-    profile = get_or_create_profile_for_user(user)
-    type_data = (
-        MemoryBullet.objects
-        .filter(memory__user=profile)
-        .values("memory_type")
-        .annotate(count=Count("id"))
-        .order_by("memory_type")
+        for b in bullets_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-    type_choices = dict(MemoryBullet._meta.get_field("memory_type").choices)
-    labels = [type_choices.get(d["memory_type"], str(d["memory_type"])) for d in type_data]
-    counts = [d["count"] for d in type_data]
-
-    fig, ax = plt.subplots(figsize=(7, 5))
-    if labels:
-        non_zero_count = sum(1 for c in counts if c > 0)
-        wedge_linewidth = 0 if non_zero_count <= 1 else 1.2
-        wedges, texts, autotexts = ax.pie(
-            counts,
-            labels=labels,
-            autopct="%1.1f%%",
-            colors=SEGMENT_COLORS[:len(labels)],
-            startangle=140,
-            wedgeprops={"linewidth": wedge_linewidth, "edgecolor": "#FFFFFF"},
-        )
-        for txt in texts:
-            txt.set_color(CHART_TEXT)
-            txt.set_fontsize(10)
-        for txt in autotexts:
-            txt.set_color("#FFFFFF")
-            txt.set_fontsize(9)
-            txt.set_fontweight("semibold")
-        ax.set_title("Memory Type Distribution", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
-        ax.legend(
-            wedges,
-            labels,
-            title="Memory Type",
-            loc="center left",
-            bbox_to_anchor=(1.02, 0.5),
-            frameon=False,
-            labelcolor=CHART_MUTED,
-        )
-    else:
-        ax.text(0.5, 0.5, "No memory data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis("off")
 
-    fig.patch.set_facecolor(CHART_BG)
-    return _render_chart_to_png(fig)
 
-
-def get_memory_strength_chart_png(user):
-    profile = get_or_create_profile_for_user(user)
-    strengths = list(
-        MemoryBullet.objects.filter(memory__user=profile).values_list("strength", flat=True)
-    )
-
-    buckets = {"0-20": 0, "21-40": 0, "41-60": 0, "61-80": 0, "81-100": 0}
-    for s in strengths:
-        if s <= 20:
-            buckets["0-20"] += 1
-        elif s <= 40:
-            buckets["21-40"] += 1
-        elif s <= 60:
-            buckets["41-60"] += 1
-        elif s <= 80:
-            buckets["61-80"] += 1
-        else:
-            buckets["81-100"] += 1
-
-    fig, ax = plt.subplots(figsize=(7, 5))
-    if strengths:
-        bars = ax.bar(
-            buckets.keys(),
-            buckets.values(),
-            color=PROGRESSIVE_COLORS,
-            edgecolor="#FFFFFF",
-            linewidth=1,
-        )
-        ax.set_title("Memory Strength Distribution", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
-        ax.set_xlabel("Strength Range", color=CHART_MUTED, fontsize=10)
-        ax.set_ylabel("Count", color=CHART_MUTED, fontsize=10)
-        _apply_chart_style(ax)
-        ax.bar_label(bars, padding=3, color=CHART_MUTED, fontsize=9)
-        ax.legend(
-            [bars[0]],
-            ["Memory bullets per strength range"],
-            loc="upper right",
-            frameon=False,
-            labelcolor=CHART_MUTED,
-        )
-    else:
-        ax.text(0.5, 0.5, "No memory data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis("off")
-
-    fig.patch.set_facecolor(CHART_BG)
-    return _render_chart_to_png(fig)
-
-
-def get_activity_chart_png(user):
+def get_api_memory_bullets_payload(
+    user, q="", memory_type="", topic="", strength_min="", mode="", sort="", cursor="", limit=API_MEMORIES_PAGE_SIZE
+):
+    limit = normalize_page_size(limit, API_MEMORIES_PAGE_SIZE, API_MAX_PAGE_SIZE)
     profile = get_or_create_profile_for_user(user)
-    thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-    daily = (
-        Session.objects.filter(user=profile, created_at__gte=thirty_days_ago)
-        .annotate(day=TruncDate("created_at"))
-        .values("day")
-        .annotate(count=Count("id"))
-        .order_by("day")
-    )
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    if daily:
-        days = [d["day"].strftime("%m/%d") for d in daily]
-        counts = [d["count"] for d in daily]
-        x = range(len(days))
-        ax.plot(
-            x,
-            counts,
-            marker="o",
-            color=PROGRESSIVE_COLORS[0],
-            linewidth=2.5,
-            markersize=5,
-            label="Sessions Created",
-        )
-        ax.fill_between(x, counts, alpha=0.22, color=PROGRESSIVE_COLORS[-1])
-        ax.set_xticks(x)
-        ax.set_xticklabels(days, rotation=45, ha="right", fontsize=8, color=CHART_MUTED)
-        ax.set_title("Conversation Activity (Last 30 Days)", fontsize=14, fontweight="bold", color=CHART_TEXT, pad=16)
-        ax.set_xlabel("Date", color=CHART_MUTED, fontsize=10)
-        ax.set_ylabel("Sessions Created", color=CHART_MUTED, fontsize=10)
-        max_count = max(counts)
-        ax.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-        ax.set_ylim(bottom=0, top=max_count + max(1, math.ceil(max_count * 0.15)))
-        _apply_chart_style(ax)
-        ax.legend(loc="upper left", frameon=False, labelcolor=CHART_MUTED)
-    else:
-        ax.text(0.5, 0.5, "No activity data yet", ha="center", va="center", fontsize=14, color=CHART_MUTED)
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis("off")
-
-    fig.patch.set_facecolor(CHART_BG)
-    fig.tight_layout()
-    return _render_chart_to_png(fig)
-
-
-def get_api_memory_bullets_payload(user, q="", memory_type="", topic="", strength_min="", limit=100):
-    bullets = _get_memory_bullets_queryset_for_user(user)
+    bullets = MemoryBullet.objects.select_related("memory").filter(memory__user=profile)
+    semantic = (mode or "").strip() == "semantic" and bool((q or "").strip())
+    if semantic:
+        bullets = apply_memory_bullet_similarity(bullets, profile.pk, q, k=limit)
     bullets = _apply_memory_bullet_filters(
         bullets,
-        q=q,
+        q="" if semantic else q,
         memory_type=memory_type,
         topic=topic,
         strength_min=strength_min,
     )
+    by_relevance = (sort or "").strip() == "relevance"
+    next_cursor = None
+    if by_relevance:
+        # Ranked modes return a single top-N page
+        page = list(apply_memory_bullet_relevance(bullets, limit=limit).order_by("-relevance", "-last_accessed"))
+    elif semantic:
+        page = list(bullets.order_by("-similarity", "-last_accessed")[:limit])
+    elif (q or "").strip():
+        # bm25 ranks shift as the corpus changes, so search pages by position
+        page, next_cursor = paginate_by_offset(bullets, ("-search_rank", "-id"), cursor=cursor, limit=limit)
+    else:
+        page, next_cursor = paginate_by_keyset(bullets, ("-last_accessed", "-id"), cursor=cursor, limit=limit)
 
-    data = [
-        {
+    data = []
+    for b in page:
+        row = {
             "id": b.id,
             "content": b.content,
             "memory_type": b.get_memory_type_display(),
@@ -575,27 +577,37 @@ def get_api_memory_bullets_payload(user, q="", memory_type="", topic="", strengt
             "created_at": b.created_at.isoformat(),
             "last_accessed": b.last_accessed.isoformat(),
         }
-        for b in bullets[:limit]
-    ]
-    return {"count": len(data), "results": data}
+        if semantic:
+            row["similarity"] = round(b.similarity, 4)
+        if by_relevance:
+            row["relevance"] = round(b.relevance, 4)
+        data.append(row)
+    return {"count": len(data), "results": data, "next": next_cursor}
 
 
 def get_api_analytics_summary_payload(user):
-    metrics = _get_analytics_metrics_for_user(user)
+    snapshot = get_analytics_snapshot_for_user(user)
     return {
-        "total_memories": metrics["total_memories"],
-        "total_sessions": metrics["total_sessions"],
-        "type_distribution": metrics["type_distribution_raw"],
-        "avg_strength": metrics["avg_strength"],
-        "total_helpful": metrics["total_helpful"],
-        "total_harmful": metrics["total_harmful"],
+        "total_memories": snapshot.total_memories,
+        "total_sessions": snapshot.total_sessions,
+        "type_distribution": snapshot.type_distribution_raw,
+        "avg_strength": snapshot.avg_strength,
+        "total_helpful": snapshot.total_helpful,
+        "total_harmful": snapshot.total_harmful,
     }
 
 
-def get_api_sessions_payload(user, q="", limit=50):
+def get_api_sessions_payload(user, q="", cursor="", limit=API_SESSIONS_PAGE_SIZE):
+    limit = normalize_page_size(limit, API_SESSIONS_PAGE_SIZE, API_MAX_PAGE_SIZE)
     sessions = _get_session_queryset_for_user(user)
+    # Archived sessions stay searchable; reading one serves it from the archive
+    archived_sessions = ArchivedSession.objects.filter(user_id=get_profile_id_for_user(user)).defer("messages")
     if q:
         sessions = sessions.filter(title__icontains=q.strip())
+        archived_sessions = archived_sessions.filter(title__icontains=q.strip())
+    page, next_cursor = paginate_merged_by_keyset(
+        [sessions, archived_sessions], ("-created_at", "-id"), cursor=cursor, limit=limit
+    )
     data = [
         {
             "id": s.id,
@@ -603,18 +615,19 @@ def get_api_sessions_payload(user, q="", limit=50):
             "created_at": s.created_at.isoformat(),
             "updated_at": s.updated_at.isoformat(),
             "url": s.get_absolute_url(),
+            "archived": isinstance(s, ArchivedSession),
         }
-        for s in sessions[:limit]
+        for s in page
     ]
-    return {"count": len(data), "results": data}
+    return {"count": len(data), "results": data, "next": next_cursor}
 
 
-def get_api_messages_payload(user, session_id, role_filter=""):
-    session = _get_session_or_404_for_user(user, session_id, with_messages=False)
+def get_api_messages_payload(user, session_id, role_filter="", cursor="", limit=API_MESSAGES_PAGE_SIZE):
+    limit = normalize_page_size(limit, API_MESSAGES_PAGE_SIZE, API_MAX_PAGE_SIZE)
+    session = _get_readable_session_or_404_for_user(user, session_id)
 
-    messages = session.messages.order_by("created_at")
-    if role_filter.strip().isdigit():
-        messages = messages.filter(role=int(role_filter.strip()))
+    roles = (int(role_filter.strip()),) if role_filter.strip().isdigit() else None
+    page, next_cursor = _paginate_session_messages(session, ("created_at", "id"), roles=roles, cursor=cursor, limit=limit)
 
     data = [
         {
@@ -623,34 +636,25 @@ def get_api_messages_payload(user, session_id, role_filter=""):
             "content": m.content,
             "created_at": m.created_at.isoformat(),
         }
-        for m in messages
+        for m in page
     ]
-    return {"session_id": session_id, "count": len(data), "messages": data}
+    return {"session_id": session_id, "count": len(data), "messages": data, "next": next_cursor}
 
 
 def get_api_daily_active_users_payload():
-    daily = list(
-        Message.objects
-        .annotate(day=TruncDate("created_at"))
-        .values("day")
-        .annotate(
-            active_users=Count("session__user_id", distinct=True),
-            message_count=Count("id"),
+    daily_map = {
+        row["day"]: row
+        for row in (
+            DailyActivity.objects
+            .filter(message_count__gt=0)
+            .order_by("day")
+            .values("day", "active_users", "message_count")
         )
-        .order_by("day")
-    )
+    }
 
-    if not daily:
+    if not daily_map:
         return {"count": 0, "results": []}
 
-    daily_map = {
-        row["day"]: {
-            "active_users": row["active_users"],
-            "message_count": row["message_count"],
-        }
-        for row in daily
-    }
-
     current_day = min(daily_map.keys())
     end_day = max(daily_map.keys())
     results = []
@@ -0,0 +1,161 @@
+import atexit
+import threading
+from datetime import timezone as dt_timezone
+
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .access_service import flush_memory_accesses
+from .chart_service import schedule_chart_prerender
+from .ingest_service import memory_bullet_content_key
+from .models import ExportJob, Memory, MemoryBullet, Message, Session
+from .retrieval_service import embed_memory_bullets, invalidate_vector_index, record_vector_changes
+from .service import flush_session_touches
+from .rollup_service import (
+    REFRESH_ACTIVITY,
+    REFRESH_BULLETS,
+    in_archived_session_deletes,
+    in_batched_bullet_deletes,
+    record_bullet_created,
+    record_message_created,
+    record_session_created,
+    rollup_day,
+    schedule_rollup_refresh,
+)
+
+# Bullet fields that feed the embedding text; saves touching none of them keep the stored vector
+EMBEDDED_BULLET_FIELDS = {"content", "topic", "concept"}
+
+# Parents currently being deleted; their cascaded children are refreshed in one pass by the parent handler
+_deleting = threading.local()
+
+
+def _deleting_ids(name):
+    if not hasattr(_deleting, name):
+        setattr(_deleting, name, set())
+    return getattr(_deleting, name)
+
+
+@receiver(post_save, sender=Session)
+def track_session_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_session_created(instance)
+        schedule_chart_prerender(instance.user_id)
+
+
+@receiver(request_finished)
+def flush_due_session_touches(sender, **kwargs):
+    # Free unless buffered touches are due, so every request can check
+    flush_session_touches(only_due=True)
+
+
+@receiver(request_finished)
+def flush_due_memory_accesses(sender, **kwargs):
+    flush_memory_accesses(only_due=True)
+
+
+# Touches and accesses still buffered when the worker shuts down are written on the way out
+atexit.register(flush_session_touches)
+atexit.register(flush_memory_accesses)
+
+
+@receiver(pre_delete, sender=Session)
+def collect_session_rollup_days(sender, instance, **kwargs):
+    if in_archived_session_deletes():
+        return
+    _deleting_ids("session_ids").add(instance.pk)
+    instance._rollup_days = {rollup_day(instance.created_at)} | {
+        value.date()
+        for value in instance.messages.datetimes("created_at", "day", tzinfo=dt_timezone.utc)
+    }
+
+
+@receiver(post_delete, sender=Session)
+def refresh_deleted_session_rollups(sender, instance, **kwargs):
+    if in_archived_session_deletes():
+        return
+    _deleting_ids("session_ids").discard(instance.pk)
+    for day in getattr(instance, "_rollup_days", {rollup_day(instance.created_at)}):
+        schedule_rollup_refresh(REFRESH_ACTIVITY, instance.user_id, day)
+    schedule_chart_prerender(instance.user_id)
+
+
+@receiver(post_save, sender=Message)
+def track_message_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_message_created(instance)
+
+
+@receiver(post_delete, sender=Message)
+def refresh_deleted_message_rollups(sender, instance, **kwargs):
+    if instance.session_id in _deleting_ids("session_ids") or in_archived_session_deletes():
+        return
+    profile_id = (
+        Session.objects.filter(pk=instance.session_id).values_list("user_id", flat=True).first()
+    )
+    if profile_id is not None:
+        schedule_rollup_refresh(REFRESH_ACTIVITY, profile_id, rollup_day(instance.created_at))
+
+
+@receiver(pre_delete, sender=Memory)
+def collect_memory_rollup_days(sender, instance, **kwargs):
+    _deleting_ids("memory_ids").add(instance.pk)
+    instance._rollup_days = {
+        value.date()
+        for value in instance.memorybullet_set.datetimes("created_at", "day", tzinfo=dt_timezone.utc)
+    }
+
+
+@receiver(post_delete, sender=Memory)
+def refresh_deleted_memory_rollups(sender, instance, **kwargs):
+    _deleting_ids("memory_ids").discard(instance.pk)
+    for day in getattr(instance, "_rollup_days", set()):
+        schedule_rollup_refresh(REFRESH_BULLETS, instance.user_id, day)
+    schedule_chart_prerender(instance.user_id)
+    # The cascaded bullets' vectors went with them; one reload is cheaper than listing their ids
+    invalidate_vector_index(instance.user_id)
+
+
+@receiver(pre_save, sender=MemoryBullet)
+def set_bullet_content_key(sender, instance, **kwargs):
+    # Keeps saves from any path findable by the bulk ingest de-duplication
+    instance.content_key = memory_bullet_content_key(instance.content)
+
+
+@receiver(post_save, sender=MemoryBullet)
+def track_bullet_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_bullet_created(instance)
+    else:
+        schedule_rollup_refresh(REFRESH_BULLETS, instance.memory.user_id, rollup_day(instance.created_at))
+    schedule_chart_prerender(instance.memory.user_id)
+
+
+@receiver(post_save, sender=MemoryBullet)
+def embed_saved_bullet(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created or update_fields is None or EMBEDDED_BULLET_FIELDS & set(update_fields):
+        embed_memory_bullets([instance])
+
+
+@receiver(post_delete, sender=MemoryBullet)
+def refresh_deleted_bullet_rollups(sender, instance, **kwargs):
+    if instance.memory_id in _deleting_ids("memory_ids") or in_batched_bullet_deletes():
+        return
+    profile_id = (
+        Memory.objects.filter(pk=instance.memory_id).values_list("user_id", flat=True).first()
+    )
+    if profile_id is not None:
+        schedule_rollup_refresh(REFRESH_BULLETS, profile_id, rollup_day(instance.created_at))
+        schedule_chart_prerender(profile_id)
+        record_vector_changes(profile_id, [instance.pk])
+
+
+@receiver(post_delete, sender=ExportJob)
+def delete_export_artifact(sender, instance, **kwargs):
+    if instance.artifact:
+        instance.artifact.delete(save=False)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import re
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from .models.message import Role
+from .service import recall_memory_bullets_for_turn, write_chat_turn
+
+# Shown to the user when the configured generator fails; nothing is stored in that case
+REPLY_ERROR_MESSAGE = "The reply could not be generated."
+
+_generator = None
+
+
+class StubReplyGenerator:
+    """
+    Stands in for a language model: streams a fixed reply a word at a time, optionally
+    pausing between tokens to mimic generation latency. Needs no network or model files.
+    """
+
+    def __init__(self, reply="Agent Response", token_delay=0.0):
+        self.reply = reply
+        self.token_delay = token_delay
+
+    async def stream(self, session, content, memories):
+        for token in re.findall(r"\S+\s*", self.reply):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+def get_reply_generator():
+    global _generator
+    backend = getattr(settings, "CHAT_REPLY_GENERATOR", "app.chat.streaming_service.StubReplyGenerator")
+    options = getattr(settings, "CHAT_REPLY_GENERATOR_OPTIONS", {})
+    key = (backend, tuple(sorted(options.items())))
+    if _generator is None or _generator[0] != key:
+        _generator = (key, import_string(backend)(**options))
+    return _generator[1]
+
+
+def format_sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def stream_chat_turn(session, content):
+    """
+    Yield Server-Sent Events for one chat turn: a token event per generated piece of
+    the reply, then done once the turn is stored, or error if generation fails. The
+    turn is written only after the reply is complete, so an aborted stream stores nothing.
+    """
+    memories = await sync_to_async(recall_memory_bullets_for_turn)(session, content)
+    parts = []
+    try:
+        async for token in get_reply_generator().stream(session, content, memories):
+            parts.append(token)
+            yield format_sse_event("token", {"text": token})
+    except Exception:
+        yield format_sse_event("error", {"message": REPLY_ERROR_MESSAGE})
+        return
+
+    reply = "".join(parts)
+    messages = await sync_to_async(write_chat_turn)(
+        session,
+        [(Role.USER, content), (Role.ASSISTANT, reply)],
+        accessed_bullets=memories,
+    )
+    yield format_sse_event("done", {"session_id": session.pk, "message_id": messages[-1].pk, "content": reply})
+
+
+async def _generate_reply(session, content, memories):
+    return "".join([token async for token in get_reply_generator().stream(session, content, memories)])
+
+
+def write_generated_chat_turn(session, content):
+    """
+    Generate the whole reply with the configured generator, then store the turn, for
+    clients that cannot read an event stream. A failing generator raises before
+    anything is written.
+    """
+    memories = recall_memory_bullets_for_turn(session, content)
+    reply = async_to_sync(_generate_reply)(session, content, memories)
+    return write_chat_turn(
+        session,
+        [(Role.USER, content), (Role.ASSISTANT, reply)],
+        accessed_bullets=memories,
+    )
+
+
+def build_sse_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stops nginx-style proxies from buffering the stream until it ends
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -7,6 +7,8 @@ app_name = "chat"
 page_urlpatterns = [
     path("memory/", views.MemoryListView.as_view(), name="memory"),
     path("c/<int:session_id>/", views.ConversationMessagesView.as_view(), name="conversation_detail"),
+    path("c/<int:session_id>/history/", views.conversation_history_view, name="conversation_history"),
+    path("c/<int:session_id>/stream/", views.conversation_stream_view, name="conversation_stream"),
     path("c/<int:session_id>/rename/", views.session_rename_view, name="session_rename"),
     path("c/<int:session_id>/delete/", views.session_delete_view, name="session_delete"),
     path("m/<int:memory_id>/", views.MemoryBulletsView.as_view(), name="memory_detail"),
@@ -14,8 +16,12 @@ page_urlpatterns = [
     path("analytics/memory-type.png", views.memory_type_chart_png, name="memory_type_chart"),
     path("analytics/memory-strength.png", views.memory_strength_chart_png, name="memory_strength_chart"),
     path("analytics/activity.png", views.activity_chart_png, name="activity_chart"),
+    path("analytics/<slug:chart_name>.svg", views.analytics_chart_svg, name="analytics_chart_svg"),
+    path("analytics/<slug:chart_name>.vl.json", views.analytics_chart_vega_spec, name="analytics_chart_vega"),
     path("analytics/export/sessions/", views.export_sessions_report, name="export_sessions_report"),
     path("analytics/export/memory-bullets/", views.export_memory_bullets_report, name="export_memory_bullets_report"),
+    path("analytics/export/jobs/<uuid:job_uuid>/", views.export_job_status, name="export_job_status"),
+    path("analytics/export/jobs/<uuid:job_uuid>/download/", views.export_job_download, name="export_job_download"),
     path(
         "charts/active-users/",
         views.vega_daily_users_chart_view,
@@ -30,6 +36,7 @@ page_urlpatterns = [
 
 api_urlpatterns = [
     path("api/memories/", api.api_memory_bullets, name="api_memories"),
+    path("api/memories/bulk/", api.api_memory_bullets_bulk, name="api_memories_bulk"),
     path("api/analytics/", api.api_analytics_summary, name="api_analytics"),
     path("api/sessions/", api.SessionAPIView.as_view(), name="api_sessions"),
     path("api/sessions/<int:session_id>/messages/", api.MessageAPIView.as_view(), name="api_messages"),
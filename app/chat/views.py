@@ -1,28 +1,51 @@
-import csv
-
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.utils.decorators import method_decorator
-from django.utils import timezone
 from django.views import View
 from django.views.decorators.http import require_http_methods
 from django.views.generic import DetailView, ListView
 
+from .chart_service import (
+    get_activity_chart_png,
+    get_chart_svg_for_user,
+    get_chart_vega_spec_for_user,
+    get_dashboard_chart_svgs,
+    get_dashboard_chart_urls,
+    get_memory_strength_chart_png,
+    get_memory_type_chart_png,
+)
+from .export_service import (
+    EXPORT_FORMATS,
+    build_export_filename,
+    build_streaming_export_response,
+    enqueue_export_job,
+    get_export_job_download_name,
+    get_export_job_for_user,
+    get_export_job_payload,
+    get_report_export_rows,
+    iter_report_export,
+)
 from .models import Memory, MemoryBullet
+from .models.export_job import ExportStatus
+from .models.message import Role
+from .pagination import InvalidCursorError
 from .service import (
-    create_user_message_with_agent_reply,
+    get_conversation_history_payload,
+    get_conversation_window_for_user,
     get_analytics_dashboard_context_with_reports,
     get_or_create_profile_for_user,
     get_memory_list_data,
-    get_memory_bullet_report_export_rows,
-    get_memory_strength_chart_png,
     get_memory_summary,
-    get_memory_type_chart_png,
-    get_activity_chart_png,
-    get_session_report_export_rows,
     get_session_for_user,
 )
+from .streaming_service import (
+    REPLY_ERROR_MESSAGE,
+    build_sse_response,
+    stream_chat_turn,
+    write_generated_chat_turn,
+)
 
 
 @method_decorator(login_required(login_url="/"), name="dispatch")
@@ -63,23 +86,31 @@ class MemoryListView(ListView):
 @method_decorator(login_required(login_url="/"), name="dispatch")
 class ConversationMessagesView(View):
     def get(self, request, session_id):
-        session = get_session_for_user(request.user, session_id, with_messages=True)
-        return render(request, "chat/conversation_detail.html", {"session": session})
+        context = get_conversation_window_for_user(request.user, session_id)
+        return render(request, "chat/conversation_detail.html", context)
 
     def post(self, request, session_id):
         session = get_session_for_user(request.user, session_id)
 
         content = (request.POST.get("message") or "").strip()
-        if content:
-            create_user_message_with_agent_reply(session, content)
-
-        if request.headers.get("x-requested-with") == "XMLHttpRequest":
-            if not content:
+        is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
+        if not content:
+            if is_ajax:
                 return JsonResponse({"error": "Empty message"}, status=400)
+            return redirect(session.get_absolute_url())
+
+        try:
+            messages = write_generated_chat_turn(session, content)
+        except Exception:
+            if not is_ajax:
+                raise
+            return JsonResponse({"error": REPLY_ERROR_MESSAGE}, status=502)
+
+        if is_ajax:
             return JsonResponse({
                 "messages": [
-                    {"role": "user", "content": content},
-                    {"role": "assistant", "content": "Agent Response"},
+                    {"role": "user" if message.role == Role.USER else "assistant", "content": message.content}
+                    for message in messages
                 ],
                 "session_id": session.pk,
             })
@@ -87,6 +118,33 @@ class ConversationMessagesView(View):
         return redirect(session.get_absolute_url())
 
 
+@login_required(login_url="/")
+@require_http_methods(["POST"])
+async def conversation_stream_view(request, session_id):
+    # Async so an ASGI worker holds no thread while the reply is generated
+    user = await request.auser()
+    session = await sync_to_async(get_session_for_user)(user, session_id)
+    content = (request.POST.get("message") or "").strip()
+    if not content:
+        return JsonResponse({"error": "Empty message"}, status=400)
+    return build_sse_response(stream_chat_turn(session, content))
+
+
+@login_required(login_url="/")
+@require_http_methods(["GET"])
+def conversation_history_view(request, session_id):
+    try:
+        payload = get_conversation_history_payload(
+            request.user,
+            session_id,
+            cursor=request.GET.get("cursor", ""),
+            limit=request.GET.get("limit", ""),
+        )
+    except InvalidCursorError as exc:
+        return JsonResponse({"error": "invalid_cursor", "message": str(exc)}, status=400)
+    return JsonResponse(payload)
+
+
 @method_decorator(login_required(login_url="/"), name="dispatch")
 class MemoryBulletsView(DetailView):
     model = Memory
@@ -129,6 +187,11 @@ def analytics_view(request):
         session_group=request.GET.get("session_group", "month"),
         memory_group=request.GET.get("memory_group", "memory_type"),
     )
+    context["chart_urls"] = get_dashboard_chart_urls()
+    # SVG charts are drawn from the page's snapshot rather than recomputing it in one request per image
+    context["chart_svgs"] = get_dashboard_chart_svgs(
+        get_or_create_profile_for_user(request.user), context["analytics_snapshot"]
+    )
     return render(request, "chat/analytics.html", context)
 
 
@@ -150,41 +213,29 @@ def activity_chart_png(request):
     return HttpResponse(get_activity_chart_png(request.user), content_type="image/png")
 
 
+@login_required(login_url="/")
 @require_http_methods(["GET"])
-def vega_daily_users_chart_view(request):
-    return render(request, "chat/vega_daily_users.html")
+def analytics_chart_svg(request, chart_name):
+    return HttpResponse(get_chart_svg_for_user(request.user, chart_name), content_type="image/svg+xml")
 
 
+@login_required(login_url="/")
 @require_http_methods(["GET"])
-def vega_daily_messages_chart_view(request):
-    return render(request, "chat/vega_daily_messages.html")
+def analytics_chart_vega_spec(request, chart_name):
+    return JsonResponse(get_chart_vega_spec_for_user(request.user, chart_name))
 
 
-def _build_export_filename(prefix, extension):
-    timestamp = timezone.localtime().strftime("%Y-%m-%d_%H-%M")
-    return f'{prefix}_{timestamp}.{extension}'
+@require_http_methods(["GET"])
+def vega_daily_users_chart_view(request):
+    return render(request, "chat/vega_daily_users.html")
 
 
-def _export_rows_response(rows, export_format, filename_prefix, csv_headers, csv_field_order, json_key):
-    if export_format == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{_build_export_filename(filename_prefix, "csv")}"'
-        writer = csv.writer(response)
-        writer.writerow(csv_headers)
-        for row in rows:
-            writer.writerow([row[field] for field in csv_field_order])
-        return response
+@require_http_methods(["GET"])
+def vega_daily_messages_chart_view(request):
+    return render(request, "chat/vega_daily_messages.html")
 
-    if export_format == "json":
-        payload = {
-            "generated_at": timezone.now().isoformat(),
-            "record_count": len(rows),
-            json_key: rows,
-        }
-        response = JsonResponse(payload, json_dumps_params={"indent": 2})
-        response["Content-Disposition"] = f'attachment; filename="{_build_export_filename(filename_prefix, "json")}"'
-        return response
 
+def _invalid_export_format_response():
     return JsonResponse(
         {
             "error": "invalid_format",
@@ -195,35 +246,72 @@ def _export_rows_response(rows, export_format, filename_prefix, csv_headers, csv
     )
 
 
-@login_required(login_url="/")
-@require_http_methods(["GET"])
-def export_sessions_report(request):
+def _export_report_response(request, report):
+    if request.method == "POST":
+        return _enqueue_export_job_response(request, report)
+
     export_format = (request.GET.get("format", "csv") or "csv").strip().lower()
     query = (request.GET.get("q", "") or "").strip()
-    rows = get_session_report_export_rows(request.user, q=query)
-    return _export_rows_response(
-        rows=rows,
-        export_format=export_format,
-        filename_prefix="sessions",
-        csv_headers=["title", "message_count", "created_at"],
-        csv_field_order=["title", "message_count", "created_at"],
-        json_key="sessions",
+    if export_format not in EXPORT_FORMATS:
+        return _invalid_export_format_response()
+
+    rows = get_report_export_rows(request.user, report, q=query)
+    return build_streaming_export_response(
+        request,
+        iter_report_export(rows, report, export_format),
+        EXPORT_FORMATS[export_format],
+        build_export_filename(report, export_format),
     )
 
 
+def _enqueue_export_job_response(request, report):
+    export_format = (request.POST.get("format", "csv") or "csv").strip().lower()
+    query = (request.POST.get("q", "") or "").strip()
+    if export_format not in EXPORT_FORMATS:
+        return _invalid_export_format_response()
+
+    job, _ = enqueue_export_job(request.user, report, export_format, q=query)
+    payload = get_export_job_payload(job)
+    response = JsonResponse(payload, status=202, json_dumps_params={"indent": 2})
+    response["Location"] = payload["status_url"]
+    return response
+
+
 @login_required(login_url="/")
-@require_http_methods(["GET"])
+@require_http_methods(["GET", "POST"])
+def export_sessions_report(request):
+    return _export_report_response(request, "sessions")
+
+
+@login_required(login_url="/")
+@require_http_methods(["GET", "POST"])
 def export_memory_bullets_report(request):
-    export_format = (request.GET.get("format", "csv") or "csv").strip().lower()
-    query = (request.GET.get("q", "") or "").strip()
-    rows = get_memory_bullet_report_export_rows(request.user, q=query)
-    return _export_rows_response(
-        rows=rows,
-        export_format=export_format,
-        filename_prefix="memory_bullets",
-        csv_headers=["content", "memory_type", "created_at"],
-        csv_field_order=["content", "memory_type", "created_at"],
-        json_key="memory_bullets",
-    )
+    return _export_report_response(request, "memory_bullets")
+
 
+@login_required(login_url="/")
+@require_http_methods(["GET"])
+def export_job_status(request, job_uuid):
+    job = get_export_job_for_user(request.user, job_uuid)
+    return JsonResponse(get_export_job_payload(job), json_dumps_params={"indent": 2})
 
+
+@login_required(login_url="/")
+@require_http_methods(["GET"])
+def export_job_download(request, job_uuid):
+    job = get_export_job_for_user(request.user, job_uuid)
+    if job.status != ExportStatus.SUCCEEDED or not job.artifact:
+        return JsonResponse(
+            {
+                "error": "export_not_ready",
+                "status": job.get_status_display().lower(),
+            },
+            status=409,
+            json_dumps_params={"indent": 2},
+        )
+    return FileResponse(
+        job.artifact.open("rb"),
+        as_attachment=True,
+        filename=get_export_job_download_name(job),
+        content_type=EXPORT_FORMATS[job.export_format],
+    )
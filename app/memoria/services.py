@@ -1,22 +1,16 @@
 from app.chat.models import Memory, Session
-from app.users.models import UserProfile as Profile
-
-
-def _get_or_create_profile_for_user(user):
-    profile, _ = Profile.objects.get_or_create(user=user)
-    return profile
+from app.users.services import get_or_create_profile_for_user, get_profile_id_for_user
 
 
 def get_home_context_for_user(user):
-    profile = _get_or_create_profile_for_user(user)
+    # The sidebar session list comes from the lazy, bounded user_sessions context processor
     return {
         "username": user.username,
-        "sessions": Session.objects.filter(user=profile).order_by("-created_at"),
-        "memories": Memory.objects.filter(user=profile).order_by("-updated_at"),
+        "memories": Memory.objects.filter(user_id=get_profile_id_for_user(user)).order_by("-updated_at"),
     }
 
 
 def create_home_session_for_user(user, content):
-    profile = _get_or_create_profile_for_user(user)
+    profile = get_or_create_profile_for_user(user)
     return Session.create_with_opening_exchange(profile, content)
 
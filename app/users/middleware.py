@@ -1,12 +1,22 @@
 from urllib.parse import unquote
 from zoneinfo import ZoneInfo
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from .services import get_or_create_profile_for_user
 
 
 class TimezoneMiddleware:
+    # Sets request state only, so it runs natively under ASGI as well as WSGI
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         timezone_name = request.COOKIES.get("user_tz")
@@ -20,3 +30,28 @@ class TimezoneMiddleware:
         else:
             timezone.deactivate()
         return self.get_response(request)
+
+
+def get_request_profile(request):
+    if not request.user.is_authenticated:
+        return None
+    return get_or_create_profile_for_user(request.user)
+
+
+class ProfileMiddleware:
+    """
+    Expose request.profile, resolved on first use and at most once per request.
+    The profile is also cached on request.user, so service functions handed
+    request.user reuse it instead of querying again.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_request_profile(request))
+        return self.get_response(request)
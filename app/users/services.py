@@ -1,3 +1,7 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth import login
 from django.contrib.auth.models import User as AuthUser
 from django.contrib.auth import authenticate
@@ -6,6 +10,11 @@ from django.core.validators import validate_email
 
 from .models import UserProfile
 
+# Auth user id -> profile id, least recently used first; a profile's id never changes once created
+_profile_ids = OrderedDict()
+_profile_ids_lock = threading.Lock()
+
+
 def validate_registration(username, email, password1, password2):
     errors = {}
     if not username:
@@ -71,9 +80,41 @@ def register_and_login(request, username, email, password1, password2):
     return user, None
 
 
+def _remember_profile_id(auth_user_id, profile_id):
+    with _profile_ids_lock:
+        _profile_ids[auth_user_id] = profile_id
+        _profile_ids.move_to_end(auth_user_id)
+        while len(_profile_ids) > getattr(settings, "PROFILE_ID_CACHE_SIZE", 10000):
+            _profile_ids.popitem(last=False)
+
+
+def forget_profile_id(auth_user_id):
+    with _profile_ids_lock:
+        _profile_ids.pop(auth_user_id, None)
+
+
 def get_or_create_profile_for_user(user):
+    # Reuse the profile already resolved on this user object (request.user lives for the whole request)
+    related = AuthUser.profile.related
+    if related.is_cached(user) and related.get_cached_value(user) is not None:
+        return related.get_cached_value(user)
+
     profile, _ = UserProfile.objects.get_or_create(user=user)
     if not profile.display_name:
         profile.display_name = user.username
         profile.save(update_fields=["display_name"])
+    related.set_cached_value(user, profile)
+    _remember_profile_id(user.pk, profile.pk)
     return profile
+
+
+def get_profile_id_for_user(user):
+    related = AuthUser.profile.related
+    if related.is_cached(user) and related.get_cached_value(user) is not None:
+        return related.get_cached_value(user).pk
+    with _profile_ids_lock:
+        profile_id = _profile_ids.get(user.pk)
+        if profile_id is not None:
+            _profile_ids.move_to_end(user.pk)
+            return profile_id
+    return get_or_create_profile_for_user(user).pk
@@ -6,9 +6,11 @@ import requests
 from allauth.account.signals import user_signed_up
 from django.contrib.auth.models import User as AuthUser
 from django.core.files.base import ContentFile
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
 from .models import UserProfile
+from .services import forget_profile_id
 
 
 def _build_avatar_filename(picture_url):
@@ -95,3 +97,8 @@ def sync_google_avatar_on_signup(request, user, sociallogin=None, **kwargs):
     profile = _sync_google_user_names(user, sociallogin.account.extra_data or {})
     picture_url = sociallogin.account.extra_data.get("picture")
     _save_google_avatar(profile, picture_url)
+
+
+@receiver(post_delete, sender=UserProfile)
+def forget_deleted_profile_id(sender, instance, **kwargs):
+    forget_profile_id(instance.user_id)
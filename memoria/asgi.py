@@ -2,6 +2,8 @@
 ASGI config for memoria project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. uvicorn) to stream chat replies without
+holding a worker thread per conversation.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -12,5 +14,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "memoria.settings")
+# Persistent connections are not safe under ASGI: sync_to_async threads open connections
+# that the request signals never close, so close them after every request instead
+os.environ["DATABASE_CONN_MAX_AGE"] = "0"
 
 application = get_asgi_application()
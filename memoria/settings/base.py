@@ -59,6 +59,7 @@ MIDDLEWARE = [
     "app.users.middleware.TimezoneMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "app.users.middleware.ProfileMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -104,14 +105,136 @@ WSGI_APPLICATION = "memoria.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Run on every new SQLite connection. WAL lets readers keep going while a gunicorn worker
+# writes; synchronous=NORMAL is durable in WAL mode and skips an fsync per commit;
+# busy_timeout makes a blocked writer wait for the lock instead of raising "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+# Seconds a worker keeps its database connection between requests (0 closes it after each request);
+# memoria/asgi.py forces 0, since Django advises against persistent connections under ASGI
+DATABASE_CONN_MAX_AGE = env.int("DATABASE_CONN_MAX_AGE", default=60)
+
+
+def sqlite_database(name, pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    return {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {pragma}={value}" for pragma, value in pragmas.items()),
+            # Take the write lock at BEGIN, so two transactions never both read and then
+            # deadlock upgrading to a write, which SQLite fails instantly without waiting
+            "transaction_mode": "IMMEDIATE",
+        },
     }
+
+
+DATABASES = {
+    "default": sqlite_database(BASE_DIR / "db.sqlite3"),
 }
 
 
+# Auth user id -> profile id entries kept per process so id-only lookups skip the profile query
+PROFILE_ID_CACHE_SIZE = 10000
+# Cache used for the public chat API response bodies; point it at a shared backend (e.g. Redis) in production
+CHAT_API_CACHE_ALIAS = "default"
+# Seconds public chat API responses may be reused by clients before revalidating
+CHAT_PUBLIC_API_MAX_AGE = 60
+# Cache holding rendered analytics PNGs, keyed by user and a fingerprint of the charted data
+CHAT_CHART_CACHE_ALIAS = "default"
+CHAT_CHART_CACHE_TTL = 60 * 60 * 24
+# Re-render a user's PNG charts in a background thread pool after their data changes, when the dashboard embeds PNGs
+CHAT_CHART_PRERENDER = True
+CHAT_CHART_RENDER_WORKERS = 2
+# Chart format embedded in the analytics dashboard: "svg" (no matplotlib) or "png"
+CHAT_DASHBOARD_CHART_FORMAT = "svg"
+# Gzip streamed report exports for clients that send Accept-Encoding: gzip
+CHAT_EXPORT_GZIP = True
+# Seconds before a running export job is presumed abandoned and handed to another worker
+CHAT_EXPORT_JOB_TIMEOUT = 60 * 30
+# Days finished export jobs and their files are kept before the worker deletes them
+CHAT_EXPORT_JOB_RETENTION_DAYS = 7
+# Dotted path to the memory bullet embedding model and its constructor arguments; any class with
+# name, dimensions and embed(texts) -> (len(texts), dimensions) array works
+CHAT_EMBEDDING_BACKEND = "app.chat.retrieval_service.HashingEmbedder"
+CHAT_EMBEDDING_OPTIONS = {"dimensions": 256}
+# Users whose vectors are kept in memory per process, and seconds before a cached index is reloaded anyway
+CHAT_VECTOR_INDEX_CACHE_SIZE = 16
+CHAT_VECTOR_INDEX_MAX_AGE = 300
+# Cache holding the per-user index generation counters and changed-bullet logs; point it at a shared backend with several workers
+CHAT_VECTOR_INDEX_CACHE_ALIAS = "default"
+# Users with at least this many vectors get an IVF index; queries score only the nearest CHAT_VECTOR_ANN_PROBES lists
+CHAT_VECTOR_ANN_MIN_ROWS = 20000
+CHAT_VECTOR_ANN_PROBES = 16
+# Cosine similarity a bullet must exceed to be returned by semantic retrieval
+CHAT_VECTOR_MIN_SIMILARITY = 0.0
+# Dotted path to the assistant reply generator streamed over SSE and its constructor arguments; any
+# class with an async stream(session, content, memories) generator of text pieces works
+CHAT_REPLY_GENERATOR = "app.chat.streaming_service.StubReplyGenerator"
+CHAT_REPLY_GENERATOR_OPTIONS = {}
+# Days for an unaccessed memory bullet's strength to halve (0 disables decay)
+CHAT_MEMORY_DECAY_HALF_LIFE_DAYS = 90
+# Bullets per sweep transaction, and seconds to sleep between write batches so chat writes get the lock
+CHAT_MEMORY_SWEEP_BATCH_SIZE = 500
+CHAT_MEMORY_SWEEP_PAUSE_SECONDS = 0.0
+# Days a session may sit untouched before archive_idle_sessions moves it to cold storage (0 disables archiving)
+CHAT_ARCHIVE_IDLE_DAYS = 180
+# Sessions moved to the archive per transaction
+CHAT_ARCHIVE_BATCH_SIZE = 100
+# Bullets accepted per bulk ingest request, and bullets written per ingest transaction
+CHAT_BULK_INGEST_MAX_ITEMS = 10000
+CHAT_BULK_INGEST_BATCH_SIZE = 500
+# Estimated Jaccard similarity of shingled content at which bullets with the same topic are merged
+CHAT_DEDUPE_THRESHOLD = 0.8
+# Merge new bullets into near-duplicates as part of each bulk ingest
+CHAT_DEDUPE_ON_INGEST = True
+# Bullets merged per de-duplication transaction
+CHAT_DEDUPE_BATCH_SIZE = 500
+# Memory bullets recalled for each chat turn (0 disables recall), and the cosine similarity a bullet must
+# exceed to be recalled and marked accessed; unrelated texts score up to about 0.1 with the hashing embedder
+CHAT_REPLY_MEMORY_TOP_K = 5
+CHAT_REPLY_MEMORY_MIN_SIMILARITY = 0.15
+# Sessions listed in the sidebar
+CHAT_SIDEBAR_SESSION_LIMIT = 30
+# Messages rendered with a conversation page and fetched per scroll-back request
+CHAT_CONVERSATION_PAGE_SIZE = 50
+# Seconds session updated_at touches wait in the write-behind buffer for one coalesced UPDATE (0 writes each with its turn)
+CHAT_SESSION_TOUCH_BUFFER_SECONDS = 0
+# Pending session touches that force a write-behind flush before the window ends
+CHAT_SESSION_TOUCH_BUFFER_SIZE = 500
+# Seconds memory access events (last_accessed, access_clock) wait in the write-behind buffer, which bounds what a crash loses (0 writes each with its turn)
+CHAT_MEMORY_ACCESS_BUFFER_SECONDS = 5
+# Pending bullet accesses that force a write-behind flush before the window ends
+CHAT_MEMORY_ACCESS_BUFFER_SIZE = 1000
+# Weights of the sort=relevance signals, the recency half-life in days, and the fewest candidates SQL hands to the re-ranker
+CHAT_RELEVANCE_WEIGHTS = {"text": 0.4, "strength": 0.2, "recency": 0.2, "affect": 0.1, "access": 0.1}
+CHAT_RELEVANCE_HALF_LIFE_DAYS = 30
+CHAT_RELEVANCE_MIN_CANDIDATES = 200
+
+# Nager.Date holiday API client; cached responses live in the HolidayCacheEntry table
+HOLIDAY_API_BASE = env("HOLIDAY_API_BASE", default="https://date.nager.at/api/v3")
+# Seconds before holidays for the current or a future year are revalidated (past years never expire)
+HOLIDAY_CACHE_TTL = 60 * 60 * 24
+HOLIDAY_REGIONS_CACHE_TTL = 60 * 60 * 24 * 7
+# Seconds an unsupported country code is remembered
+HOLIDAY_NEGATIVE_CACHE_TTL = 60 * 60 * 24
+# Seconds past expiry an entry is still served while it is refreshed in the background
+HOLIDAY_STALE_TTL = 60 * 60 * 24 * 30
+# Parallel upstream fetches (and pooled keep-alive connections) per holiday request
+HOLIDAY_MAX_WORKERS = 4
+# Seconds allowed for a single upstream call, and for all upstream calls of one request combined
+HOLIDAY_REQUEST_TIMEOUT = 5
+HOLIDAY_REQUEST_BUDGET = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
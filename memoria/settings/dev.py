@@ -5,8 +5,5 @@ DEBUG = True
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'data' / 'test_db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'data' / 'test_db.sqlite3'),
 }
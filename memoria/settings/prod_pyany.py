@@ -9,10 +9,7 @@ CSRF_TRUSTED_ORIGINS = ["https://<your-username>.pythonanywhere.com"]
 CORS_ALLOWED_ORIGINS = ["https://vega.github.io"]
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'data' / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'data' / 'db.sqlite3'),
 }
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
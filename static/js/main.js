@@ -445,9 +445,119 @@ function initSearchModal() {
     window.closeSearchModal = close
 }
 
+function buildMessageRow(role, content) {
+    const row = document.createElement("div")
+    row.className = `message-row ${role === "user" ? "is-user" : "is-agent"}`
+
+    const bubble = document.createElement("div")
+    bubble.className = `message-bubble ${role === "user" ? "bubble-user" : "bubble-agent"}`
+    bubble.textContent = content
+    row.appendChild(bubble)
+    return row
+}
+
+function jumpScroll(container, top) {
+    // The container scrolls smoothly by default; position changes here must not animate
+    container.style.scrollBehavior = "auto"
+    container.scrollTop = top
+    container.style.scrollBehavior = ""
+}
+
+function parseServerSentEvent(frame) {
+    let name = "message"
+    const data = []
+    frame.split("\n").forEach(line => {
+        if (line.startsWith("event:")) name = line.slice(6).trim()
+        else if (line.startsWith("data:")) data.push(line.slice(5).trimStart())
+    })
+    return { name, data: data.length ? JSON.parse(data.join("\n")) : null }
+}
+
+async function streamReply(url, formData, csrfToken, onToken) {
+    // EventSource cannot POST, so the event stream is read from a fetch body instead
+    const response = await fetch(url, {
+        method: "POST",
+        headers: { "Accept": "text/event-stream", "X-CSRFToken": csrfToken },
+        body: formData
+    })
+    if (!response.ok || !response.body) throw new Error(`Stream failed with ${response.status}`)
+
+    // Past this point the server may store the turn, so callers must not resend the message
+    const openedError = (message) => Object.assign(new Error(message), { streamOpened: true })
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ""
+    while (true) {
+        let chunk
+        try {
+            chunk = await reader.read()
+        } catch (error) {
+            throw openedError("The connection was lost before the reply finished")
+        }
+        const { value, done } = chunk
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        let boundary
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const event = parseServerSentEvent(buffer.slice(0, boundary))
+            buffer = buffer.slice(boundary + 2)
+            if (event.name === "token") onToken(event.data.text)
+            else if (event.name === "error") throw openedError(event.data.message)
+            else if (event.name === "done") return event.data
+        }
+    }
+    throw openedError("The connection was lost before the reply finished")
+}
+
+function initConversationHistory() {
+    const container = document.querySelector(".conversation-messages")
+    if (!container) return
+
+    // The page renders only the newest messages; open at the bottom like a chat
+    jumpScroll(container, container.scrollHeight)
+
+    const historyUrl = container.dataset.historyUrl
+    let cursor = container.dataset.olderCursor
+    if (!historyUrl || !cursor) return
+    let loading = false
+
+    const loadOlder = async () => {
+        if (loading || !cursor) return
+        loading = true
+        try {
+            const response = await fetch(`${historyUrl}?cursor=${encodeURIComponent(cursor)}`, {
+                headers: { "X-Requested-With": "XMLHttpRequest" }
+            })
+            if (!response.ok) {
+                cursor = null
+                return
+            }
+            const data = await response.json()
+            const fragment = document.createDocumentFragment()
+            data.messages.forEach(item => fragment.appendChild(buildMessageRow(item.role, item.content)))
+            const previousHeight = container.scrollHeight
+            container.prepend(fragment)
+            // Keep the message the reader was looking at in place
+            jumpScroll(container, container.scrollTop + container.scrollHeight - previousHeight)
+            cursor = data.next
+        } catch (error) {
+            cursor = null
+        } finally {
+            loading = false
+        }
+    }
+
+    container.addEventListener("scroll", () => {
+        if (container.scrollTop < 200) loadOlder()
+    })
+    // A short first window may not fill the viewport, so there would be nothing to scroll
+    if (container.scrollHeight <= container.clientHeight) loadOlder()
+}
+
 document.addEventListener("DOMContentLoaded", () => {
     initSidebar()
     initSearchModal()
+    initConversationHistory()
 
     const conversationScroll = document.querySelector(".conversation-messages")
     const form = document.querySelector(".conversation-input")
@@ -456,14 +566,54 @@ document.addEventListener("DOMContentLoaded", () => {
         const csrf = form.querySelector('input[name="csrfmiddlewaretoken"]')
 
         const appendMessage = (role, content) => {
-            const row = document.createElement("div")
-            row.className = `message-row ${role === "user" ? "is-user" : "is-agent"}`
-
-            const bubble = document.createElement("div")
-            bubble.className = `message-bubble ${role === "user" ? "bubble-user" : "bubble-agent"}`
-            bubble.textContent = content
-            row.appendChild(bubble)
+            const row = buildMessageRow(role, content)
             conversationScroll.appendChild(row)
+            return row
+        }
+
+        const scrollToBottom = () => {
+            conversationScroll.scrollTo({
+                top: conversationScroll.scrollHeight,
+                behavior: "smooth"
+            })
+        }
+
+        const moveConversationToTop = (sessionId) => {
+            const list = document.getElementById("conversations-list")
+            const item = document.querySelector(`.conversation-item[data-id="${sessionId}"]`)
+            if (list && item) {
+                const timeEl = item.querySelector(".conversation-time")
+                if (timeEl) {
+                    timeEl.textContent = "Just now"
+                }
+                list.prepend(item)
+            }
+        }
+
+        const sendStreaming = async (message, formData) => {
+            const userRow = appendMessage("user", message)
+            const agentRow = appendMessage("assistant", "")
+            const bubble = agentRow.querySelector(".message-bubble")
+            scrollToBottom()
+            try {
+                const done = await streamReply(form.dataset.streamUrl, formData, csrf ? csrf.value : "", (text) => {
+                    bubble.textContent += text
+                    jumpScroll(conversationScroll, conversationScroll.scrollHeight)
+                })
+                input.value = ""
+                if (done && done.session_id) moveConversationToTop(done.session_id)
+                return true
+            } catch (error) {
+                if (error.streamOpened) {
+                    // The turn may already be stored, so report the failure instead of sending it again
+                    bubble.textContent = error.message
+                    return true
+                }
+                // The stream never opened, so nothing was stored and the plain request below is safe to send
+                userRow.remove()
+                agentRow.remove()
+                return false
+            }
         }
 
         form.addEventListener("submit", async (event) => {
@@ -475,6 +625,9 @@ document.addEventListener("DOMContentLoaded", () => {
             try {
                 const formData = new FormData(form)
                 formData.set("message", message)
+                if (form.dataset.streamUrl && window.ReadableStream && await sendStreaming(message, formData)) {
+                    return
+                }
                 const response = await fetch(form.action || window.location.href, {
                     method: "POST",
                     headers: {
@@ -483,6 +636,14 @@ document.addEventListener("DOMContentLoaded", () => {
                     },
                     body: formData
                 })
+                if (response.status === 502) {
+                    // The reply generator failed and nothing was stored
+                    const data = await response.json()
+                    appendMessage("user", message)
+                    appendMessage("assistant", data.error)
+                    scrollToBottom()
+                    return
+                }
                 if (!response.ok) {
                     form.submit()
                     return
@@ -490,21 +651,10 @@ document.addEventListener("DOMContentLoaded", () => {
                 const data = await response.json()
                 if (Array.isArray(data.messages)) {
                     data.messages.forEach(item => appendMessage(item.role, item.content))
-                    conversationScroll.scrollTo({
-                        top: conversationScroll.scrollHeight,
-                        behavior: "smooth"
-                    })
+                    scrollToBottom()
                     input.value = ""
                     if (data.session_id) {
-                        const list = document.getElementById("conversations-list")
-                        const item = document.querySelector(`.conversation-item[data-id="${data.session_id}"]`)
-                        if (list && item) {
-                            const timeEl = item.querySelector(".conversation-time")
-                            if (timeEl) {
-                                timeEl.textContent = "Just now"
-                            }
-                            list.prepend(item)
-                        }
+                        moveConversationToTop(data.session_id)
                     }
                 }
             } catch (error) {
@@ -1,7 +1,22 @@
 import argparse
+import csv
+import gzip
+import io
+import json
+import math
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
+import time
+import types
+import asyncio
 import django
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.etree import ElementTree
 from unittest.mock import patch
 import requests
 
@@ -9,40 +24,117 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "memoria.settings.development")
 django.setup()
 
-from django.contrib.auth.models import User as AuthUser
+from datetime import timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import AnonymousUser, User as AuthUser
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
 from django.http import Http404
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from app.chat.models import Session, Message, Memory, MemoryBullet
+from app.chat.models import (
+    AnalyticsRollup,
+    ArchivedSession,
+    HolidayCacheEntry,
+    Memory,
+    MemoryBullet,
+    MemoryBulletEmbedding,
+    Message,
+    Session,
+)
 from app.chat.models.message import Role
 from app.chat.models.memory_bullet import MemoryType
 from app.chat.service import (
     create_home_session_for_user,
     create_user_message_with_agent_reply,
-    get_activity_chart_png,
+    flush_session_touches,
     get_analytics_dashboard_context,
+    get_conversation_history_payload,
+    get_conversation_window_for_user,
+    get_analytics_snapshot_for_user,
     get_api_analytics_summary_payload,
+    get_api_daily_active_users_payload,
     get_api_memory_bullets_payload,
     get_api_messages_payload,
     get_api_sessions_payload,
     get_home_context_for_user,
+    get_memory_bullet_report_export_rows,
     get_memory_list_data,
-    get_memory_strength_chart_png,
     get_memory_summary,
-    get_memory_type_chart_png,
     get_session_for_user,
+    get_session_report_export_rows,
     get_sidebar_sessions_for_user,
 )
+from app.chat.chart_service import (
+    CHARTS,
+    get_activity_chart_png,
+    get_chart_png_for_profile,
+    get_chart_svg_for_user,
+    get_chart_vega_spec_for_user,
+    get_dashboard_chart_svgs,
+    get_dashboard_chart_urls,
+    get_memory_strength_chart_png,
+    get_memory_type_chart_png,
+    prerender_charts_for_profile,
+)
+from app.chat.management.commands.benchmark_chat_writes import run_chat_write_benchmark
+from app.chat.access_service import flush_memory_accesses, record_memory_accesses
+from app.chat.archive_service import archive_idle_sessions
+from app.chat.dedupe_service import dedupe_memory_bullets, find_near_duplicate_clusters
+from app.chat.ingest_service import ingest_memory_bullets, memory_bullet_content_key
+from app.chat.lifecycle_service import sweep_memory_bullets
+from app.chat.ranking_service import rank_memory_bullets
+from app.chat.streaming_service import StubReplyGenerator
+from app.chat import chart_service, retrieval_service
+from app.chat.retrieval_service import (
+    VECTOR_DTYPE,
+    VectorIndex,
+    get_similar_memory_bullet_ids,
+    search_similar_memory_bullets,
+)
 from app.chat.holiday_service import (
     HolidayAPIUnavailableError,
     InvalidHolidayCountryCodeError,
+    _fetch_available_regions,
+    _get_cached_payload,
+    _get_cached_payloads,
+    _public_holidays_spec,
+    _regions_spec,
     get_daily_activity_with_holidays_payload,
 )
+from app.users.middleware import ProfileMiddleware
+from app.users.models import UserProfile
 from app.users.services import (
     create_user_with_profile,
+    forget_profile_id,
     get_or_create_profile_for_user,
+    get_profile_id_for_user,
     validate_registration,
 )
+from app.chat.api import api_memory_bullets, api_memory_bullets_bulk, api_public_daily_active_users
+from app.chat.context_processors import user_sessions
+from app.chat.pagination import InvalidCursorError
+from app.chat.views import (
+    ConversationMessagesView,
+    analytics_chart_svg,
+    conversation_history_view,
+    export_job_download,
+    export_job_status,
+    export_memory_bullets_report,
+    export_sessions_report,
+)
+from app.chat.search_service import apply_memory_bullet_search, rebuild_memory_bullet_search_index
+from app.chat.export_service import claim_next_export_job, delete_expired_export_jobs, run_export_job
+from app.chat.models import ExportJob
+from app.chat.models.export_job import ExportStatus
+from app.chat.http_cache import invalidate_public_api_cache
+from app.chat.rollup_service import compact_daily_activity, rebuild_analytics_rollups, verify_analytics_rollups
 from unit_test.mock_data import cleanup_all_test_data, create_all_test_data
 
 
@@ -262,6 +354,26 @@ def test_analytics_services(data):
             "type_summary has valid labels",
         )
 
+    print("\n  --- get_analytics_snapshot_for_user ---")
+    snapshot = get_analytics_snapshot_for_user(maria_auth)
+    summary = get_memory_summary(maria_auth, snapshot=snapshot)
+    failures += assert_test(
+        snapshot.total_memories == MemoryBullet.objects.filter(memory__user__user=maria_auth).count(),
+        "Snapshot total_memories matches bullet count",
+    )
+    failures += assert_test(
+        snapshot.total_messages == Message.objects.filter(session__user__user=maria_auth).count(),
+        "Snapshot total_messages matches message count",
+    )
+    failures += assert_test(
+        sum(item["count"] for item in summary["type_summary"]) == snapshot.total_memories,
+        "Snapshot type counts add up to total_memories",
+    )
+    failures += assert_test(
+        get_api_analytics_summary_payload(maria_auth)["type_distribution"] == snapshot.type_distribution_raw,
+        "API summary shares the snapshot type distribution",
+    )
+
     return failures
 
 
@@ -289,6 +401,63 @@ def test_chart_generation(data):
     empty_chart = get_memory_type_chart_png(empty_auth)
     failures += assert_test(empty_chart[:4] == png_header, "Empty user chart still returns valid PNG")
 
+    print("\n  --- Rendered chart cache ---")
+    maria_profile = data["profiles"][0]
+
+    def fail_render(chart_data):
+        raise AssertionError("chart should have been served from cache")
+
+    with patch.dict(CHARTS, {"memory-type": (CHARTS["memory-type"][0], fail_render)}):
+        failures += assert_test(
+            get_memory_type_chart_png(maria_auth) == type_chart,
+            "Unchanged data serves the cached PNG without re-rendering",
+        )
+
+    def add_bullet(content):
+        return MemoryBullet.objects.create(
+            memory=data["memories"][0],
+            content=content,
+            memory_type=MemoryType.PROCEDURAL,
+            topic="Charts",
+            ttl_days=30,
+            strength=55,
+        )
+
+    with override_settings(CHAT_CHART_PRERENDER=False):
+        bullet = add_bullet("Chart cache invalidation bullet")
+        failures += assert_test(
+            get_chart_png_for_profile(maria_profile, "memory-type", render_missing=False) is None,
+            "Data change moves the chart to a new fingerprint",
+        )
+        failures += assert_test(
+            prerender_charts_for_profile(maria_profile) >= 2
+            and get_chart_png_for_profile(maria_profile, "memory-type", render_missing=False)[:4] == png_header,
+            "Pre-render fills the cache for changed charts",
+        )
+        bullet.delete()
+        with patch(
+            "app.chat.chart_service.compute_analytics_snapshot", wraps=chart_service.compute_analytics_snapshot
+        ) as compute:
+            prerender_charts_for_profile(maria_profile)
+        failures += assert_test(compute.call_count == 1, "Pre-render computes the analytics snapshot once per pass")
+
+    with patch("app.chat.chart_service._get_executor") as executor:
+        add_bullet("SVG dashboard bullet").delete()
+    failures += assert_test(not executor.called, "Nothing is pre-rendered while the dashboard serves SVG")
+
+    with override_settings(CHAT_DASHBOARD_CHART_FORMAT="png"):
+        bullet = add_bullet("Background pre-render bullet")
+        deadline = time.monotonic() + 30
+        prerendered = None
+        while prerendered is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+            prerendered = get_chart_png_for_profile(maria_profile, "memory-strength", render_missing=False)
+        failures += assert_test(
+            prerendered is not None and prerendered[:4] == png_header,
+            "Background workers re-render charts after data changes",
+        )
+        bullet.delete()
+
     return failures
 
 
@@ -503,18 +672,25 @@ def test_holiday_merge_service(data):
             ])
         return MockResponse([])
 
-    with patch("app.chat.holiday_service.requests.get", side_effect=mock_get_success):
+    HolidayCacheEntry.objects.all().delete()
+
+    with patch("app.chat.holiday_service.requests.Session.get", side_effect=mock_get_success):
         payload = get_daily_activity_with_holidays_payload(country_code="US")
         failures += assert_test("results" in payload and "analytics" in payload, "Holiday payload has results and analytics")
 
-    with patch("app.chat.holiday_service.requests.get", side_effect=mock_get_success):
+    with patch("app.chat.holiday_service.requests.Session.get", side_effect=mock_get_success):
         try:
             get_daily_activity_with_holidays_payload(country_code="ZZ")
             failures += assert_test(False, "Invalid country code should raise error")
         except InvalidHolidayCountryCodeError:
             failures += assert_test(True, "Invalid country code raises InvalidHolidayCountryCodeError")
 
-    with patch("app.chat.holiday_service.requests.get", side_effect=requests.RequestException("network down")):
+    with patch("app.chat.holiday_service.requests.Session.get", side_effect=requests.RequestException("network down")):
+        warm_payload = get_daily_activity_with_holidays_payload(country_code="US")
+        failures += assert_test(warm_payload == payload, "Warm cache serves holidays while the API is down")
+
+    HolidayCacheEntry.objects.all().delete()
+    with patch("app.chat.holiday_service.requests.Session.get", side_effect=requests.RequestException("network down")):
         try:
             get_daily_activity_with_holidays_payload(country_code="US")
             failures += assert_test(False, "Unavailable API should raise error")
@@ -524,6 +700,1971 @@ def test_holiday_merge_service(data):
     return failures
 
 
+def test_analytics_rollups(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP J: Analytics Rollups")
+    print("=" * 60)
+    failures = 0
+
+    maria_auth = data["auth_users"][0]
+    maria_profile = data["profiles"][0]
+
+    failures += assert_test(verify_analytics_rollups([maria_profile.id]) == [], "Rollups match raw data after setup")
+
+    print("\n  --- Incremental maintenance ---")
+    before = get_memory_summary(maria_auth)
+    session = create_home_session_for_user(maria_auth, "Rollup tracking session")
+    create_user_message_with_agent_reply(session, "Another turn")
+    memory = data["memories"][0]
+    bullet = MemoryBullet.objects.create(
+        memory=memory,
+        content="Rollup tracked bullet",
+        memory_type=MemoryType.EPISODIC,
+        topic="Rollups",
+        ttl_days=30,
+        strength=95,
+        helpful_count=2,
+    )
+    failures += assert_test(verify_analytics_rollups([maria_profile.id]) == [], "Creates keep rollups in sync")
+
+    after = get_memory_summary(maria_auth)
+    failures += assert_test(after["total_count"] == before["total_count"] + 1, "Summary counts the new bullet")
+    failures += assert_test(after["max_strength"] == max(before["max_strength"] or 0, 95), "Summary max_strength includes the new bullet")
+
+    bullet.memory_type = MemoryType.PROCEDURAL
+    bullet.strength = 10
+    bullet.save()
+    failures += assert_test(verify_analytics_rollups([maria_profile.id]) == [], "Bullet update keeps rollups in sync")
+
+    bullet.delete()
+    session.delete()
+    failures += assert_test(verify_analytics_rollups([maria_profile.id]) == [], "Deletes keep rollups in sync")
+    failures += assert_test(get_memory_summary(maria_auth) == before, "Summary returns to its original state")
+
+    print("\n  --- Daily activity table ---")
+
+    def raw_daily_activity():
+        return {
+            row["day"].isoformat(): (row["active_users"], row["message_count"])
+            for row in (
+                Message.objects
+                .annotate(day=TruncDate("created_at", tzinfo=dt_timezone.utc))
+                .values("day")
+                .annotate(active_users=Count("session__user_id", distinct=True), message_count=Count("id"))
+            )
+        }
+
+    def served_daily_activity():
+        return {
+            row["date"]: (row["active_users"], row["message_count"])
+            for row in get_api_daily_active_users_payload()["results"]
+            if row["message_count"]
+        }
+
+    compact_daily_activity()
+    failures += assert_test(served_daily_activity() == raw_daily_activity(), "Daily activity matches raw messages")
+
+    session = create_home_session_for_user(data["auth_users"][1], "Daily activity tracking")
+    create_user_message_with_agent_reply(session, "Second turn")
+    failures += assert_test(served_daily_activity() == raw_daily_activity(), "New messages update daily activity")
+
+    session.delete()
+    compact_daily_activity()
+    failures += assert_test(served_daily_activity() == raw_daily_activity(), "Compaction reconciles deleted messages")
+
+    return failures
+
+
+def test_public_api_http_caching(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP K: Public API HTTP Caching")
+    print("=" * 60)
+    failures = 0
+
+    factory = RequestFactory()
+    url = "/chat/api/active-users/"
+
+    first = api_public_daily_active_users(factory.get(url))
+    etag = first.get("ETag")
+    failures += assert_test(first.status_code == 200 and etag, "First response is 200 with an ETag")
+    failures += assert_test("max-age" in first.get("Cache-Control", ""), "Response carries Cache-Control max-age")
+    failures += assert_test(first.has_header("Last-Modified"), "Response carries Last-Modified")
+
+    revalidated = api_public_daily_active_users(factory.get(url, HTTP_IF_NONE_MATCH=etag))
+    failures += assert_test(revalidated.status_code == 304, "Matching If-None-Match returns 304")
+
+    since = api_public_daily_active_users(factory.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]))
+    failures += assert_test(since.status_code == 304, "Unchanged If-Modified-Since returns 304")
+
+    cached = api_public_daily_active_users(factory.get(url))
+    failures += assert_test(cached.content == first.content, "Repeated request serves the same body")
+
+    session = create_home_session_for_user(data["auth_users"][1], "Cache invalidation check")
+    changed = api_public_daily_active_users(factory.get(url, HTTP_IF_NONE_MATCH=etag))
+    failures += assert_test(
+        changed.status_code == 200 and changed.get("ETag") != etag,
+        "New messages change the ETag and return fresh data",
+    )
+    session.delete()
+
+    current = api_public_daily_active_users(factory.get(url))["ETag"]
+    invalidate_public_api_cache()
+    failures += assert_test(
+        api_public_daily_active_users(factory.get(url))["ETag"] != current,
+        "Explicit invalidation changes the ETag",
+    )
+
+    return failures
+
+
+class _StubHolidayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requested_paths = []
+    client_ports = []
+    delay = 0
+
+    def do_GET(self):
+        _StubHolidayHandler.requested_paths.append(self.path)
+        _StubHolidayHandler.client_ports.append(self.client_address[1])
+        time.sleep(_StubHolidayHandler.delay)
+        if self.path.endswith("/AvailableCountries"):
+            body = [{"countryCode": "US", "name": "United States"}]
+        elif "/PublicHolidays/" in self.path and self.path.endswith("/US"):
+            year = self.path.split("/")[-2]
+            body = [{"date": f"{year}-01-01", "name": "New Year's Day", "localName": "New Year's Day"}]
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        encoded = json.dumps(body).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up after its request budget ran out
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_holiday_cache(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP L: Holiday Cache (local stub server)")
+    print("=" * 60)
+    failures = 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHolidayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_base = f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    requested = _StubHolidayHandler.requested_paths
+    HolidayCacheEntry.objects.all().delete()
+
+    try:
+        with override_settings(HOLIDAY_API_BASE=stub_base):
+            requested.clear()
+            cold = get_daily_activity_with_holidays_payload(country_code="US")
+            failures += assert_test(len(requested) >= 2, "Cold cache fetches regions and holidays from the stub")
+
+            requested.clear()
+            warm = get_daily_activity_with_holidays_payload(country_code="US")
+            failures += assert_test(warm == cold and requested == [], "Warm cache makes zero outbound requests")
+
+            past_keys = [
+                entry.key for entry in HolidayCacheEntry.objects.filter(key__startswith="holidays:US:", expires_at__isnull=True)
+            ]
+            current_key = f"holidays:US:{timezone.now().year}"
+            failures += assert_test(
+                all(key != current_key for key in past_keys),
+                "Only past years are cached without expiry",
+            )
+
+            for _ in range(2):
+                try:
+                    get_daily_activity_with_holidays_payload(country_code="ZZ")
+                except InvalidHolidayCountryCodeError:
+                    pass
+            failures += assert_test(
+                HolidayCacheEntry.objects.filter(key="invalid-country:ZZ", is_negative=True).exists()
+                and not any("ZZ" in path for path in requested),
+                "Unknown country codes are negatively cached without upstream calls",
+            )
+
+            HolidayCacheEntry.objects.filter(key="regions").update(expires_at=timezone.now() - timedelta(minutes=1))
+            requested.clear()
+            stale = _get_cached_payload("regions", _fetch_available_regions, 60)
+            for thread in threading.enumerate():
+                if thread.name == "holiday-revalidate-regions":
+                    thread.join(timeout=5)
+            refreshed = HolidayCacheEntry.objects.get(key="regions")
+            failures += assert_test(
+                stale == refreshed.payload and refreshed.is_fresh(timezone.now()),
+                "Stale entries are served and revalidated in the background",
+            )
+
+            requested.clear()
+            _StubHolidayHandler.client_ports.clear()
+            for _ in range(2):
+                HolidayCacheEntry.objects.filter(key="regions").delete()
+                _get_cached_payload("regions", _fetch_available_regions, 60)
+            failures += assert_test(
+                len(_StubHolidayHandler.client_ports) == 2 and len(set(_StubHolidayHandler.client_ports)) == 1,
+                "Sequential fetches reuse one pooled keep-alive connection",
+            )
+
+            HolidayCacheEntry.objects.all().delete()
+            _StubHolidayHandler.delay = 0.3
+            specs = {"regions": _regions_spec()}
+            for year in (2023, 2024, 2025):
+                specs[f"holidays:US:{year}"] = _public_holidays_spec("US", year)
+            started = time.monotonic()
+            payloads, errors = _get_cached_payloads(specs)
+            elapsed = time.monotonic() - started
+            failures += assert_test(
+                not errors and set(payloads) == set(specs) and elapsed < 0.3 * len(specs) * 0.75,
+                "Region list and every year are fetched concurrently",
+            )
+
+            HolidayCacheEntry.objects.all().delete()
+            _StubHolidayHandler.delay = 1.0
+            with override_settings(HOLIDAY_REQUEST_BUDGET=0.3):
+                started = time.monotonic()
+                payloads, errors = _get_cached_payloads(specs)
+                elapsed = time.monotonic() - started
+            failures += assert_test(
+                set(errors) == set(specs) and elapsed < 0.9,
+                "Overall request budget bounds a slow upstream",
+            )
+            _StubHolidayHandler.delay = 0
+            get_daily_activity_with_holidays_payload(country_code="US")
+    finally:
+        _StubHolidayHandler.delay = 0
+        server.shutdown()
+        server.server_close()
+
+    with override_settings(HOLIDAY_API_BASE=stub_base):
+        HolidayCacheEntry.objects.update(expires_at=timezone.now() - timedelta(days=365))
+        outage = get_daily_activity_with_holidays_payload(country_code="US")
+        failures += assert_test(outage == cold, "Expired cache still answers during an upstream outage")
+
+    return failures
+
+
+def test_chart_formats(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP M: SVG and Vega-Lite Chart Backends")
+    print("=" * 60)
+    failures = 0
+
+    maria_auth = data["auth_users"][0]
+    empty_auth = data["auth_users"][5]
+    snapshot = get_analytics_snapshot_for_user(maria_auth)
+
+    print("\n  --- SVG output ---")
+    for chart_name in CHARTS:
+        for label, user in (("populated", maria_auth), ("empty", empty_auth)):
+            svg = get_chart_svg_for_user(user, chart_name)
+            try:
+                root = ElementTree.fromstring(svg)
+                well_formed = root.tag.endswith("svg")
+            except ElementTree.ParseError:
+                well_formed = False
+            failures += assert_test(well_formed, f"{chart_name} SVG is well-formed ({label} user)")
+
+    failures += assert_test(
+        "No memory data yet" in get_chart_svg_for_user(empty_auth, "memory-type"),
+        "Empty SVG chart shows the placeholder message",
+    )
+
+    print("\n  --- Vega-Lite specs ---")
+    type_spec = get_chart_vega_spec_for_user(maria_auth, "memory-type")
+    failures += assert_test(
+        type_spec["$schema"].endswith("vega-lite/v5.json")
+        and sum(row["count"] for row in type_spec["data"]["values"]) == snapshot.total_memories,
+        "Memory type spec carries the snapshot counts",
+    )
+    strength_spec = get_chart_vega_spec_for_user(maria_auth, "memory-strength")
+    failures += assert_test(
+        [row["strength_range"] for row in strength_spec["data"]["values"]]
+        == [label for label, _ in snapshot.strength_buckets],
+        "Strength spec keeps the bucket order",
+    )
+
+    print("\n  --- Views and dashboard wiring ---")
+    factory = RequestFactory()
+    request = factory.get("/chat/analytics/memory-type.svg")
+    request.user = maria_auth
+    response = analytics_chart_svg(request, "memory-type")
+    failures += assert_test(
+        response.status_code == 200 and response["Content-Type"] == "image/svg+xml",
+        "SVG endpoint serves image/svg+xml",
+    )
+    try:
+        get_chart_svg_for_user(maria_auth, "unknown")
+        failures += assert_test(False, "Unknown chart should raise Http404")
+    except Http404:
+        failures += assert_test(True, "Unknown chart raises Http404")
+
+    failures += assert_test(
+        all(url.endswith(".svg") for url in get_dashboard_chart_urls().values()),
+        "Dashboard embeds SVG charts by default",
+    )
+    with override_settings(CHAT_DASHBOARD_CHART_FORMAT="png"):
+        failures += assert_test(
+            all(url.endswith(".png") for url in get_dashboard_chart_urls().values()),
+            "Dashboard can be switched back to PNG charts",
+        )
+    with patch("app.chat.chart_service.compute_analytics_snapshot") as compute:
+        inline_svgs = get_dashboard_chart_svgs(data["profiles"][0], snapshot)
+    failures += assert_test(
+        set(inline_svgs) == set(get_dashboard_chart_urls())
+        and all(svg.startswith("<svg") for svg in inline_svgs.values())
+        and not compute.called,
+        "Dashboard draws inline SVGs from the page's snapshot",
+    )
+    with override_settings(CHAT_DASHBOARD_CHART_FORMAT="png"):
+        failures += assert_test(
+            get_dashboard_chart_svgs(data["profiles"][0], snapshot) == {},
+            "PNG dashboards keep embedding charts by URL",
+        )
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, django; django.setup(); import app.chat.urls, app.chat.chart_service; "
+            "print('matplotlib' in sys.modules)",
+        ],
+        cwd=repo_root,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [repo_root, os.environ.get("PYTHONPATH")]))},
+        capture_output=True,
+        text=True,
+    )
+    failures += assert_test(
+        probe.returncode == 0 and probe.stdout.strip().endswith("False"),
+        "Loading the chat app does not import matplotlib",
+    )
+
+    return failures
+
+
+def test_streaming_exports(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP N: Streaming Report Exports")
+    print("=" * 60)
+    failures = 0
+
+    maria_auth = data["auth_users"][0]
+    maria_profile = data["profiles"][0]
+    factory = RequestFactory()
+
+    def export(view, **params):
+        headers = params.pop("headers", {})
+        request = factory.get("/chat/analytics/export/", params, headers=headers)
+        request.user = maria_auth
+        return view(request)
+
+    tricky = MemoryBullet.objects.create(
+        memory=data["memories"][0],
+        content='Quote " comma, and\nnewline',
+        memory_type=MemoryType.SEMANTIC,
+        topic="Exports",
+        ttl_days=30,
+        strength=50,
+    )
+    bullet_count = MemoryBullet.objects.filter(memory__user=maria_profile).count()
+
+    print("\n  --- Lazy row sources ---")
+    failures += assert_test(
+        isinstance(get_memory_bullet_report_export_rows(maria_auth), types.GeneratorType)
+        and isinstance(get_session_report_export_rows(maria_auth), types.GeneratorType),
+        "Export rows are produced lazily",
+    )
+
+    print("\n  --- CSV ---")
+    response = export(export_memory_bullets_report, format="csv")
+    body = b"".join(response.streaming_content).decode()
+    rows = list(csv.reader(io.StringIO(body)))
+    failures += assert_test(response.streaming and response["Content-Type"] == "text/csv", "CSV export is streamed")
+    failures += assert_test(
+        rows[0] == ["content", "memory_type", "created_at"] and len(rows) == bullet_count + 1,
+        "CSV export has a header and one row per bullet",
+    )
+    failures += assert_test(
+        any(row[0] == tricky.content for row in rows[1:]),
+        "CSV export escapes quotes, commas and newlines",
+    )
+
+    print("\n  --- JSON ---")
+    response = export(export_sessions_report, format="json")
+    payload = json.loads(b"".join(response.streaming_content))
+    session_count = Session.objects.filter(user=maria_profile).count()
+    failures += assert_test(
+        response.streaming and payload["record_count"] == len(payload["sessions"]) == session_count,
+        "JSON export streams a valid document with matching record_count",
+    )
+    failures += assert_test(
+        set(payload["sessions"][0]) == {"title", "created_at", "message_count"},
+        "JSON export rows keep their fields",
+    )
+    empty = json.loads(b"".join(export(export_sessions_report, format="json", q="no-such-title").streaming_content))
+    failures += assert_test(empty["record_count"] == 0 and empty["sessions"] == [], "Empty JSON export is valid")
+
+    print("\n  --- Gzip ---")
+    plain = b"".join(export(export_memory_bullets_report, format="json").streaming_content)
+    compressed = export(export_memory_bullets_report, format="json", headers={"Accept-Encoding": "gzip, deflate"})
+    inflated = gzip.decompress(b"".join(compressed.streaming_content))
+    failures += assert_test(
+        compressed["Content-Encoding"] == "gzip"
+        and json.loads(inflated)["record_count"] == json.loads(plain)["record_count"],
+        "Gzip export decompresses to the same document",
+    )
+    failures += assert_test(
+        export(export_memory_bullets_report, format="xml").status_code == 400,
+        "Unknown export format returns 400",
+    )
+
+    tricky.delete()
+    return failures
+
+
+def test_export_jobs(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP O: Background Export Jobs")
+    print("=" * 60)
+    failures = 0
+
+    maria_auth = data["auth_users"][0]
+    maria_profile = data["profiles"][0]
+    other_auth = data["auth_users"][1]
+    factory = RequestFactory()
+    media_root = tempfile.mkdtemp(prefix="mira-exports-")
+    ExportJob.objects.all().delete()
+
+    def as_user(request, user):
+        request.user = user
+        return request
+
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            print("\n  --- Enqueue and poll ---")
+            response = export_sessions_report(
+                as_user(factory.post("/chat/analytics/export/sessions/", {"format": "csv"}), maria_auth)
+            )
+            queued = json.loads(response.content)
+            failures += assert_test(
+                response.status_code == 202 and queued["status"] == "pending" and response["Location"] == queued["status_url"],
+                "POST to an export URL queues a job and returns 202",
+            )
+            again = json.loads(export_sessions_report(
+                as_user(factory.post("/chat/analytics/export/sessions/", {"format": "csv"}), maria_auth)
+            ).content)
+            failures += assert_test(again["id"] == queued["id"], "Re-requesting a queued export reuses the job")
+
+            early = export_job_download(as_user(factory.get("/"), maria_auth), queued["id"])
+            failures += assert_test(early.status_code == 409, "Download before completion returns 409")
+
+            export_memory_bullets_report(
+                as_user(factory.post("/chat/analytics/export/memory-bullets/", {"format": "json"}), maria_auth)
+            )
+
+            print("\n  --- Worker ---")
+            claimed = claim_next_export_job()
+            failures += assert_test(
+                claimed is not None and str(claimed.uuid) == queued["id"] and claimed.status == ExportStatus.RUNNING,
+                "Worker claims the oldest pending job",
+            )
+            run_export_job(claimed)
+            output = io.StringIO()
+            call_command("run_export_worker", "--once", stdout=output)
+            failures += assert_test(
+                "Processed 1 export job(s)." in output.getvalue() and claim_next_export_job() is None,
+                "Worker command drains the queue and exits with --once",
+            )
+
+            status = json.loads(export_job_status(as_user(factory.get("/"), maria_auth), queued["id"]).content)
+            session_count = Session.objects.filter(user=maria_profile).count()
+            failures += assert_test(
+                status["status"] == "succeeded" and status["record_count"] == session_count and status["download_url"],
+                "Finished job reports its row count and download URL",
+            )
+            download = export_job_download(as_user(factory.get("/"), maria_auth), queued["id"])
+            rows = list(csv.reader(io.StringIO(b"".join(download.streaming_content).decode())))
+            failures += assert_test(
+                download.status_code == 200 and len(rows) == session_count + 1
+                and "attachment" in download["Content-Disposition"],
+                "Artifact downloads as the full CSV report",
+            )
+            bullets_job = ExportJob.objects.get(user=maria_profile, report="memory_bullets")
+            with bullets_job.artifact.open("rb") as handle:
+                bullet_payload = json.load(handle)
+            failures += assert_test(
+                bullet_payload["record_count"] == len(bullet_payload["memory_bullets"]) == bullets_job.record_count,
+                "JSON artifact is a complete export document",
+            )
+
+            try:
+                export_job_status(as_user(factory.get("/"), other_auth), queued["id"])
+                failures += assert_test(False, "Other users should not see the job")
+            except Http404:
+                failures += assert_test(True, "Other users cannot see the job")
+
+            print("\n  --- Recovery and cleanup ---")
+            stuck = ExportJob.objects.create(user=maria_profile, report="sessions", export_format="json")
+            ExportJob.objects.filter(pk=stuck.pk).update(
+                status=ExportStatus.RUNNING,
+                started_at=timezone.now() - timedelta(hours=2),
+            )
+            reclaimed = claim_next_export_job()
+            failures += assert_test(reclaimed is not None and reclaimed.pk == stuck.pk, "Abandoned running jobs are reclaimed")
+            run_export_job(reclaimed)
+
+            broken = ExportJob.objects.create(user=maria_profile, report="unknown", export_format="csv")
+            failures += assert_test(
+                run_export_job(broken).status == ExportStatus.FAILED and broken.error,
+                "Failing jobs are marked failed with an error",
+            )
+
+            artifact_name = ExportJob.objects.get(uuid=queued["id"]).artifact.name
+            ExportJob.objects.update(finished_at=timezone.now() - timedelta(days=30))
+            deleted = delete_expired_export_jobs()
+            failures += assert_test(
+                deleted == 4 and not ExportJob.objects.exists() and not default_storage.exists(artifact_name),
+                "Expired jobs are deleted together with their files",
+            )
+    finally:
+        ExportJob.objects.all().delete()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+    return failures
+
+
+def test_memory_bullet_search(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP P: Memory Bullet Full-Text Search")
+    print("=" * 60)
+    failures = 0
+
+    maria_auth = data["auth_users"][0]
+    memory = data["memories"][0]
+
+    def add_bullet(content, topic="Search", concept=None):
+        return MemoryBullet.objects.create(
+            memory=memory,
+            content=content,
+            memory_type=MemoryType.SEMANTIC,
+            topic=topic,
+            concept=concept,
+            ttl_days=30,
+            strength=40,
+        )
+
+    def search_ids(q):
+        return [b["id"] for b in get_api_memory_bullets_payload(maria_auth, q=q)["results"]]
+
+    dense = add_bullet("Zebra zebra zebra")
+    sparse = add_bullet("A zebra appeared somewhere within this much longer and wordier sentence")
+    conceptual = add_bullet("Unrelated wording", topic="Physics", concept="Quantum entanglement notes")
+
+    if connection.vendor == "sqlite":
+        failures += assert_test(
+            "chat_memorybullet_fts" in connection.introspection.table_names(),
+            "SQLite FTS5 table exists",
+        )
+
+    print("\n  --- Matching ---")
+    failures += assert_test(search_ids("zeb")[:2] == [dense.id, sparse.id], "Prefix search ranks denser matches first")
+    failures += assert_test(search_ids("zebra sentence") == [sparse.id], "All terms must match")
+    failures += assert_test(
+        search_ids("entangle") == [conceptual.id] and search_ids("physics") == [conceptual.id],
+        "Concept and topic are searchable",
+    )
+    failures += assert_test(
+        all(isinstance(b.search_rank, float) for b in apply_memory_bullet_search(MemoryBullet.objects.all(), "zebra")),
+        "Search results carry a search_rank",
+    )
+    failures += assert_test(
+        [row["content"] for row in get_memory_bullet_report_export_rows(maria_auth, q="zebra")].count(dense.content) == 1,
+        "Export rows use the search index",
+    )
+    failures += assert_test(
+        get_memory_list_data(maria_auth, search_query="%%")["queryset"].count() == 0,
+        "Punctuation-only queries fall back to substring search",
+    )
+
+    print("\n  --- Index maintenance ---")
+    dense.content = "Giraffe giraffe"
+    dense.save()
+    failures += assert_test(
+        dense.id not in search_ids("zebra") and search_ids("giraffe") == [dense.id],
+        "Updates are reflected in the index",
+    )
+    sparse.delete()
+    failures += assert_test(search_ids("zebra") == [], "Deletes are removed from the index")
+    rebuild_memory_bullet_search_index()
+    failures += assert_test(search_ids("giraffe") == [dense.id], "Rebuilding the index keeps results intact")
+
+    dense.delete()
+    conceptual.delete()
+    return failures
+
+
+def test_memory_bullet_retrieval(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP Q: Semantic Memory Bullet Retrieval")
+    print("=" * 60)
+    failures = 0
+
+    memory = data["memories"][0]
+    owner = memory.user
+    other_memory = next(m for m in data["memories"] if m.user_id != owner.id)
+    created = []
+
+    def add_bullet(content, target=memory, topic="Retrieval"):
+        bullet = MemoryBullet.objects.create(
+            memory=target,
+            content=content,
+            memory_type=MemoryType.SEMANTIC,
+            topic=topic,
+            ttl_days=30,
+            strength=40,
+        )
+        created.append(bullet)
+        return bullet
+
+    hiking = add_bullet("Loves hiking in the mountains every weekend", topic="Outdoors")
+    coffee = add_bullet("Drinks black coffee without sugar", topic="Food")
+    foreign = add_bullet("Also loves hiking in the mountains", target=other_memory, topic="Outdoors")
+
+    print("\n  --- Embedding storage ---")
+    embedding = MemoryBulletEmbedding.objects.get(bullet=hiking)
+    failures += assert_test(
+        embedding.user_id == owner.id and len(bytes(embedding.vector)) == embedding.dimensions * 4,
+        "Saving a bullet stores a float32 vector blob for its owner",
+    )
+    vector = np.frombuffer(bytes(embedding.vector), dtype=VECTOR_DTYPE)
+    failures += assert_test(abs(float(np.linalg.norm(vector)) - 1.0) < 1e-5, "Stored vectors are L2-normalized")
+
+    print("\n  --- Top-k search ---")
+    results = search_similar_memory_bullets(owner.id, "hiking mountains", k=3)
+    failures += assert_test(results and results[0].id == hiking.id, "Closest bullet is ranked first")
+    failures += assert_test(foreign.id not in [b.id for b in results], "Other users' bullets are never returned")
+    failures += assert_test(coffee.id not in [b.id for b in results], "Unrelated bullets are not returned")
+    failures += assert_test(
+        all(0 < b.similarity <= 1.0001 for b in results),
+        "Results carry a cosine similarity",
+    )
+    failures += assert_test(search_similar_memory_bullets(owner.id, "   ", k=3) == [], "Blank queries return nothing")
+
+    coffee.content = "Goes hiking with friends near the mountains"
+    coffee.save()
+    failures += assert_test(
+        coffee.id in [b.id for b in search_similar_memory_bullets(owner.id, "hiking mountains", k=5)],
+        "Edited bullets are re-embedded and the index refreshed",
+    )
+    coffee.delete()
+    created.remove(coffee)
+    failures += assert_test(
+        coffee.id not in [bullet_id for bullet_id, _ in get_similar_memory_bullet_ids(owner.id, "hiking mountains", k=5)]
+        and not MemoryBulletEmbedding.objects.filter(bullet_id=coffee.id).exists(),
+        "Deleted bullets leave the index",
+    )
+
+    print("\n  --- Incremental index updates ---")
+    get_similar_memory_bullet_ids(owner.id, "hiking mountains", k=1)
+    with patch("app.chat.retrieval_service._load_vector_index", wraps=retrieval_service._load_vector_index) as loader:
+        chess = add_bullet("Plays chess on rainy evenings", topic="Games")
+        found = get_similar_memory_bullet_ids(owner.id, "chess on rainy evenings", k=1)
+        failures += assert_test(
+            found and found[0][0] == chess.id and not loader.called,
+            "A saved bullet is patched into the loaded index instead of reloading it",
+        )
+        chess.delete()
+        created.remove(chess)
+        found = get_similar_memory_bullet_ids(owner.id, "chess on rainy evenings", k=5)
+        failures += assert_test(
+            chess.id not in [bullet_id for bullet_id, _ in found] and not loader.called,
+            "A deleted bullet is patched out of the loaded index",
+        )
+    batch = [add_bullet(f"Batch deleted fact {i}") for i in range(5)]
+    with CaptureQueriesContext(connection) as queries:
+        MemoryBullet.objects.filter(pk__in=[bullet.pk for bullet in batch]).delete()
+    failures += assert_test(
+        not [q for q in queries.captured_queries if q["sql"].startswith("SELECT") and "chat_memorybulletembedding" in q["sql"]],
+        "Cascaded deletes remove vectors without loading them",
+    )
+    for bullet in batch:
+        created.remove(bullet)
+
+    print("\n  --- Callers ---")
+    auth_user = owner.user
+    page_ids = [b.id for b in get_memory_list_data(auth_user, search_query="mountain hiking", sort_key="similar")["queryset"]]
+    failures += assert_test(page_ids and page_ids[0] == hiking.id, "Memory page sort=similar ranks by similarity")
+    api_rows = get_api_memory_bullets_payload(auth_user, q="weekend hikes", mode="semantic")["results"]
+    failures += assert_test(
+        api_rows and api_rows[0]["id"] == hiking.id and "similarity" in api_rows[0],
+        "API mode=semantic returns similarity-ranked bullets",
+    )
+    # Accesses recorded by the calls above are still buffered; write them before measuring
+    flush_memory_accesses()
+    clock_before = Memory.objects.get(pk=memory.pk).access_clock
+    session = Session.objects.create(user=owner, title="Retrieval test")
+    create_user_message_with_agent_reply(session, "Any hiking plans in the mountains?")
+    flush_memory_accesses()
+    failures += assert_test(
+        Memory.objects.get(pk=memory.pk).access_clock == clock_before + 1,
+        "Chat replies recall memories and count the access",
+    )
+    create_user_message_with_agent_reply(session, "What is the weather like today?")
+    flush_memory_accesses()
+    failures += assert_test(
+        Memory.objects.get(pk=memory.pk).access_clock == clock_before + 1,
+        "Unrelated messages recall nothing and leave access counts alone",
+    )
+    session.delete()
+
+    print("\n  --- ANN index ---")
+    rng = np.random.default_rng(7)
+    centers = rng.standard_normal((40, 64)).astype(np.float32)
+    matrix = centers[rng.integers(0, 40, size=4000)] + 0.3 * rng.standard_normal((4000, 64)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = np.arange(4000, dtype=np.int64)
+    exact = VectorIndex(ids, matrix, 0)
+    with override_settings(CHAT_VECTOR_ANN_MIN_ROWS=1000, CHAT_VECTOR_ANN_PROBES=8):
+        approximate = VectorIndex(ids, matrix, 0)
+        failures += assert_test(
+            exact.centroids is None and approximate.centroids is not None,
+            "Large corpora get an IVF index",
+        )
+        queries = matrix[rng.choice(4000, size=50, replace=False)]
+        recall = np.mean([
+            len({i for i, _ in exact.search(q, 10)} & {i for i, _ in approximate.search(q, 10)}) / 10
+            for q in queries
+        ])
+    failures += assert_test(recall >= 0.9, f"IVF recall@10 is high ({recall:.2f})")
+    patched = approximate.patched(np.array([9999], dtype=np.int64), matrix[5:6], np.array([9999, 5], dtype=np.int64), 1)
+    nearest = [bullet_id for bullet_id, _ in patched.search(matrix[5], 3)]
+    failures += assert_test(
+        nearest[0] == 9999 and 5 not in nearest and len(patched) == len(approximate),
+        "Patched IVF indexes serve new vectors and hide replaced rows",
+    )
+
+    print("\n  --- Pluggable model ---")
+    with override_settings(CHAT_EMBEDDING_OPTIONS={"dimensions": 64}):
+        call_command("rebuild_memory_embeddings", stdout=io.StringIO())
+        failures += assert_test(
+            not MemoryBulletEmbedding.objects.exclude(dimensions=64).exists(),
+            "Rebuilding with a new model replaces every vector",
+        )
+        failures += assert_test(
+            search_similar_memory_bullets(owner.id, "hiking mountains", k=1)[0].id == hiking.id,
+            "Search uses the configured model",
+        )
+    call_command("rebuild_memory_embeddings", stdout=io.StringIO())
+
+    for bullet in created:
+        bullet.delete()
+    return failures
+
+
+def test_memory_bullet_relevance(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP R: Hybrid Relevance Ranking")
+    print("=" * 60)
+    failures = 0
+
+    memory = data["memories"][0]
+    auth_user = memory.user.user
+    now = timezone.now()
+    created = []
+
+    def add_bullet(content, strength, helpful=0, harmful=0, age_days=0):
+        bullet = MemoryBullet.objects.create(
+            memory=memory,
+            content=content,
+            memory_type=MemoryType.SEMANTIC,
+            topic="Ranking",
+            ttl_days=30,
+            strength=strength,
+            helpful_count=helpful,
+            harmful_count=harmful,
+        )
+        # last_accessed is auto_now, so ages are set with a queryset update
+        MemoryBullet.objects.filter(pk=bullet.pk).update(last_accessed=now - timedelta(days=age_days))
+        created.append(bullet)
+        return bullet
+
+    fresh_strong = add_bullet("Kayak trip planning checklist", 90, helpful=6, age_days=1)
+    stale_weak = add_bullet("Kayak rental shop hours", 10, harmful=4, age_days=400)
+    middling = add_bullet("Prefers tea in the afternoon", 50, age_days=20)
+    for i in range(30):
+        add_bullet(f"Filler note number {i}", i, age_days=i * 10)
+
+    user_bullets = MemoryBullet.objects.select_related("memory").filter(memory=memory)
+
+    print("\n  --- Scoring ---")
+    ranked = rank_memory_bullets(user_bullets, limit=5, now=now)
+    failures += assert_test(
+        len(ranked) == 5 and ranked[0][0] == fresh_strong.id,
+        "Strong, recent, helpful bullets rank first",
+    )
+    failures += assert_test(
+        [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True),
+        "Results are ordered by descending relevance",
+    )
+    all_ids = [bullet_id for bullet_id, _ in rank_memory_bullets(user_bullets, limit=1000, now=now)]
+    failures += assert_test(all_ids.index(stale_weak.id) > all_ids.index(middling.id), "Old, weak, harmful bullets sink")
+
+    with override_settings(CHAT_RELEVANCE_MIN_CANDIDATES=1):
+        bounded = rank_memory_bullets(user_bullets, limit=3, now=now)
+    failures += assert_test(
+        [bullet_id for bullet_id, _ in bounded] == all_ids[:3],
+        "Top-N from SQL candidates matches a full re-rank",
+    )
+
+    print("\n  --- Text relevance ---")
+    matched = apply_memory_bullet_search(user_bullets, "kayak")
+    text_ranked = [bullet_id for bullet_id, _ in rank_memory_bullets(matched, limit=10, now=now)]
+    failures += assert_test(
+        set(text_ranked) == {fresh_strong.id, stale_weak.id},
+        "Search filters apply before ranking",
+    )
+    with override_settings(CHAT_RELEVANCE_WEIGHTS={"text": 10.0}):
+        stale_weak.content = "Kayak kayak kayak"
+        stale_weak.save()
+        MemoryBullet.objects.filter(pk=stale_weak.pk).update(last_accessed=now - timedelta(days=400))
+        boosted = rank_memory_bullets(apply_memory_bullet_search(user_bullets, "kayak"), limit=2, now=now)
+    failures += assert_test(boosted[0][0] == stale_weak.id, "Text relevance weight can dominate the blend")
+
+    print("\n  --- Callers ---")
+    page = get_memory_list_data(auth_user, sort_key="relevance")
+    page_ids = [b.id for b in page["queryset"]]
+    failures += assert_test(
+        page["active_sort"] == "relevance" and page_ids[0] == fresh_strong.id and len(page_ids) <= 100,
+        "Memory page sort=relevance shows the top bullets",
+    )
+    rows = get_api_memory_bullets_payload(auth_user, q="kayak", sort="relevance")["results"]
+    failures += assert_test(
+        rows and all("relevance" in row for row in rows) and {row["id"] for row in rows} == {fresh_strong.id, stale_weak.id},
+        "API sort=relevance returns scored rows",
+    )
+    rows = get_api_memory_bullets_payload(auth_user, q="kayak trip", mode="semantic", sort="relevance")["results"]
+    failures += assert_test(
+        rows and "similarity" in rows[0] and "relevance" in rows[0],
+        "Semantic similarity can feed the relevance blend",
+    )
+
+    for bullet in created:
+        bullet.delete()
+    return failures
+
+
+def test_cursor_pagination(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP S: Keyset Cursor Pagination")
+    print("=" * 60)
+    failures = 0
+
+    memory = data["memories"][0]
+    owner = memory.user
+    auth_user = owner.user
+    now = timezone.now()
+
+    def walk(fetch, key="results"):
+        seen = []
+        cursor = ""
+        for _ in range(1000):
+            payload = fetch(cursor)
+            seen.extend(row["id"] for row in payload[key])
+            cursor = payload["next"]
+            if not cursor:
+                break
+        return seen
+
+    tied = [
+        MemoryBullet.objects.create(
+            memory=memory,
+            content=f"Paging bullet {i}",
+            memory_type=MemoryType.EPISODIC,
+            topic="Paging",
+            ttl_days=30,
+        )
+        for i in range(7)
+    ]
+    # Identical timestamps force the id tiebreak to do its job
+    MemoryBullet.objects.filter(pk__in=[b.pk for b in tied]).update(last_accessed=now)
+
+    print("\n  --- Memories ---")
+    expected = list(
+        MemoryBullet.objects.filter(memory__user=owner).order_by("-last_accessed", "-id").values_list("id", flat=True)
+    )
+    walked = walk(lambda cursor: get_api_memory_bullets_payload(auth_user, cursor=cursor, limit=3))
+    failures += assert_test(walked == expected, "Walking every page yields each bullet once, in order")
+    first = get_api_memory_bullets_payload(auth_user, limit=3)
+    failures += assert_test(first["count"] == 3 and first["next"], "Partial pages carry a next cursor")
+    failures += assert_test(
+        get_api_memory_bullets_payload(auth_user, limit=len(expected))["next"] is None,
+        "The last page has no next cursor",
+    )
+    searched = walk(lambda cursor: get_api_memory_bullets_payload(auth_user, q="paging", cursor=cursor, limit=2))
+    failures += assert_test(sorted(searched) == sorted(b.id for b in tied), "Search results page by rank")
+    failures += assert_test(
+        get_api_memory_bullets_payload(auth_user, limit="100000")["count"] <= 500,
+        "Page size is capped",
+    )
+
+    print("\n  --- Sessions and messages ---")
+    expected_sessions = list(
+        Session.objects.filter(user=owner).order_by("-created_at", "-id").values_list("id", flat=True)
+    )
+    walked_sessions = walk(lambda cursor: get_api_sessions_payload(auth_user, cursor=cursor, limit=1))
+    failures += assert_test(walked_sessions == expected_sessions, "Sessions page newest first")
+
+    session = Session.objects.create(user=owner, title="Long conversation")
+    for i in range(5):
+        create_user_message_with_agent_reply(session, f"Turn {i}")
+    expected_messages = list(session.messages.order_by("created_at", "id").values_list("id", flat=True))
+    walked_messages = walk(
+        lambda cursor: get_api_messages_payload(auth_user, session.id, cursor=cursor, limit=4),
+        key="messages",
+    )
+    failures += assert_test(walked_messages == expected_messages, "Messages page oldest first")
+
+    print("\n  --- Invalid cursors ---")
+    session_cursor = get_api_sessions_payload(auth_user, limit=1)["next"]
+    search_cursor = get_api_memory_bullets_payload(auth_user, q="paging", limit=2)["next"]
+    for name, cursor in [
+        ("Tampered", first["next"][:-2] + "xx"),
+        ("Foreign", session_cursor),
+        ("Search offset", search_cursor),
+    ]:
+        try:
+            get_api_memory_bullets_payload(auth_user, cursor=cursor, limit=3)
+            failures += assert_test(False, f"{name} cursor should raise InvalidCursorError")
+        except InvalidCursorError:
+            failures += assert_test(True, f"{name} cursor raises InvalidCursorError")
+    request = RequestFactory().get("/chat/api/memories/", {"cursor": "garbage"})
+    request.user = auth_user
+    response = api_memory_bullets(request)
+    failures += assert_test(response.status_code == 400, "API answers 400 for a bad cursor")
+
+    session.delete()
+    for bullet in tied:
+        bullet.delete()
+    return failures
+
+
+def test_conversation_window(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP T: Paginated Conversation View")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][0]
+    auth_user = owner.user
+    other_auth = data["auth_users"][1]
+    factory = RequestFactory()
+    start = timezone.now() - timedelta(days=1)
+
+    def make_session(turns):
+        session = Session.objects.create(user=owner, title=f"Window test {turns}")
+        Message.objects.bulk_create([
+            Message(session=session, role=Role.USER if i % 2 == 0 else Role.ASSISTANT, content=f"Turn {turns}-{i}")
+            for i in range(turns)
+        ])
+        Message.objects.create(session=session, role=Role.SYSTEM, content="Hidden system prompt")
+        # bulk_create stamps every row with nearly the same time; spread them out like a real conversation
+        for i, message in enumerate(session.messages.filter(role__in=[Role.USER, Role.ASSISTANT]).order_by("id")):
+            Message.objects.filter(pk=message.pk).update(created_at=start + timedelta(seconds=i))
+        return session
+
+    def render_page(session):
+        request = factory.get(session.get_absolute_url())
+        request.user = auth_user
+        with CaptureQueriesContext(connection) as queries:
+            response = ConversationMessagesView.as_view()(request, session_id=session.pk)
+        return response, len(queries)
+
+    short = make_session(10)
+    long = make_session(400)
+    page_size = 50
+    # Warm the per-user lookups so both measured renders pay the same fixed cost
+    render_page(short)
+
+    print("\n  --- Initial window ---")
+    response, long_queries = render_page(long)
+    html = response.content.decode()
+    failures += assert_test(response.status_code == 200, "Conversation page renders")
+    failures += assert_test(html.count('class="message-row') == page_size, "Only the newest window is rendered")
+    failures += assert_test(
+        "Turn 400-399" in html and "Turn 400-0<" not in html and "Hidden system prompt" not in html,
+        "The window holds the latest turns and no system messages",
+    )
+    failures += assert_test(html.index("Turn 400-398") < html.index("Turn 400-399"), "The window reads oldest to newest")
+    failures += assert_test("data-older-cursor" in html, "Long conversations expose an older-messages cursor")
+
+    short_response, short_queries = render_page(short)
+    short_html = short_response.content.decode()
+    failures += assert_test(
+        short_html.count('class="message-row') == 10 and "data-older-cursor" not in short_html,
+        "Short conversations render in full without a cursor",
+    )
+    failures += assert_test(short_queries == long_queries, "Query count does not grow with conversation length")
+
+    print("\n  --- Scroll-back endpoint ---")
+    window = get_conversation_window_for_user(auth_user, long.pk)
+    collected = [m.content for m in window["conversation_messages"]]
+    cursor = window["older_cursor"]
+    while cursor:
+        request = factory.get(f"/chat/c/{long.pk}/history/", {"cursor": cursor})
+        request.user = auth_user
+        payload = json.loads(conversation_history_view(request, long.pk).content)
+        collected = [m["content"] for m in payload["messages"]] + collected
+        cursor = payload["next"]
+    failures += assert_test(
+        collected == [f"Turn 400-{i}" for i in range(400)],
+        "Scrolling back walks the whole history exactly once",
+    )
+    try:
+        get_conversation_history_payload(other_auth, long.pk)
+        failures += assert_test(False, "Another user's history should raise Http404")
+    except Http404:
+        failures += assert_test(True, "Another user's history raises Http404")
+    request = factory.get(f"/chat/c/{long.pk}/history/", {"cursor": "nonsense"})
+    request.user = auth_user
+    failures += assert_test(conversation_history_view(request, long.pk).status_code == 400, "Bad cursors return 400")
+
+    short.delete()
+    long.delete()
+    return failures
+
+
+def test_sidebar_cache(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP U: Bounded Sidebar Sessions")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][3]
+    auth_user = owner.user
+    request = RequestFactory().get("/home/")
+    request.user = auth_user
+
+    def sidebar_ids():
+        return [s.id for s in user_sessions(request)["sessions"]]
+
+    def queries_for(func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    print("\n  --- Bounded and lazy ---")
+    extra = [Session.objects.create(user=owner, title=f"Sidebar {i}") for i in range(35)]
+    failures += assert_test(queries_for(lambda: user_sessions(request)) == 0, "The context processor itself runs no queries")
+    first_cost = queries_for(sidebar_ids)
+    failures += assert_test(first_cost == 1, f"A sidebar costs one bounded query ({first_cost})")
+    context = user_sessions(request)
+    failures += assert_test(
+        len(context["sessions"]) == 30 and bool(context["sidebar_has_more"]),
+        "The list is capped and reports that more exist",
+    )
+    expected = list(
+        Session.objects.filter(user=owner).order_by("-updated_at", "-id").values_list("id", flat=True)[:30]
+    )
+    failures += assert_test(sidebar_ids() == expected, "Sessions are ordered by last update")
+    failures += assert_test(
+        {"created_at", "user_id"} <= context["sessions"][0].get_deferred_fields(),
+        "Only the rendered columns are loaded",
+    )
+
+    print("\n  --- Freshness ---")
+    created = Session.objects.create(user=owner, title="Brand new")
+    failures += assert_test(sidebar_ids()[0] == created.id, "Creating a session refreshes the sidebar")
+    oldest = Session.objects.filter(user=owner).order_by("updated_at").first()
+    create_user_message_with_agent_reply(oldest, "Bump this one")
+    failures += assert_test(sidebar_ids()[0] == oldest.id, "Touching a session moves it to the top")
+    oldest.title = "Renamed"
+    oldest.save(update_fields=["title"])
+    failures += assert_test(user_sessions(request)["sessions"][0].title == "Renamed", "Renames refresh the sidebar")
+    oldest.delete()
+    failures += assert_test(oldest.id not in sidebar_ids(), "Deletes refresh the sidebar")
+    # A queryset update sends no signals, like a write served by another worker process
+    Session.objects.filter(pk=extra[0].pk).update(title="Elsewhere", updated_at=timezone.now())
+    failures += assert_test(
+        user_sessions(request)["sessions"][0].title == "Elsewhere",
+        "Writes that bypass this process still refresh the sidebar",
+    )
+
+    anonymous = RequestFactory().get("/")
+    anonymous.user = AnonymousUser()
+    failures += assert_test(user_sessions(anonymous)["sessions"] == [], "Anonymous users get an empty sidebar")
+
+    created.delete()
+    for session in extra:
+        session.delete()
+    return failures
+
+def test_profile_resolution(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP V: Request-Scoped Profile Resolution")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][0]
+
+    def queries_for(func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    print("\n  --- Resolved once per user object ---")
+    auth_user = AuthUser.objects.get(pk=owner.user_id)
+    failures += assert_test(
+        get_or_create_profile_for_user(auth_user).pk == owner.pk,
+        "The first lookup returns the user's profile",
+    )
+    failures += assert_test(
+        queries_for(lambda: get_or_create_profile_for_user(auth_user)) == 0,
+        "Repeated lookups on the same user run no queries",
+    )
+    failures += assert_test(
+        queries_for(lambda: auth_user.profile) == 0,
+        "user.profile reuses the resolved profile",
+    )
+
+    print("\n  --- Profile id cache ---")
+    forget_profile_id(owner.user_id)
+    cold_cost = queries_for(lambda: get_profile_id_for_user(AuthUser.objects.get(pk=owner.user_id)))
+    failures += assert_test(cold_cost == 2, f"A cold id lookup loads the user and the profile ({cold_cost})")
+    fresh_user = AuthUser.objects.get(pk=owner.user_id)
+    failures += assert_test(
+        queries_for(lambda: get_profile_id_for_user(fresh_user)) == 0,
+        "A warm id lookup runs no queries",
+    )
+    failures += assert_test(get_profile_id_for_user(fresh_user) == owner.pk, "The cached id is the profile's id")
+    session_cost = queries_for(lambda: get_api_sessions_payload(fresh_user))
+    failures += assert_test(
+        session_cost == 2,
+        f"Listing sessions costs only the live and archived listing queries ({session_cost})",
+    )
+
+    print("\n  --- Middleware ---")
+    request = RequestFactory().get("/home/")
+    request.user = AuthUser.objects.get(pk=owner.user_id)
+    ProfileMiddleware(lambda req: None)(request)
+    failures += assert_test(request.profile.pk == owner.pk, "request.profile is the user's profile")
+    failures += assert_test(
+        queries_for(lambda: (request.profile.pk, get_or_create_profile_for_user(request.user))) == 0,
+        "Services handed request.user reuse request.profile",
+    )
+    anonymous = RequestFactory().get("/")
+    anonymous.user = AnonymousUser()
+    ProfileMiddleware(lambda req: None)(anonymous)
+    failures += assert_test(not anonymous.profile, "Anonymous requests have no profile")
+
+    print("\n  --- Invalidation ---")
+    temporary = AuthUser.objects.create_user(username="profile_cache_user", password="unused")
+    old_profile_id = get_profile_id_for_user(temporary)
+    UserProfile.objects.filter(pk=old_profile_id).delete()
+    new_profile_id = get_profile_id_for_user(AuthUser.objects.get(pk=temporary.pk))
+    failures += assert_test(
+        new_profile_id != old_profile_id and UserProfile.objects.filter(pk=new_profile_id).exists(),
+        "Deleting a profile drops its cached id",
+    )
+    temporary.delete()
+    return failures
+
+def test_database_configuration(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP W: Database Connection Tuning")
+    print("=" * 60)
+    failures = 0
+
+    if connection.vendor != "sqlite":
+        print("  SKIPPED: SQLite tuning only applies to SQLite databases")
+        return failures
+
+    print("\n  --- Connection init PRAGMAs ---")
+    connection.close()
+    with connection.cursor() as cursor:
+        pragmas = {}
+        for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store"):
+            cursor.execute(f"PRAGMA {name}")
+            pragmas[name] = cursor.fetchone()[0]
+    failures += assert_test(str(pragmas["journal_mode"]).lower() == "wal", "New connections use WAL journaling")
+    failures += assert_test(pragmas["synchronous"] == 1, "synchronous is NORMAL")
+    failures += assert_test(pragmas["busy_timeout"] == 5000, "Blocked writers wait for the lock")
+    failures += assert_test(pragmas["temp_store"] == 2, "Temporary tables live in memory")
+    failures += assert_test(connection.transaction_mode == "IMMEDIATE", "Transactions take the write lock at BEGIN")
+    failures += assert_test(
+        connection.settings_dict["CONN_MAX_AGE"] > 0 and connection.settings_dict["CONN_HEALTH_CHECKS"],
+        "Connections persist across requests with health checks",
+    )
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import memoria.asgi; from django.db import connection; "
+            "print(connection.settings_dict['CONN_MAX_AGE'])",
+        ],
+        cwd=repo_root,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [repo_root, os.environ.get("PYTHONPATH")]))},
+        capture_output=True,
+        text=True,
+    )
+    failures += assert_test(
+        probe.returncode == 0 and probe.stdout.split()[-1:] == ["0"],
+        "The ASGI entry point closes connections after each request",
+    )
+
+    print("\n  --- Write path benchmark ---")
+    users_before = AuthUser.objects.count()
+    result = run_chat_write_benchmark(workers=2, turns=3)
+    failures += assert_test(result["turns"] == 6 and not result["errors"], "Concurrent writers complete every turn")
+    failures += assert_test(result["p95_ms"] >= result["p50_ms"] > 0, "Latency percentiles are reported")
+    failures += assert_test(AuthUser.objects.count() == users_before, "Benchmark users are cleaned up")
+    return failures
+
+def test_chat_write_path(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP X: Batched Chat Write Path")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][4]
+
+    def message_inserts(queries):
+        return [query for query in queries.captured_queries if query["sql"].startswith('INSERT INTO "chat_message"')]
+
+    print("\n  --- One transaction per turn ---")
+    session = Session.objects.create(user=owner, title="Write path")
+    with CaptureQueriesContext(connection) as queries:
+        create_user_message_with_agent_reply(session, "Batch this turn")
+    inserts = message_inserts(queries)
+    failures += assert_test(len(inserts) == 1, f"Both messages are written by one INSERT ({len(inserts)})")
+    statements = [query["sql"].upper() for query in queries.captured_queries]
+    failures += assert_test(
+        sum(1 for sql in statements if sql.startswith("BEGIN")) == 1,
+        "The turn commits as a single transaction",
+    )
+    roles = list(session.messages.order_by("created_at", "id").values_list("role", flat=True))
+    failures += assert_test(roles == [Role.USER, Role.ASSISTANT], "Messages keep user-then-assistant order")
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Bulk inserts keep rollups in sync")
+
+    with patch("app.chat.service.record_messages_created", side_effect=RuntimeError("boom")):
+        try:
+            create_user_message_with_agent_reply(session, "This turn fails")
+        except RuntimeError:
+            pass
+    failures += assert_test(session.messages.count() == 2, "A failed turn leaves no partial messages behind")
+
+    with CaptureQueriesContext(connection) as queries:
+        opened = Session.create_with_opening_exchange(owner, "Opening exchange")
+    failures += assert_test(
+        len(message_inserts(queries)) == 1 and opened.messages.count() == 2,
+        "Opening exchanges write both messages with one INSERT",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Opening exchanges keep rollups in sync")
+
+    print("\n  --- Write-behind session touches ---")
+    stored_before = Session.objects.get(pk=session.pk).updated_at
+    with override_settings(CHAT_SESSION_TOUCH_BUFFER_SECONDS=60):
+        create_user_message_with_agent_reply(session, "Buffered one")
+        create_user_message_with_agent_reply(session, "Buffered two")
+        failures += assert_test(
+            Session.objects.get(pk=session.pk).updated_at == stored_before,
+            "Buffered touches are not written with the turn",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            flushed = flush_session_touches()
+        session_updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "chat_session"')]
+        failures += assert_test(
+            flushed == 1 and len(session_updates) == 1,
+            "Touches of one session coalesce into one UPDATE",
+        )
+        failures += assert_test(
+            Session.objects.get(pk=session.pk).updated_at == session.updated_at,
+            "The flush writes the latest touch",
+        )
+        failures += assert_test(flush_session_touches() == 0, "An empty buffer writes nothing")
+
+        create_user_message_with_agent_reply(session, "Not due yet")
+        failures += assert_test(flush_session_touches(only_due=True) == 0, "Touches wait until the window ends")
+        with override_settings(CHAT_SESSION_TOUCH_BUFFER_SIZE=1):
+            failures += assert_test(flush_session_touches(only_due=True) == 1, "A full buffer flushes early")
+
+    session.delete()
+    opened.delete()
+    return failures
+
+def test_streaming_replies(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP Y: Streaming Replies over SSE")
+    print("=" * 60)
+    failures = 0
+
+    # Outside Django's test runner the test client's host is not allowed by default
+    test_host = override_settings(ALLOWED_HOSTS=["testserver"])
+    test_host.enable()
+    owner = data["profiles"][5]
+    session = Session.objects.create(user=owner, title="Streaming")
+    stream_url = f"/chat/c/{session.pk}/stream/"
+
+    def parse_events(body):
+        events = []
+        for frame in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    async def post_stream(url, message):
+        client = AsyncClient()
+        await client.aforce_login(owner.user)
+        response = await client.post(url, {"message": message})
+        if not response.streaming:
+            return response, None
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        return response, parse_events(body)
+
+    print("\n  --- Stub generator ---")
+    tokens = async_to_sync(_collect_async)(StubReplyGenerator("Streamed hello world").stream(None, "", []))
+    failures += assert_test(tokens == ["Streamed ", "hello ", "world"], "The stub streams the reply word by word")
+
+    print("\n  --- Event stream ---")
+    with override_settings(CHAT_REPLY_GENERATOR_OPTIONS={"reply": "Streamed hello world"}):
+        response, events = async_to_sync(post_stream)(stream_url, "Stream please")
+    failures += assert_test(
+        response.status_code == 200 and response["Content-Type"] == "text/event-stream",
+        "The endpoint answers with an event stream",
+    )
+    failures += assert_test(response["Cache-Control"] == "no-cache", "The stream is not cached")
+    names = [name for name, _ in events]
+    failures += assert_test(names == ["token", "token", "token", "done"], f"Tokens arrive before done ({names})")
+    stored = list(session.messages.order_by("created_at", "id").values_list("role", "content"))
+    failures += assert_test(
+        stored == [(Role.USER, "Stream please"), (Role.ASSISTANT, "Streamed hello world")],
+        "The finished reply is stored with the user's message",
+    )
+    failures += assert_test(
+        events[-1][1]["message_id"] == session.messages.order_by("-id").first().pk,
+        "done carries the stored reply's id",
+    )
+
+    print("\n  --- Failures ---")
+
+    class FailingGenerator:
+        async def stream(self, session, content, memories):
+            yield "Half "
+            raise RuntimeError("model went away")
+
+    with patch("app.chat.streaming_service.get_reply_generator", return_value=FailingGenerator()):
+        _, events = async_to_sync(post_stream)(stream_url, "This one breaks")
+    failures += assert_test([name for name, _ in events] == ["token", "error"], "A failed generation ends with error")
+    failures += assert_test(session.messages.count() == 2, "A failed generation stores nothing")
+
+    response, _ = async_to_sync(post_stream)(stream_url, "   ")
+    failures += assert_test(response.status_code == 400, "Empty messages are rejected")
+
+    print("\n  --- Plain requests ---")
+    client = Client(headers={"x-requested-with": "XMLHttpRequest"})
+    client.force_login(owner.user)
+    with override_settings(CHAT_REPLY_GENERATOR_OPTIONS={"reply": "Generated in full"}):
+        response = client.post(f"/chat/c/{session.pk}/", {"message": "No stream here"})
+    failures += assert_test(
+        response.json()["messages"][-1] == {"role": "assistant", "content": "Generated in full"},
+        "Non-streaming requests reply with the configured generator",
+    )
+    failures += assert_test(
+        session.messages.order_by("-id").first().content == "Generated in full",
+        "The generated reply is the one stored",
+    )
+    with patch("app.chat.streaming_service.get_reply_generator", return_value=FailingGenerator()):
+        response = client.post(f"/chat/c/{session.pk}/", {"message": "This one breaks too"})
+    failures += assert_test(
+        response.status_code == 502 and session.messages.count() == 4,
+        "A failed non-streaming generation reports an error and stores nothing",
+    )
+    foreign = Session.objects.create(user=data["profiles"][6], title="Not yours")
+    response, _ = async_to_sync(post_stream)(f"/chat/c/{foreign.pk}/stream/", "Hello")
+    failures += assert_test(response.status_code == 404, "Other users' sessions are not found")
+
+    print("\n  --- Concurrency ---")
+
+    async def many_streams(count):
+        return await asyncio.gather(*[post_stream(stream_url, f"Parallel {i}") for i in range(count)])
+
+    with override_settings(CHAT_REPLY_GENERATOR_OPTIONS={"reply": "one two three", "token_delay": 0.1}):
+        started = time.perf_counter()
+        results = async_to_sync(many_streams)(8)
+        elapsed = time.perf_counter() - started
+    failures += assert_test(
+        all(events[-1][0] == "done" for _, events in results),
+        "Concurrent streams all complete",
+    )
+    failures += assert_test(elapsed < 8 * 0.3, f"Streams overlap instead of queueing ({elapsed:.2f}s for 8)")
+    failures += assert_test(
+        iscoroutinefunction(ProfileMiddleware(_async_get_response)),
+        "Project middleware stays async under ASGI",
+    )
+
+    session.delete()
+    foreign.delete()
+    test_host.disable()
+    return failures
+
+def test_memory_lifecycle(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP Z: Memory Decay and TTL Sweeps")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][6]
+    now = timezone.now()
+    memory = Memory.objects.create(user=owner, access_clock=0)
+
+    def make_bullet(content, strength, ttl_days, accessed_days_ago):
+        bullet = MemoryBullet.objects.create(
+            memory=memory, content=content, memory_type=MemoryType.SEMANTIC,
+            topic="Lifecycle", strength=strength, ttl_days=ttl_days,
+        )
+        MemoryBullet.objects.filter(pk=bullet.pk).update(last_accessed=now - timedelta(days=accessed_days_ago))
+        return bullet
+
+    stale = make_bullet("Stale but alive", 80, 365, 90)
+    expired = make_bullet("Past its ttl", 60, 30, 60)
+    fresh = make_bullet("Just used", 50, 30, 0)
+    forever = make_bullet("Never expires", 0, 0, 900)
+    bullet_ids = [stale.pk, expired.pk, fresh.pk, forever.pk]
+
+    print("\n  --- Dry run ---")
+    with override_settings(CHAT_MEMORY_DECAY_HALF_LIFE_DAYS=90):
+        preview = sweep_memory_bullets(now=now, dry_run=True)
+    failures += assert_test(
+        preview["expired"] >= 1 and MemoryBullet.objects.filter(pk=expired.pk).exists(),
+        "A dry run reports without writing",
+    )
+
+    print("\n  --- Sweep ---")
+    with override_settings(CHAT_MEMORY_DECAY_HALF_LIFE_DAYS=90):
+        with CaptureQueriesContext(connection) as queries:
+            metrics = sweep_memory_bullets(now=now, batch_size=2)
+    remaining = {bullet.pk: bullet for bullet in MemoryBullet.objects.filter(pk__in=bullet_ids)}
+    failures += assert_test(expired.pk not in remaining, "Bullets past their TTL are deleted")
+    failures += assert_test(
+        not MemoryBulletEmbedding.objects.filter(bullet_id=expired.pk).exists(),
+        "Deleted bullets take their embeddings with them",
+    )
+    failures += assert_test(forever.pk in remaining, "A TTL of 0 never expires")
+    failures += assert_test(remaining[stale.pk].strength == 40, f"Strength halves per half-life ({remaining[stale.pk].strength})")
+    failures += assert_test(
+        remaining[stale.pk].last_accessed == now - timedelta(days=90),
+        "Decay does not count as an access",
+    )
+    failures += assert_test(remaining[fresh.pk].strength == 50, "Recently used bullets keep their strength")
+    failures += assert_test(
+        metrics["batches"] == math.ceil(metrics["scanned"] / 2) and metrics["rows_per_second"] > 0,
+        "Throughput metrics are reported per batch",
+    )
+    deletes = [q for q in queries.captured_queries if q["sql"].startswith('DELETE FROM "chat_memorybullet" WHERE')]
+    failures += assert_test(
+        all(" IN (" in q["sql"] for q in deletes) and len(deletes) == 1,
+        "Expired bullets go in chunked DELETE ... IN passes",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rollups follow decay and expiry")
+
+    print("\n  --- Repeated sweeps ---")
+    with override_settings(CHAT_MEMORY_DECAY_HALF_LIFE_DAYS=90):
+        sweep_memory_bullets(now=now)
+        failures += assert_test(
+            MemoryBullet.objects.get(pk=stale.pk).strength == 40,
+            "Sweeping again at the same time decays nothing twice",
+        )
+        sweep_memory_bullets(now=now + timedelta(days=90), expire=False)
+    failures += assert_test(
+        MemoryBullet.objects.get(pk=stale.pk).strength == 20,
+        "Decay resumes from the last sweep",
+    )
+
+    memory.delete()
+    return failures
+
+
+def test_session_archive(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP AA: Cold-Storage Session Archive")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][7]
+    auth_user = owner.user
+    now = timezone.now()
+    factory = RequestFactory()
+
+    def make_session(title, idle_days, turns, last_message_days_ago=None):
+        session = Session.objects.create(user=owner, title=title)
+        Message.objects.bulk_create([
+            Message(session=session, role=Role.USER if i % 2 == 0 else Role.ASSISTANT, content=f"{title} turn {i}")
+            for i in range(turns)
+        ])
+        started = now - timedelta(days=idle_days + 3)
+        for i, message in enumerate(session.messages.order_by("id")):
+            # Spread over several days so the archive has to remember per-day message counts
+            Message.objects.filter(pk=message.pk).update(created_at=started + timedelta(days=i % 3, seconds=i))
+        if last_message_days_ago is not None:
+            Message.objects.filter(pk=session.messages.order_by("-id").values("pk")[:1]).update(
+                created_at=now - timedelta(days=last_message_days_ago)
+            )
+        Session.objects.filter(pk=session.pk).update(created_at=started, updated_at=now - timedelta(days=idle_days))
+        return session
+
+    old = make_session("Archive me", 400, 7)
+    lagging = make_session("Touch still buffered", 400, 3, last_message_days_ago=1)
+    recent = make_session("Still active", 2, 3)
+    rebuild_analytics_rollups([owner.id])
+    rollups_before = list(
+        AnalyticsRollup.objects.filter(user=owner).order_by("day", "memory_type").values_list("day", "session_count", "message_count")
+    )
+
+    print("\n  --- Archiving ---")
+    preview = archive_idle_sessions(now=now, idle_days=365, dry_run=True)
+    failures += assert_test(
+        preview["sessions"] >= 1 and Session.objects.filter(pk=old.pk).exists(),
+        "A dry run reports without moving anything",
+    )
+    metrics = archive_idle_sessions(now=now, idle_days=365, batch_size=1)
+    archived = ArchivedSession.objects.filter(pk=old.pk).first()
+    failures += assert_test(
+        archived is not None and not Session.objects.filter(pk=old.pk).exists()
+        and not Message.objects.filter(session_id=old.pk).exists(),
+        "Idle sessions move to the archive with their messages",
+    )
+    failures += assert_test(
+        archived is not None and archived.message_count == 7 and sum(archived.message_days.values()) == 7
+        and len(archived.message_days) == 3,
+        "The archive keeps per-day message counts",
+    )
+    failures += assert_test(
+        Session.objects.filter(pk__in=[lagging.pk, recent.pk]).count() == 2,
+        "Recently touched sessions and sessions with recent messages stay hot",
+    )
+    failures += assert_test(
+        metrics["batches"] == metrics["sessions"] and 0 < metrics["stored_bytes"] < metrics["raw_bytes"],
+        f"Archived messages are stored compressed ({metrics['raw_bytes']} -> {metrics['stored_bytes']} bytes)",
+    )
+    rollups_after = list(
+        AnalyticsRollup.objects.filter(user=owner).order_by("day", "memory_type").values_list("day", "session_count", "message_count")
+    )
+    failures += assert_test(rollups_after == rollups_before, "Archiving leaves the analytics rollups untouched")
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rollup verification counts archived sessions")
+
+    print("\n  --- Listing archived sessions ---")
+    listed = {row["id"]: row for row in get_api_sessions_payload(auth_user, q="Archive me")["results"]}
+    failures += assert_test(
+        old.pk in listed and listed[old.pk]["archived"] and listed[old.pk]["url"] == old.get_absolute_url(),
+        "Session search still finds archived conversations",
+    )
+    first_page = get_api_sessions_payload(auth_user, limit=1)
+    second_page = get_api_sessions_payload(auth_user, limit=1, cursor=first_page["next"])
+    failures += assert_test(
+        first_page["results"][0]["id"] != second_page["results"][0]["id"],
+        "Cursor pages walk live and archived sessions together",
+    )
+    exported = [row["title"] for row in get_session_report_export_rows(auth_user)]
+    failures += assert_test("Archive me" in exported, "Session exports include archived sessions")
+
+    print("\n  --- Reading archived sessions ---")
+    request = factory.get(old.get_absolute_url())
+    request.user = auth_user
+    response = ConversationMessagesView.as_view()(request, session_id=old.pk)
+    failures += assert_test(
+        response.status_code == 200 and "Archive me turn 6" in response.content.decode(),
+        "Opening an archived conversation renders it",
+    )
+    # make_session spreads the turns over three days, so turn i was written on day i % 3
+    turns = sorted(range(7), key=lambda i: (i % 3, i))
+    chronological = [f"Archive me turn {i}" for i in turns]
+    history = get_conversation_history_payload(auth_user, old.pk, limit=4)
+    older = get_conversation_history_payload(auth_user, old.pk, cursor=history["next"], limit=4)
+    failures += assert_test(
+        [m["content"] for m in older["messages"] + history["messages"]] == chronological,
+        "History pages walk the archived messages",
+    )
+    api_messages = get_api_messages_payload(auth_user, old.pk, role_filter=str(Role.USER))
+    failures += assert_test(
+        [m["content"] for m in api_messages["messages"]] == [f"Archive me turn {i}" for i in turns if i % 2 == 0],
+        "The messages API filters archived messages by role",
+    )
+    failures += assert_test(
+        ArchivedSession.objects.filter(pk=old.pk).exists() and not Session.objects.filter(pk=old.pk).exists(),
+        "Reads leave the conversation in the archive",
+    )
+    for other_request in (
+        factory.get(old.get_absolute_url()),
+        factory.post(old.get_absolute_url(), {"message": "Not my conversation"}),
+    ):
+        other_request.user = data["auth_users"][1]
+        try:
+            ConversationMessagesView.as_view()(other_request, session_id=old.pk)
+            failures += assert_test(False, f"Other users cannot {other_request.method} someone else's archive")
+        except Http404:
+            failures += assert_test(
+                ArchivedSession.objects.filter(pk=old.pk).exists(),
+                f"Other users cannot {other_request.method} someone else's archive",
+            )
+
+    print("\n  --- Rehydration ---")
+    request = factory.post(old.get_absolute_url(), {"message": "Back again"})
+    request.user = auth_user
+    response = ConversationMessagesView.as_view()(request, session_id=old.pk)
+    restored = Session.objects.filter(pk=old.pk).first()
+    failures += assert_test(
+        response.status_code == 302 and restored is not None and not ArchivedSession.objects.filter(pk=old.pk).exists(),
+        "Writing to an archived conversation restores it",
+    )
+    failures += assert_test(
+        restored is not None and restored.created_at == now - timedelta(days=403),
+        "Restored sessions keep their id and timestamps",
+    )
+    restored_messages = list(Message.objects.filter(session_id=old.pk).order_by("id"))
+    failures += assert_test(
+        [m.content for m in restored_messages[:7]] == [f"Archive me turn {i}" for i in range(7)]
+        and len({m.created_at.date() for m in restored_messages[:7]}) == 3
+        and restored_messages[7].content == "Back again",
+        "Restored messages keep their order and timestamps",
+    )
+    failures += assert_test(
+        get_conversation_history_payload(auth_user, old.pk, cursor=history["next"], limit=4) == older,
+        "Cursors from the archive keep working once it is restored",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rehydration does not count messages twice")
+    ArchivedSession.objects.filter(user=owner).delete()
+    Session.objects.filter(pk__in=[old.pk, lagging.pk, recent.pk]).delete()
+    rebuild_analytics_rollups([owner.id])
+    return failures
+
+
+def test_memory_access_tracking(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP AB: Coalesced Memory Access Tracking")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][6]
+    long_ago = timezone.now() - timedelta(days=30)
+    memories = [Memory.objects.create(user=owner, access_clock=0) for _ in range(2)]
+    bullets = [
+        MemoryBullet.objects.create(
+            memory=memory, content=f"Access fact {index}", memory_type=MemoryType.SEMANTIC,
+            topic="Access", ttl_days=30,
+        )
+        for memory in memories
+        for index in range(3)
+    ]
+    MemoryBullet.objects.filter(pk__in=[bullet.pk for bullet in bullets]).update(last_accessed=long_ago)
+
+    def updates(queries, table):
+        return [q for q in queries.captured_queries if q["sql"].startswith(f'UPDATE "{table}"')]
+
+    print("\n  --- Buffered accesses ---")
+    # Start from an empty buffer; earlier groups may have left accesses waiting for their window
+    flush_memory_accesses()
+    with override_settings(CHAT_MEMORY_ACCESS_BUFFER_SECONDS=60):
+        with CaptureQueriesContext(connection) as queries:
+            for turn in range(10):
+                record_memory_accesses(bullets[turn % 2:turn % 2 + 4])
+        failures += assert_test(
+            not updates(queries, "chat_memorybullet") and not updates(queries, "chat_memory"),
+            "Accesses are not written as they happen",
+        )
+        failures += assert_test(flush_memory_accesses(only_due=True) == 0, "Accesses wait until the window ends")
+
+        with CaptureQueriesContext(connection) as queries:
+            flushed = flush_memory_accesses()
+        failures += assert_test(
+            flushed == 2 and len(updates(queries, "chat_memorybullet")) == 2 and len(updates(queries, "chat_memory")) == 1,
+            "A flush writes one bullet UPDATE per memory and one access clock UPDATE",
+        )
+        clocks = dict(Memory.objects.filter(pk__in=[m.pk for m in memories]).values_list("pk", "access_clock"))
+        failures += assert_test(
+            clocks == {memories[0].pk: 10, memories[1].pk: 10},
+            f"Each access event increments the memory's access clock ({clocks})",
+        )
+        accessed = dict(MemoryBullet.objects.filter(pk__in=[b.pk for b in bullets]).values_list("pk", "last_accessed"))
+        failures += assert_test(
+            all(accessed[b.pk] > long_ago for b in bullets[:5]) and accessed[bullets[5].pk] == long_ago,
+            "Only accessed bullets get a new last_accessed",
+        )
+        failures += assert_test(flush_memory_accesses() == 0, "An empty buffer writes nothing")
+
+        record_memory_accesses(bullets[:1], accessed_at=long_ago - timedelta(days=1))
+        flush_memory_accesses()
+        failures += assert_test(
+            MemoryBullet.objects.get(pk=bullets[0].pk).last_accessed == accessed[bullets[0].pk],
+            "A late flush never moves last_accessed backwards",
+        )
+
+        with override_settings(CHAT_MEMORY_ACCESS_BUFFER_SIZE=2):
+            record_memory_accesses(bullets[:2])
+            failures += assert_test(
+                Memory.objects.get(pk=memories[0].pk).access_clock == 12,
+                "A full buffer flushes early",
+            )
+
+        try:
+            with transaction.atomic():
+                record_memory_accesses(bullets)
+                raise RuntimeError("turn failed")
+        except RuntimeError:
+            pass
+        failures += assert_test(flush_memory_accesses() == 0, "A rolled-back turn records no access")
+
+    print("\n  --- Bounded loss window ---")
+    with override_settings(CHAT_MEMORY_ACCESS_BUFFER_SECONDS=0.2):
+        record_memory_accesses(bullets[3:4])
+        time.sleep(0.6)
+        failures += assert_test(
+            Memory.objects.get(pk=memories[1].pk).access_clock == 11,
+            "Idle buffers are written once the window passes",
+        )
+
+    print("\n  --- Unbuffered ---")
+    with override_settings(CHAT_MEMORY_ACCESS_BUFFER_SECONDS=0):
+        record_memory_accesses(bullets[:1])
+        failures += assert_test(
+            Memory.objects.get(pk=memories[0].pk).access_clock == 13,
+            "With no window, accesses are written immediately",
+        )
+
+    for memory in memories:
+        memory.delete()
+    return failures
+
+
+def test_bulk_bullet_ingest(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP AC: Bulk Memory Bullet Ingest")
+    print("=" * 60)
+    failures = 0
+
+    owner = data["profiles"][6]
+    auth_user = owner.user
+    factory = RequestFactory()
+    memory = Memory.objects.create(user=owner, access_clock=0)
+    existing = MemoryBullet.objects.create(
+        memory=memory, content="Prefers tea over coffee", memory_type=MemoryType.SEMANTIC,
+        topic="Drinks", ttl_days=30,
+    )
+    failures += assert_test(
+        existing.content_key == memory_bullet_content_key("  prefers TEA over   coffee "),
+        "Saved bullets get a normalized content key",
+    )
+
+    def post(body, content_type="application/json", query=""):
+        request = factory.post(f"/chat/api/memories/bulk/{query}", data=body, content_type=content_type)
+        request.user = auth_user
+        response = api_memory_bullets_bulk(request)
+        return response.status_code, json.loads(response.content)
+
+    print("\n  --- Validation and de-duplication ---")
+    items = [
+        {"content": "Runs every Sunday morning", "memory_type": "episodic", "ttl_days": 90, "topic": "Running"},
+        {"content": "runs every  sunday MORNING", "memory_type": 2, "ttl_days": 90},
+        {"content": "PREFERS tea over coffee", "memory_type": 1, "ttl_days": 30, "topic": "Beverages"},
+        {"content": "Prefers tea over coffee", "memory_type": 1, "ttl_days": 30},
+        {"content": "No ttl given", "memory_type": 1},
+        {"content": "Odd type", "memory_type": "dream", "ttl_days": 2.5},
+        {"content": "   ", "memory_type": 1, "ttl_days": 1},
+        "not an object",
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        status, payload = post(json.dumps({"bullets": items}), query=f"?memory_id={memory.pk}")
+    statuses = [result["status"] for result in payload["results"]]
+    failures += assert_test(status == 200 and payload["count"] == len(items), "The endpoint reports every item")
+    failures += assert_test(
+        statuses == ["created", "duplicate", "updated", "duplicate", "invalid", "invalid", "invalid", "invalid"],
+        f"Items are created, updated, de-duplicated or rejected ({statuses})",
+    )
+    failures += assert_test(
+        payload["results"][1]["duplicate_of"] == 0 and payload["results"][3]["duplicate_of"] == 2,
+        "Repeats within an upload point at the first copy",
+    )
+    failures += assert_test(
+        set(payload["results"][5]["errors"]) == {"memory_type", "ttl_days"}
+        and set(payload["results"][4]["errors"]) == {"ttl_days"},
+        "Validation names every bad field",
+    )
+    existing.refresh_from_db()
+    failures += assert_test(
+        payload["results"][2]["id"] == existing.pk and existing.topic == "Beverages"
+        and existing.content == "Prefers tea over coffee",
+        "Matching an existing bullet updates the fields given and keeps its content",
+    )
+    created = MemoryBullet.objects.get(pk=payload["results"][0]["id"])
+    failures += assert_test(
+        created.memory_id == memory.pk and created.memory_type == MemoryType.EPISODIC and created.ttl_days == 90,
+        "New bullets are stored in the requested memory",
+    )
+    failures += assert_test(
+        MemoryBulletEmbedding.objects.filter(bullet_id=created.pk).exists()
+        and apply_memory_bullet_search(MemoryBullet.objects.filter(memory=memory), "sunday").filter(pk=created.pk).exists(),
+        "Ingested bullets are embedded and searchable",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Bulk writes keep rollups in sync")
+    inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "chat_memorybullet"')]
+    failures += assert_test(len(inserts) == 1, f"New bullets are written with one INSERT per batch ({len(inserts)})")
+
+    status, payload = post(json.dumps(items[2:3]), query=f"?memory_id={memory.pk}")
+    failures += assert_test(payload["results"][0]["status"] == "unchanged", "Re-sending a bullet changes nothing")
+
+    print("\n  --- NDJSON and limits ---")
+    lines = "\n".join([
+        json.dumps({"content": "Keeps a reading list", "memory_type": "semantic", "ttl_days": 0}),
+        "{not json",
+        "",
+        json.dumps({"content": "Learns Spanish", "memory_type": 3, "ttl_days": 60, "memory_id": memory.pk}),
+    ])
+    status, payload = post(lines, content_type="application/x-ndjson", query=f"?memory_id={memory.pk}")
+    failures += assert_test(
+        status == 200 and [r["status"] for r in payload["results"]] == ["created", "invalid", "created"],
+        "NDJSON uploads report bad lines without failing the rest",
+    )
+    status, payload = post("[1, 2", query="")
+    failures += assert_test(status == 400 and payload["error"] == "invalid_json", "Unreadable JSON is rejected")
+    foreign_memory = Memory.objects.filter(user=data["profiles"][0]).first()
+    status, payload = post(json.dumps(items[:1]), query=f"?memory_id={foreign_memory.pk}")
+    failures += assert_test(status == 404, "Other users' memories cannot be written to")
+    with override_settings(CHAT_BULK_INGEST_MAX_ITEMS=2):
+        status, payload = post(json.dumps(items))
+    failures += assert_test(status == 413 and payload["error"] == "too_many_items", "Oversized uploads are refused")
+
+    print("\n  --- Batching ---")
+    many = [
+        {"content": f"Batch fact {index}", "memory_type": 1, "ttl_days": 30, "topic": f"Batch {index % 4}"}
+        for index in range(2000)
+    ]
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        result = ingest_memory_bullets(auth_user, many, memory_id=memory.pk, batch_size=500)
+    elapsed = time.perf_counter() - started
+    # SQLite splits each batch's INSERT by its parameter limit, so count the transactions instead
+    write_transactions, in_write = 0, False
+    for query in queries.captured_queries:
+        if query["sql"].upper().startswith("BEGIN"):
+            in_write = False
+        elif query["sql"].startswith('INSERT INTO "chat_memorybullet"') and not in_write:
+            write_transactions += 1
+            in_write = True
+    failures += assert_test(
+        result["summary"]["created"] == 2000 and write_transactions == 4,
+        f"2000 bullets go in 4 bounded transactions ({write_transactions}, {2000 / elapsed:.0f} bullets/s)",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rollups match after a large ingest")
+
+    memory.delete()
+    return failures
+
+
+def test_memory_bullet_dedupe(data):
+    print("\n" + "=" * 60)
+    print("TEST GROUP AD: Near-Duplicate Memory Bullets")
+    print("=" * 60)
+    failures = 0
+
+    print("\n  --- Candidate detection ---")
+    clusters, candidates = find_near_duplicate_clusters([
+        (1, "Drinks", "Prefers tea over coffee in the morning"),
+        (2, " drinks", "prefers TEA, over coffee in the morning!"),
+        (3, "Drinks", "Prefers tea over cofee in the morning"),
+        (4, "Habits", "Prefers tea over coffee in the morning"),
+        (5, "Drinks", "Walks the dog after dinner"),
+    ])
+    failures += assert_test(clusters == [[1, 2, 3]], f"Case, punctuation and typos match within a topic ({clusters})")
+    failures += assert_test(candidates < 10, f"Only bucketed pairs are compared ({candidates} of 10)")
+
+    owner = data["profiles"][7]
+    memory = Memory.objects.create(user=owner, access_clock=0)
+    other_memory = Memory.objects.create(user=owner, access_clock=0)
+    oldest = MemoryBullet.objects.create(
+        memory=memory, content="Prefers tea over coffee in the morning", memory_type=MemoryType.SEMANTIC,
+        topic="Drinks", ttl_days=30, helpful_count=2, harmful_count=1, strength=5, tags=["food"],
+    )
+    copy = MemoryBullet.objects.create(
+        memory=other_memory, content="prefers TEA, over coffee in the morning!", memory_type=MemoryType.SEMANTIC,
+        topic="drinks", ttl_days=0, helpful_count=3, strength=9, tags=["food", "morning"], concept="beverage",
+    )
+    other_topic = MemoryBullet.objects.create(
+        memory=memory, content="Prefers tea over coffee in the morning", memory_type=MemoryType.SEMANTIC,
+        topic="Habits", ttl_days=30,
+    )
+
+    print("\n  --- Batch merge ---")
+    metrics = dedupe_memory_bullets(profile_ids=[owner.id], dry_run=True)
+    failures += assert_test(
+        metrics["merged"] == 1 and MemoryBullet.objects.filter(pk=copy.pk).exists(),
+        "A dry run reports merges without writing",
+    )
+    metrics = dedupe_memory_bullets(profile_ids=[owner.id])
+    oldest.refresh_from_db()
+    failures += assert_test(
+        metrics["merged"] == 1 and not MemoryBullet.objects.filter(pk=copy.pk).exists()
+        and MemoryBullet.objects.filter(pk=other_topic.pk).exists(),
+        "Duplicates fold into the oldest bullet, other topics are kept",
+    )
+    failures += assert_test(
+        (oldest.helpful_count, oldest.harmful_count, oldest.strength, oldest.ttl_days) == (5, 1, 9, 0)
+        and oldest.tags == ["food", "morning"] and oldest.concept == "beverage",
+        "Votes are summed and the strongest strength and longest TTL kept",
+    )
+    failures += assert_test(
+        MemoryBulletEmbedding.objects.filter(bullet_id=oldest.pk).exists()
+        and not MemoryBulletEmbedding.objects.filter(bullet_id=copy.pk).exists(),
+        "Embeddings follow the merge",
+    )
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rollups match after merging")
+
+    print("\n  --- Merge on ingest ---")
+    items = [
+        {"content": "Prefers tea over cofee in the morning", "memory_type": 1, "ttl_days": 30, "topic": "Drinks"},
+        {"content": "Collects vintage maps", "memory_type": 1, "ttl_days": 30, "topic": "Drinks"},
+    ]
+    result = ingest_memory_bullets(owner.user, items, memory_id=memory.pk)
+    statuses = [item["status"] for item in result["results"]]
+    failures += assert_test(
+        statuses == ["merged", "created"] and result["results"][0]["merged_into"] == oldest.pk
+        and MemoryBullet.objects.filter(memory__user=owner, topic__iexact="drinks").count() == 2,
+        f"Ingested near-duplicates merge into the existing bullet ({statuses})",
+    )
+    with override_settings(CHAT_DEDUPE_ON_INGEST=False):
+        result = ingest_memory_bullets(
+            owner.user, [dict(items[0], content="Prefers tea over coffee in the mornin")], memory_id=memory.pk,
+        )
+    failures += assert_test(result["results"][0]["status"] == "created", "Merging on ingest can be turned off")
+    failures += assert_test(verify_analytics_rollups([owner.id]) == [], "Rollups match after ingest merges")
+
+    print("\n  --- Benchmark ---")
+    output = io.StringIO()
+    call_command("dedupe_memory_bullets", "--benchmark", "2000", stdout=output)
+    failures += assert_test("2000 bullets" in output.getvalue(), output.getvalue().strip())
+
+    memory.delete()
+    other_memory.delete()
+    return failures
+
+
+async def _collect_async(iterator):
+    return [item async for item in iterator]
+
+
+async def _async_get_response(request):
+    return None
+
+
 def main():
     parser = argparse.ArgumentParser(description="MEMORIA Feature Tests")
     parser.add_argument("--test-users", action="store_true", help="Run user service tests")
@@ -535,6 +2676,27 @@ def main():
     parser.add_argument("--test-models", action="store_true", help="Run model method tests")
     parser.add_argument("--test-edge", action="store_true", help="Run edge case tests")
     parser.add_argument("--test-holidays", action="store_true", help="Run holiday merge service tests")
+    parser.add_argument("--test-rollups", action="store_true", help="Run analytics rollup tests")
+    parser.add_argument("--test-http-cache", action="store_true", help="Run public API HTTP caching tests")
+    parser.add_argument("--test-holiday-cache", action="store_true", help="Run holiday cache tests against a local stub server")
+    parser.add_argument("--test-chart-formats", action="store_true", help="Run SVG and Vega-Lite chart backend tests")
+    parser.add_argument("--test-exports", action="store_true", help="Run streaming report export tests")
+    parser.add_argument("--test-export-jobs", action="store_true", help="Run background export job tests")
+    parser.add_argument("--test-search", action="store_true", help="Run memory bullet full-text search tests")
+    parser.add_argument("--test-retrieval", action="store_true", help="Run semantic memory retrieval tests")
+    parser.add_argument("--test-relevance", action="store_true", help="Run hybrid relevance ranking tests")
+    parser.add_argument("--test-pagination", action="store_true", help="Run keyset cursor pagination tests")
+    parser.add_argument("--test-conversation", action="store_true", help="Run paginated conversation view tests")
+    parser.add_argument("--test-sidebar", action="store_true", help="Run bounded sidebar session list tests")
+    parser.add_argument("--test-profiles", action="store_true", help="Run request-scoped profile resolution tests")
+    parser.add_argument("--test-database", action="store_true", help="Run database connection tuning tests")
+    parser.add_argument("--test-write-path", action="store_true", help="Run batched chat write path tests")
+    parser.add_argument("--test-streaming", action="store_true", help="Run SSE reply streaming tests")
+    parser.add_argument("--test-lifecycle", action="store_true", help="Run memory decay and TTL sweep tests")
+    parser.add_argument("--test-archive", action="store_true", help="Run cold-storage session archive tests")
+    parser.add_argument("--test-access", action="store_true", help="Run coalesced memory access tracking tests")
+    parser.add_argument("--test-ingest", action="store_true", help="Run bulk memory bullet ingest tests")
+    parser.add_argument("--test-dedupe", action="store_true", help="Run near-duplicate memory bullet tests")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -549,6 +2711,13 @@ def main():
         args.test_users, args.test_sessions, args.test_memory,
         args.test_analytics, args.test_charts, args.test_api,
         args.test_models, args.test_edge, args.test_holidays,
+        args.test_rollups, args.test_http_cache, args.test_holiday_cache,
+        args.test_chart_formats, args.test_exports, args.test_export_jobs,
+        args.test_search, args.test_retrieval, args.test_relevance,
+        args.test_pagination, args.test_conversation, args.test_sidebar,
+        args.test_profiles, args.test_database, args.test_write_path,
+        args.test_streaming, args.test_lifecycle, args.test_archive, args.test_access,
+        args.test_ingest, args.test_dedupe,
     ])
 
     failures = 0
@@ -571,6 +2740,48 @@ def main():
         failures += test_edge_cases(data)
     if not has_specific or args.test_holidays:
         failures += test_holiday_merge_service(data)
+    if not has_specific or args.test_rollups:
+        failures += test_analytics_rollups(data)
+    if not has_specific or args.test_http_cache:
+        failures += test_public_api_http_caching(data)
+    if not has_specific or args.test_holiday_cache:
+        failures += test_holiday_cache(data)
+    if not has_specific or args.test_chart_formats:
+        failures += test_chart_formats(data)
+    if not has_specific or args.test_exports:
+        failures += test_streaming_exports(data)
+    if not has_specific or args.test_export_jobs:
+        failures += test_export_jobs(data)
+    if not has_specific or args.test_search:
+        failures += test_memory_bullet_search(data)
+    if not has_specific or args.test_retrieval:
+        failures += test_memory_bullet_retrieval(data)
+    if not has_specific or args.test_relevance:
+        failures += test_memory_bullet_relevance(data)
+    if not has_specific or args.test_pagination:
+        failures += test_cursor_pagination(data)
+    if not has_specific or args.test_conversation:
+        failures += test_conversation_window(data)
+    if not has_specific or args.test_sidebar:
+        failures += test_sidebar_cache(data)
+    if not has_specific or args.test_profiles:
+        failures += test_profile_resolution(data)
+    if not has_specific or args.test_database:
+        failures += test_database_configuration(data)
+    if not has_specific or args.test_write_path:
+        failures += test_chat_write_path(data)
+    if not has_specific or args.test_streaming:
+        failures += test_streaming_replies(data)
+    if not has_specific or args.test_lifecycle:
+        failures += test_memory_lifecycle(data)
+    if not has_specific or args.test_archive:
+        failures += test_session_archive(data)
+    if not has_specific or args.test_access:
+        failures += test_memory_access_tracking(data)
+    if not has_specific or args.test_ingest:
+        failures += test_bulk_bullet_ingest(data)
+    if not has_specific or args.test_dedupe:
+        failures += test_memory_bullet_dedupe(data)
 
     print("\n" + "=" * 60)
     if failures > 0:
@@ -33,6 +33,7 @@ from app.billing.models import Plan, Subscription, Payment
 from app.billing.models.plan import Interval
 from app.billing.models.subscription import Status as SubscriptionStatus
 from app.billing.models.payment import Status as PaymentStatus
+from app.chat.rollup_service import backfill_daily_activity, rebuild_analytics_rollups
 
 
 def _backdate_session(session, days_ago):
@@ -411,6 +412,12 @@ def create_all_test_data():
 
     print(f"    Created {len(admin_sessions)} sessions, {len(admin_messages)} messages, 1 memory, {len(admin_bullets)} bullets for admin 'tester'")
 
+    # Backdating uses queryset.update(), which bypasses the rollup signals
+    rollup_rows = rebuild_analytics_rollups([p.id for p in profiles] + [admin_profile.id])
+    print(f"    Rebuilt {rollup_rows} analytics rollup rows")
+    activity_rows = backfill_daily_activity()
+    print(f"    Backfilled {activity_rows} daily activity rows")
+
     print("\n" + "=" * 60)
     print("TEST DATA CREATION COMPLETE")
     print("=" * 60)